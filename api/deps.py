@@ -3,7 +3,11 @@ from typing import Optional
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
-from services.supabase_auth import supabase_get_user_from_token, get_app_user_with_org
+from services.supabase_auth import (
+    get_cached_app_user_with_org,
+    supabase_get_user_from_token,
+    verify_token_locally,
+)
 
 # Declaring the token through HTTPBearer instead of a raw `Header` is what puts
 # the "Authorize" padlock in /docs: Swagger sends the header itself once the
@@ -25,8 +29,10 @@ async def get_current_user(
 ) -> dict:
     """
     Dependency that:
-    1. Validates the JWT token against Supabase Auth
-    2. Fetches the app_users record with organization data
+    1. Validates the JWT -- locally (signature/expiry) when the project's
+       signing key is known, otherwise against Supabase Auth
+    2. Fetches the app_users record with organization data (briefly cached
+       per worker; see services.supabase_auth.invalidate_app_user)
     3. Returns the enriched user dict
     """
     if credentials is None:
@@ -42,15 +48,24 @@ async def get_current_user(
 
     token = credentials.credentials
 
-    # Step 1: Validate token and get auth user
-    auth_user = await supabase_get_user_from_token(token)
+    # Step 1: Validate token and get auth user. The claims carry the same
+    # id/email/user_metadata the /auth/v1/user payload would.
+    claims = await verify_token_locally(token)
+    if claims is not None:
+        auth_user = {
+            "id": claims.get("sub"),
+            "email": claims.get("email", ""),
+            "user_metadata": claims.get("user_metadata") or {},
+        }
+    else:
+        auth_user = await supabase_get_user_from_token(token)
     user_id = auth_user.get("id")
 
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid user data from token")
 
     # Step 2: Fetch app_users record with organization
-    app_user = await get_app_user_with_org(user_id)
+    app_user = await get_cached_app_user_with_org(user_id)
 
     if app_user:
         return app_user
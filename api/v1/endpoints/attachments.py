@@ -2,15 +2,16 @@
 Attachment endpoint
 Returns a fresh signed URL for a Pipefy attachment so the browser can download directly.
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import StreamingResponse
-import httpx
+from starlette.background import BackgroundTask
 import logging
 from urllib.parse import urlparse
 from typing import Optional
 from api.deps import get_current_user
 from core.config import settings
 from repositories.pipefy_data import PipeFyDataRepository
+from services.attachment_proxy import open_download
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -104,6 +105,7 @@ async def get_fresh_attachment_url(
 
 @router.get("/download")
 async def download_attachment(
+    request: Request,
     url: str,
     card_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
@@ -111,6 +113,9 @@ async def download_attachment(
     """
     Proxy download — kept for fallback.
     Prefer /fresh-url + direct browser download when possible.
+
+    The file is streamed through as Pipefy sends it (never buffered whole),
+    and Range requests are forwarded so interrupted downloads can resume.
     """
     if not url.startswith("https://app.pipefy.com/storage/"):
         raise HTTPException(
@@ -133,35 +138,17 @@ async def download_attachment(
         except Exception as e:
             logger.warning(f"Failed to fetch fresh URL for card {card_id}: {e}")
 
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(download_url)
-            response.raise_for_status()
-
-            filename = download_url.split("/")[-1].split("?")[0]
-            content_type = response.headers.get("content-type", "application/octet-stream")
-
-            return StreamingResponse(
-                iter([response.content]),
-                media_type=content_type,
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"',
-                    "Content-Length": str(len(response.content)),
-                },
-            )
-
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Failed to download file from Pipefy: {str(e)}",
-        )
-    except httpx.HTTPError as e:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Failed to download file from Pipefy: {str(e)}",
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Unexpected error downloading file: {str(e)}",
-        )
+    download = await open_download(download_url, request.headers)
+
+    filename = download_url.split("/")[-1].split("?")[0]
+    headers = {
+        **download.headers,
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    return StreamingResponse(
+        download.body,
+        status_code=download.status_code,
+        media_type=headers.pop("content-type", "application/octet-stream"),
+        headers=headers,
+        background=BackgroundTask(download.aclose),
+    )
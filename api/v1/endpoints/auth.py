@@ -1,6 +1,11 @@
 from fastapi import APIRouter, HTTPException
 from schemas.auth import LoginRequest, RegisterRequest, AuthResponse
-from services.supabase_auth import supabase_password_login, supabase_register_user, get_app_user_with_org
+from services.supabase_auth import (
+    get_cached_app_user_with_org,
+    invalidate_app_user,
+    supabase_password_login,
+    supabase_register_user,
+)
 
 router = APIRouter()
 
@@ -16,7 +21,10 @@ async def login(request: LoginRequest):
     user_id = result.get("user", {}).get("id")
     app_user = None
     if user_id:
-        app_user = await get_app_user_with_org(user_id)
+        # A fresh login always re-reads the profile (and re-primes the cache
+        # get_current_user reads from).
+        invalidate_app_user(user_id)
+        app_user = await get_cached_app_user_with_org(user_id)
 
     return {
         "access_token": result.get("access_token"),
@@ -44,7 +52,8 @@ async def register(request: RegisterRequest):
     user_id = result.get("user", {}).get("id")
     app_user = None
     if user_id:
-        app_user = await get_app_user_with_org(user_id)
+        invalidate_app_user(user_id)
+        app_user = await get_cached_app_user_with_org(user_id)
 
     return {
         "access_token": result.get("access_token"),
@@ -1,7 +1,8 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Path, Query
+from fastapi import APIRouter, Header, Path, Query, Response
 
+from core import etag
 from schemas.customer import CustomerDetail, CustomerListItem
 from services import customers_service
 
@@ -15,12 +16,16 @@ router = APIRouter()
     tags=["customers"],
 )
 async def list_customers(
+    response: Response,
     organization_id: str = Query(..., description="Organization to list customers for"),
     search: Optional[str] = Query(
         None, description="Filter by name/phone/national_id (case-insensitive partial match)"
     ),
     limit: int = Query(100, ge=1, le=200, description="Max customers to return"),
     offset: int = Query(0, ge=0, description="Pagination offset"),
+    if_none_match: Optional[str] = Header(
+        None, description="ETag of a previous response; 304 while it is current"
+    ),
 ):
     """
     Return the client directory for an organization.
@@ -29,10 +34,20 @@ async def list_customers(
     computed via a single PostgREST embedded-count query. This route is
     intentionally open (no auth dependency), matching the sibling
     `/orders/customers/*` routes.
+
+    Send the `ETag` back as `If-None-Match` to get `304 Not Modified` while
+    the listed customers and their visit counts are unchanged.
     """
-    return await customers_service.list_customers(
+    tag = await customers_service.customers_etag(
         organization_id, search=search, limit=limit, offset=offset
     )
+    if etag.etag_matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    customers = await customers_service.list_customers(
+        organization_id, search=search, limit=limit, offset=offset
+    )
+    etag.tag_response(response, tag)
+    return customers
 
 
 @router.get(
@@ -42,12 +57,21 @@ async def list_customers(
     tags=["customers"],
 )
 async def get_customer_detail(
+    response: Response,
     customer_id: str = Path(..., description="The customer id"),
+    if_none_match: Optional[str] = Header(
+        None, description="ETag of a previous response; 304 while it is current"
+    ),
 ):
     """
     Return a single customer's profile: identity, visit stats
     (`visitas`, `ticket_promedio`, `is_frequent`) and full order history with
     each order's vehicle and technician embedded. Raises 404 if the customer
-    doesn't exist.
+    doesn't exist. Revalidates with `ETag` / `If-None-Match` like the list.
     """
-    return await customers_service.get_customer_detail(customer_id)
+    tag = await customers_service.customer_detail_etag(customer_id)
+    if etag.etag_matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    customer = await customers_service.get_customer_detail(customer_id)
+    etag.tag_response(response, tag)
+    return customer
@@ -1,8 +1,16 @@
 """API endpoint for dashboard order metrics."""
 
+from datetime import date
+from typing import Optional
+
 from fastapi import APIRouter, Query
 
-from schemas.dashboard import DashboardMetricsOut
+from schemas.dashboard import (
+    DashboardMetricsOut,
+    StatusBoardOut,
+    TimeseriesBucket,
+    TimeseriesOut,
+)
 from services import dashboard_service
 
 router = APIRouter()
@@ -31,3 +39,54 @@ async def get_dashboard_metrics(
       there are no cancellations today).
     """
     return await dashboard_service.get_dashboard_metrics(organization_id)
+
+
+@router.get(
+    "/status-board",
+    response_model=StatusBoardOut,
+    summary="Order count per status",
+    tags=["dashboard"],
+)
+async def get_status_board(
+    organization_id: str = Query(
+        ..., description="Organization to count orders for"
+    ),
+):
+    """
+    Current number of orders in every order status (one board column each).
+
+    - **columns**: every status from order_statuses, ordered by status_type
+      then sort_order, with its `count` (0 when empty).
+    - **total**: sum of all column counts.
+    """
+    return await dashboard_service.get_status_board(organization_id)
+
+
+@router.get(
+    "/timeseries",
+    response_model=TimeseriesOut,
+    summary="Dashboard order counts over time",
+    tags=["dashboard"],
+)
+async def get_timeseries(
+    organization_id: str = Query(
+        ..., description="Organization to compute the series for"
+    ),
+    start: Optional[date] = Query(
+        None, alias="from", description="First day (YYYY-MM-DD, America/Panama)"
+    ),
+    end: Optional[date] = Query(
+        None, alias="to", description="Last day, inclusive (default: today)"
+    ),
+    bucket: TimeseriesBucket = Query("day", description="day, week (Monday) or month"),
+):
+    """
+    Created / completed / cancelled orders per day, week or month.
+
+    - Buckets use America/Panama boundaries, like the KPI cards; every bucket
+      in the range is returned, empty ones with zeros.
+    - **from** defaults to 30 days, 12 weeks or 12 months before **to**.
+    - Served from the daily_rollups counters; 503 until migrations 008/009
+      are applied and backfilled.
+    """
+    return await dashboard_service.get_timeseries(organization_id, start, end, bucket)
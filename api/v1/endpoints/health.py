@@ -1,6 +1,10 @@
 from fastapi import APIRouter
 from datetime import datetime
 
+from core.http_pool import pool_stats
+from core.ttl_cache import cache_stats
+from services.attachment_proxy import proxy_stats
+
 router = APIRouter()
 
 @router.get("/health", summary="Health Check", tags=["health"] )
@@ -12,3 +16,30 @@ async def health_check():
         "status": "ok",
         "timestamp": datetime.utcnow().isoformat() + "Z"
     }
+
+
+@router.get("/health/pools", summary="Upstream HTTP pool stats", tags=["health"])
+async def http_pool_stats():
+    """
+    Per-pool counters for the shared upstream HTTP clients (requests, 5xx,
+    transport errors, in-flight and peak in-flight work, HTTP/2 and limits).
+    """
+    return pool_stats()
+
+
+@router.get("/health/caches", summary="In-process cache stats", tags=["health"])
+async def in_process_cache_stats():
+    """
+    Hit/miss/eviction counters and current size of each named in-process
+    cache on this worker.
+    """
+    return cache_stats()
+
+
+@router.get("/health/downloads", summary="Attachment proxy byte budget", tags=["health"])
+async def attachment_proxy_stats():
+    """
+    Bytes currently buffered by the attachment download proxy on this worker,
+    its cap, and how many downloads waited for or were refused budget.
+    """
+    return proxy_stats()
@@ -43,7 +43,8 @@ async def upload_order_files(
     """Upload files into the order's folder and record them in `order_files`.
 
     Each returned item includes a short-lived `signed_url` the frontend can
-    use to display/download the file (the bucket is private).
+    use to display/download the file (the bucket is private), and
+    `upload_ms`, how long that file's upload to Storage took.
     """
     return await order_files_service.upload_files_for_order(
         order_id=order_id,
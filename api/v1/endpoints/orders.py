@@ -1,18 +1,74 @@
+from datetime import date
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Path, Query, status
+from fastapi import APIRouter, Header, Path, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
+from core import etag
 
 from schemas.customer import CustomerSearch, CustomerCreate, CustomerOut, CustomerUpdate
 from schemas.vehicle import VehicleSearch, VehicleCreate, VehicleOut, VehicleUpdate
-from schemas.order import OrderCreate, OrderFullCreate, OrderOut, OrderUpdate, OrderFullUpdate
+from schemas.order import (
+    OrderBulkStatusOut,
+    OrderBulkStatusUpdate,
+    OrderCreate,
+    OrderDetailsPageOut,
+    OrderFullCreate,
+    OrderFullUpdate,
+    OrderOut,
+    OrderSelectPreset,
+    OrderStatus,
+    OrderUpdate,
+)
 from schemas.field_definition import OrderFieldValueOut, OrderFieldValueUpsert
-from services import orders_service, order_files_service, field_definitions_service
-from repositories.orders import CustomerRepository, VehicleRepository
+from services import orders_service, order_files_service, field_definitions_service, order_export
+from services.order_export import ExportFormat
+from repositories.orders import (
+    SEARCH_LIMIT,
+    SEARCH_MAX_LIMIT,
+    CustomerRepository,
+    VehicleRepository,
+)
 
 router = APIRouter()
 
 
+def _csv(value: Optional[str]) -> Optional[List[str]]:
+    """`a,b` -> ["a", "b"]; None stays None (so "" means an empty list)."""
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+# Shared by the order listings: which columns and embeds to return.
+_PRESET_QUERY = Query(
+    None,
+    description=(
+        "Named projection: `detail` (default, everything), `kanban` (board "
+        "card columns, customer name/phone, vehicle make/model/plate) or "
+        "`export` (every order column, slim customer and vehicle)"
+    ),
+)
+_FIELDS_QUERY = Query(
+    None,
+    description=(
+        "Comma-separated order columns to return instead of the preset's, "
+        "e.g. `order_status,received_at` (`id` and `date_order` always come back)"
+    ),
+)
+_INCLUDE_QUERY = Query(
+    None,
+    description=(
+        "Comma-separated embeds to return instead of the preset's: customer, "
+        "vehicle, order_files, order_field_values. Empty for none"
+    ),
+)
+_IF_NONE_MATCH_HEADER = Header(
+    None,
+    description="ETag of a previous response; answered with 304 while it is current",
+)
+
+
 @router.post(
     "/customers/search",
     response_model=List[CustomerOut],
@@ -22,10 +78,12 @@ router = APIRouter()
 async def search_customers(
     body: CustomerSearch,
     organization_id: str = Query(..., description="Organization to search within"),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=SEARCH_MAX_LIMIT, description="Max results"),
 ):
     """
     Search customers within an organization by name/phone/national_id.
 
+    Exact matches come alone, otherwise the best matches first.
     This is a read, so it goes straight to the repository.
     """
     repo = CustomerRepository()
@@ -34,6 +92,7 @@ async def search_customers(
         name=body.name,
         phone=body.phone,
         national_id=body.national_id,
+        limit=limit,
     )
 
 
@@ -74,10 +133,12 @@ async def update_customer(
 async def search_vehicles(
     body: VehicleSearch,
     organization_id: str = Query(..., description="Organization to search within"),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=SEARCH_MAX_LIMIT, description="Max results"),
 ):
     """
     Search vehicles within an organization by plate/make/model.
 
+    Exact matches come alone, otherwise the best matches first.
     This is a read, so it goes straight to the repository.
     """
     repo = VehicleRepository()
@@ -86,6 +147,7 @@ async def search_vehicles(
         plate=body.plate,
         make=body.make,
         model=body.model,
+        limit=limit,
     )
 
 
@@ -134,6 +196,7 @@ async def create_order(body: OrderCreate):
     tags=["orders"],
 )
 async def full_order_details(
+    response: Response,
     organization_id: Optional[str] = Query(
         None, description="Filter by organization"
     ),
@@ -146,22 +209,151 @@ async def full_order_details(
         ),
     ),
     limit: int = Query(100, ge=1, le=200, description="Max orders to return"),
-    offset: int = Query(0, ge=0, description="Pagination offset"),
+    offset: int = Query(
+        0,
+        ge=0,
+        description=(
+            "Pagination offset. Kept for existing clients; deep offsets are "
+            "slow, use /fullOrderDetails/page instead"
+        ),
+    ),
     sign_urls: bool = Query(
         True, description="Attach short-lived signed URLs to each file"
     ),
+    preset: Optional[OrderSelectPreset] = _PRESET_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
+    include: Optional[str] = _INCLUDE_QUERY,
+    if_none_match: Optional[str] = _IF_NONE_MATCH_HEADER,
 ):
     """
     Return all orders, each with its `customer`, `vehicle` and `order_files[]`
     nested. Orders without files are still included (files = []). Private files
     come with a fresh `signed_url` per file unless `sign_urls=false`.
+
+    List views should ask for less: `preset=kanban`, or explicit
+    `fields=` / `include=`. Unknown names are a 400.
+
+    The response carries an `ETag`; send it back as `If-None-Match` to get
+    `304 Not Modified` while none of the listed orders changed.
     """
-    return await orders_service.get_full_order_details(
+    query = dict(
         organization_id=organization_id,
         status=status,
         limit=limit,
         offset=offset,
         sign_urls=sign_urls,
+        preset=preset,
+        fields=_csv(fields),
+        include=_csv(include),
+    )
+    tag = await orders_service.full_order_details_etag(**query)
+    if etag.etag_matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    orders = await orders_service.get_full_order_details(**query)
+    etag.tag_response(response, tag)
+    return orders
+
+
+@router.get(
+    "/fullOrderDetails/page",
+    response_model=OrderDetailsPageOut,
+    summary="Page through orders with customer, vehicle and files",
+    tags=["orders"],
+)
+async def full_order_details_page(
+    response: Response,
+    organization_id: Optional[str] = Query(
+        None, description="Filter by organization"
+    ),
+    status: Optional[List[str]] = Query(
+        None,
+        description=(
+            "Filter by one or more order statuses. Repeat the param to pass "
+            "several: ?status=recibido&status=pagado"
+        ),
+    ),
+    limit: int = Query(100, ge=1, le=200, description="Max orders per page"),
+    cursor: Optional[str] = Query(
+        None, description="`next_cursor` from the previous page; omit for the first"
+    ),
+    sign_urls: bool = Query(
+        True, description="Attach short-lived signed URLs to each file"
+    ),
+    preset: Optional[OrderSelectPreset] = _PRESET_QUERY,
+    fields: Optional[str] = _FIELDS_QUERY,
+    include: Optional[str] = _INCLUDE_QUERY,
+    if_none_match: Optional[str] = _IF_NONE_MATCH_HEADER,
+):
+    """
+    Same orders as `/fullOrderDetails` (newest `date_order` first), paginated
+    with an opaque cursor instead of an offset, so every page costs the same
+    however deep it is. Keep the filters unchanged between pages.
+
+    - **orders**: the page, each order with `customer`, `vehicle`,
+      `order_files[]` and `order_field_values[]` nested.
+    - **next_cursor**: pass it as `cursor` to get the next page; null on the
+      last page.
+
+    Takes the same `preset` / `fields` / `include` projection and
+    `ETag` / `If-None-Match` revalidation as `/fullOrderDetails`.
+    """
+    query = dict(
+        organization_id=organization_id,
+        status=status,
+        limit=limit,
+        cursor=cursor,
+        sign_urls=sign_urls,
+        preset=preset,
+        fields=_csv(fields),
+        include=_csv(include),
+    )
+    tag = await orders_service.full_order_details_etag(paged=True, **query)
+    if etag.etag_matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    page = await orders_service.get_full_order_details_page(**query)
+    etag.tag_response(response, tag)
+    return page
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Export an organization's orders (NDJSON or CSV)",
+    tags=["orders"],
+)
+async def export_orders(
+    request: Request,
+    organization_id: str = Query(..., description="Organization to export"),
+    export_format: ExportFormat = Query(
+        "ndjson", alias="format", description="`ndjson` (default) or `csv`"
+    ),
+    status: Optional[List[str]] = Query(
+        None, description="Only orders in these statuses (repeat the param)"
+    ),
+):
+    """
+    Stream every order of the organization, newest `date_order` first, with
+    its customer and vehicle flattened into `customer_*` / `vehicle_*`
+    columns: one JSON object per line, or CSV with a header row.
+
+    The export is read page by page and streamed as it goes, so it has no
+    size limit and starts downloading immediately. Sent gzip-compressed when
+    the client accepts it (`Accept-Encoding: gzip`).
+    """
+    chunks = await order_export.export_orders(
+        organization_id, status=status, export_format=export_format
+    )
+    headers = {
+        "Content-Disposition": (
+            f'attachment; filename="orders-{date.today().isoformat()}.{export_format}"'
+        ),
+        "Vary": "Accept-Encoding",
+    }
+    if order_export.accepts_gzip(request.headers.get("accept-encoding")):
+        chunks = order_export.gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        chunks, media_type=order_export.MEDIA_TYPES[export_format], headers=headers
     )
 
 
@@ -195,10 +387,22 @@ async def create_full_order(body: OrderFullCreate) -> OrderOut:
     tags=["orders"],
 )
 async def get_full_order_detail(
+    response: Response,
     order_id: str = Path(..., description="The order id"),
     sign_urls: bool = Query(True, description="Attach signed URLs to files"),
+    if_none_match: Optional[str] = _IF_NONE_MATCH_HEADER,
 ):
-    return await orders_service.get_full_order_detail_by_id(order_id, sign_urls=sign_urls)
+    """
+    Return the order with its customer, vehicle, files, field values and
+    users. Send the `ETag` back as `If-None-Match` to get
+    `304 Not Modified` while the order is unchanged.
+    """
+    tag = await orders_service.full_order_detail_etag(order_id, sign_urls=sign_urls)
+    if etag.etag_matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    order = await orders_service.get_full_order_detail_by_id(order_id, sign_urls=sign_urls)
+    etag.tag_response(response, tag)
+    return order
 
 
 @router.patch(
@@ -214,6 +418,25 @@ async def update_full_order_detail(
     return await orders_service.update_full_order_detail(order_id, body)
 
 
+@router.patch(
+    "/bulk-status",
+    response_model=OrderBulkStatusOut,
+    summary="Move several orders to one status",
+    tags=["orders"],
+)
+async def bulk_update_status(body: OrderBulkStatusUpdate):
+    """
+    Move up to 200 orders to `order_status` (a code of the order_statuses
+    catalog; 422 otherwise), recording an order_status_history row for each
+    order that actually changed.
+
+    Every requested id gets an outcome: `updated`, `unchanged` (already in
+    the status), `not_found`, or `conflict` (its status changed while the
+    batch was applied; left as is).
+    """
+    return await orders_service.bulk_update_status(body)
+
+
 @router.patch(
     "/{order_id}",
     response_model=OrderOut,
@@ -223,9 +446,32 @@ async def update_full_order_detail(
 async def update_order(
     body: OrderUpdate,
     order_id: str = Path(..., description="The order id to update"),
+    expected_status: Optional[OrderStatus] = Query(
+        None,
+        description=(
+            "Only apply the update if the order is still in this status; "
+            "409 otherwise"
+        ),
+    ),
 ) -> OrderOut:
-    """Partially update an order (only the fields provided are changed)."""
-    return await orders_service.update_order(order_id, body)
+    """
+    Partially update an order (only the fields provided are changed). A
+    status change and its history row are written in one transaction.
+    """
+    return await orders_service.update_order(order_id, body, expected_status=expected_status)
+
+
+@router.get(
+    "/{order_id}/status",
+    response_model=Dict[str, str],
+    summary="Get an order's current status",
+    tags=["orders"],
+)
+async def get_order_status(
+    order_id: str = Path(..., description="The order id"),
+):
+    """Return `{"order_status": ...}` without loading the order's embeds."""
+    return {"order_status": await orders_service.get_order_status(order_id)}
 
 
 @router.delete(
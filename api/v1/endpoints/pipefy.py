@@ -1,12 +1,14 @@
 import logging
+from functools import partial
 from typing import Dict, Any, Optional, List
 from fastapi import APIRouter, HTTPException, status
 from core.config import settings
 from repositories.pipefy_data import PipeFyDataRepository
-from repositories.card_actions import CardActionsRepository
+from repositories.card_actions import known_card_ids
 from repositories.pipefy_events import PipefyEventsRepository
 from schemas.pipefy_events import SyncCardsRequest, SyncCardsResponse
 from services.pipefy_service import process_card_details, process_card_details_backup
+from services.pipefy_sync import CardSyncPool, get_progress, list_progress, run_card_sync
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -25,7 +27,7 @@ async def sync_phase_cards(request: SyncCardsRequest):
     This endpoint:
     1. Fetches cards from the specified phase using Pipefy GraphQL API (with pagination)
     2. For each card, fetches nested cards (user_data, user_car_information)
-    3. Queries existing actions from card_actions table
+    3. Skips cards of this page that already have rows in card_actions
     4. Saves each card as an event in pipefy_events table with webhook-compatible format
 
     **Pagination:**
@@ -92,9 +94,10 @@ async def sync_phase_cards(request: SyncCardsRequest):
         phase_name = cards_result.get("phase_name")
         cards_count = cards_result.get("cards_count")
 
-        # Step 2: Query existing cards from card_actions table
-        card_actions_repo = CardActionsRepository()
-        existing_card_ids = await card_actions_repo.get_all_card_ids()
+        # Step 2: Ask card_actions about this page's cards only
+        existing_card_ids = await known_card_ids(
+            request.organization_id, [card["id"] for card in cards]
+        )
 
         # Filter out cards that already exist in card_actions
         original_count = len(cards)
@@ -122,26 +125,23 @@ async def sync_phase_cards(request: SyncCardsRequest):
 
         logger.info(f"Fetched {len(cards)} cards from Pipefy")
 
-        # Step 2: Process each card using the same method as webhook
-        card_ids: List[str] = []
-        processed_count = 0
+        # Step 2: Process the cards with the same method as the webhook, on a
+        # bounded worker pool (Pipefy's rate limit is enforced per request).
+        # The page's cards are prefetched in batched queries and the workers
+        # share pipefy_repo, so connected-card lookups are batched as well.
+        card_ids: List[str] = [card["id"] for card in cards]
 
         logger.info(f"Processing {len(cards)} cards using process_card_details method")
 
-        for card in cards:
-            card_id = card["id"]
-            card_ids.append(card_id)
-
-            try:
-                # Use the exact same method as webhook to process and save the card
-                result = await process_card_details(card_id)
-                processed_count += 1
-                logger.info(f"Processed card {card_id} ({processed_count}/{len(cards)})")
-            except Exception as e:
-                logger.error(f"Error processing card {card_id}: {str(e)}", exc_info=True)
-                # Continue processing other cards even if one fails
+        await pipefy_repo.prefetch_cards(card_ids)
+        progress = await run_card_sync(
+            card_ids,
+            partial(process_card_details, pipefy_repo=pipefy_repo),
+            kind="sync",
+            phase_id=request.phase_id,
+        )
 
-        logger.info(f"Successfully processed {processed_count} out of {len(cards)} cards")
+        logger.info(f"Successfully processed {progress.done} out of {len(cards)} cards")
 
         # Build response
         return SyncCardsResponse(
@@ -151,10 +151,13 @@ async def sync_phase_cards(request: SyncCardsRequest):
             organization_id=request.organization_id,
             total_cards_in_phase=cards_count,
             total_cards_fetched=len(cards),
-            total_events_created=processed_count,
+            total_events_created=progress.done,
             cards_synced=card_ids,
             has_more_pages=page_info.get("hasNextPage", False),
-            next_cursor=page_info.get("endCursor")
+            next_cursor=page_info.get("endCursor"),
+            sync_id=progress.sync_id,
+            cards_failed=list(progress.errors),
+            duration_seconds=progress.as_dict()["elapsed_seconds"],
         )
 
     except Exception as e:
@@ -276,26 +279,20 @@ async def backup_phase_cards_page(request: SyncCardsRequest):
 
         logger.info(f"Fetched {len(cards)} cards from Pipefy for backup")
 
-        # Step 2: Process each card and save to backup table
-        card_ids: List[str] = []
-        processed_count = 0
+        # Step 2: Process the cards on the worker pool and save to backup table
+        card_ids: List[str] = [card["id"] for card in cards]
 
         logger.info(f"Processing {len(cards)} cards for backup using process_card_details_backup method")
 
-        for card in cards:
-            card_id = card["id"]
-            card_ids.append(card_id)
-
-            try:
-                # Use backup method to save to pipefy_events_backup table
-                result = await process_card_details_backup(card_id)
-                processed_count += 1
-                logger.info(f"Backed up card {card_id} ({processed_count}/{len(cards)})")
-            except Exception as e:
-                logger.error(f"Error backing up card {card_id}: {str(e)}", exc_info=True)
-                # Continue processing other cards even if one fails
+        await pipefy_repo.prefetch_cards(card_ids)
+        progress = await run_card_sync(
+            card_ids,
+            partial(process_card_details_backup, pipefy_repo=pipefy_repo),
+            kind="backup",
+            phase_id=request.phase_id,
+        )
 
-        logger.info(f"Successfully backed up {processed_count} out of {len(cards)} cards")
+        logger.info(f"Successfully backed up {progress.done} out of {len(cards)} cards")
 
         # Build response
         return SyncCardsResponse(
@@ -305,10 +302,13 @@ async def backup_phase_cards_page(request: SyncCardsRequest):
             organization_id=request.organization_id,
             total_cards_in_phase=cards_count,
             total_cards_fetched=len(cards),
-            total_events_created=processed_count,
+            total_events_created=progress.done,
             cards_synced=card_ids,
             has_more_pages=page_info.get("hasNextPage", False),
-            next_cursor=page_info.get("endCursor")
+            next_cursor=page_info.get("endCursor"),
+            sync_id=progress.sync_id,
+            cards_failed=list(progress.errors),
+            duration_seconds=progress.as_dict()["elapsed_seconds"],
         )
 
     except Exception as e:
@@ -388,7 +388,6 @@ async def backup_all_phase_cards(request: SyncCardsRequest):
 
         # Tracking variables for all pages
         all_card_ids: List[str] = []
-        total_processed = 0
         total_fetched = 0
         cursor = None
         has_more = True
@@ -398,46 +397,45 @@ async def backup_all_phase_cards(request: SyncCardsRequest):
 
         logger.info(f"Starting full backup of phase {request.phase_id}")
 
-        # Loop through all pages
-        while has_more:
-            logger.info(f"Fetching page {page_number} (cursor: {cursor}, limit: {request.limit})")
-
-            # Fetch cards from Pipefy with pagination
-            cards_result = await pipefy_repo.get_all_cards_in_phase(
-                phase_id=request.phase_id,
-                first=request.limit,
-                after=cursor
-            )
+        # Workers back up the cards of one page while the next page is fetched
+        async with CardSyncPool(
+            partial(process_card_details_backup, pipefy_repo=pipefy_repo),
+            kind="backup-all",
+            phase_id=request.phase_id,
+        ) as pool:
+            # Loop through all pages
+            while has_more:
+                logger.info(f"Fetching page {page_number} (cursor: {cursor}, limit: {request.limit})")
 
-            cards = cards_result.get("cards", [])
-            page_info = cards_result.get("pageInfo", {})
-            phase_name = cards_result.get("phase_name")
-            cards_count = cards_result.get("cards_count")
+                # Fetch cards from Pipefy with pagination
+                cards_result = await pipefy_repo.get_all_cards_in_phase(
+                    phase_id=request.phase_id,
+                    first=request.limit,
+                    after=cursor
+                )
 
-            # Update pagination info
-            has_more = page_info.get("hasNextPage", False)
-            cursor = page_info.get("endCursor")
+                cards = cards_result.get("cards", [])
+                page_info = cards_result.get("pageInfo", {})
+                phase_name = cards_result.get("phase_name")
+                cards_count = cards_result.get("cards_count")
 
-            logger.info(f"Page {page_number}: Fetched {len(cards)} cards, has_more={has_more}")
-            total_fetched += len(cards)
+                # Update pagination info
+                has_more = page_info.get("hasNextPage", False)
+                cursor = page_info.get("endCursor")
 
-            # Process each card in this page
-            for card in cards:
-                card_id = card["id"]
-                all_card_ids.append(card_id)
+                logger.info(f"Page {page_number}: Fetched {len(cards)} cards, has_more={has_more}")
+                total_fetched += len(cards)
 
-                try:
-                    # Use backup method to save to pipefy_events_backup table
-                    result = await process_card_details_backup(card_id)
-                    total_processed += 1
-                    logger.info(f"Backed up card {card_id} ({total_processed}/{total_fetched})")
-                except Exception as e:
-                    logger.error(f"Error backing up card {card_id}: {str(e)}", exc_info=True)
-                    # Continue processing other cards even if one fails
+                page_ids = [card["id"] for card in cards]
+                await pipefy_repo.prefetch_cards(page_ids)
+                for card_id in page_ids:
+                    all_card_ids.append(card_id)
+                    pool.submit(card_id)
 
-            page_number += 1
+                page_number += 1
 
-        logger.info(f"Completed full backup: {total_processed} cards backed up across {page_number - 1} pages")
+        progress = pool.progress
+        logger.info(f"Completed full backup: {progress.done} cards backed up across {page_number - 1} pages")
 
         # Build response
         return SyncCardsResponse(
@@ -447,10 +445,13 @@ async def backup_all_phase_cards(request: SyncCardsRequest):
             organization_id=request.organization_id,
             total_cards_in_phase=cards_count,
             total_cards_fetched=total_fetched,
-            total_events_created=total_processed,
+            total_events_created=progress.done,
             cards_synced=all_card_ids,
             has_more_pages=False,
-            next_cursor=None
+            next_cursor=None,
+            sync_id=progress.sync_id,
+            cards_failed=list(progress.errors),
+            duration_seconds=progress.as_dict()["elapsed_seconds"],
         )
 
     except Exception as e:
@@ -470,3 +471,24 @@ async def backup_all_phase_cards(request: SyncCardsRequest):
             next_cursor=None,
             error=str(e)
         )
+
+
+@router.get(
+    "/sync-progress",
+    summary="Progress of recent phase sync / backup runs",
+    tags=["pipefy"]
+)
+async def sync_progress(sync_id: Optional[str] = None):
+    """
+    Live progress of the card sync / backup runs on this worker.
+
+    Without `sync_id`, returns the recent runs newest first. With it, returns
+    that run (404 if unknown). Each run reports `total`, `done`, `failed`,
+    `in_flight`, `last_card_id`, per-card `card_ms` timings and `errors`.
+    """
+    if sync_id is None:
+        return list_progress()
+    progress = get_progress(sync_id)
+    if progress is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown sync_id")
+    return progress
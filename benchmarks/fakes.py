@@ -0,0 +1,259 @@
+"""In-process stand-ins for the upstreams the API talks to.
+
+Each fake is an httpx transport (``.transport()``) that answers on the event
+loop after a configurable latency and counts every call by route, so the
+benchmark can report both how long an endpoint took and how many upstream
+round trips it cost.
+
+- FakePostgrest: a small in-memory PostgREST + Storage signing + Auth user
+  endpoint. Tables are lists of dicts; rows for embedded resources
+  (``customer:customers(*)`` and the like) are stored pre-joined, since the
+  fake ignores ``select``. Supported filters: eq, neq, in, gt, gte, lt, lte,
+  is; filters on columns a row does not have (embedded filters such as
+  ``wa_conversations.organization_id``) are ignored. ``Prefer: count=exact``
+  yields a Content-Range header. RPCs are Python callables over the tables.
+- FakeWhapi: POST /messages/text.
+- FakePipefy: the GraphQL queries in repositories/pipefy_data.py (phase
+  cards page and aliased ``cN: card(id: $idN)`` batches).
+"""
+
+import asyncio
+import json
+import random
+import re
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+class Upstream:
+    """
+    Args:
+        name: Label used in the report.
+        latency: Seconds added to every response (simulated network + server).
+        jitter: Up to this many extra seconds, uniformly distributed.
+        seed: Seed for the jitter, so runs are comparable.
+    """
+
+    def __init__(self, name: str, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.calls: Counter = Counter()
+        self._random = random.Random(seed)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self._handle)
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        route, response = self.route(request)
+        self.calls[route] += 1
+        return response
+
+    def route(self, request: httpx.Request) -> Tuple[str, httpx.Response]:
+        raise NotImplementedError
+
+
+# ---------------------------------------------------------------------------
+# PostgREST
+# ---------------------------------------------------------------------------
+def _coerce(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "" if value is None else str(value)
+
+
+def _matches(row: Dict[str, Any], column: str, expression: str) -> bool:
+    if "." in column or column not in row:
+        return True
+    operator, _, operand = expression.partition(".")
+    value = row[column]
+    if operator == "is":
+        return {"null": value is None, "true": value is True, "false": value is False}.get(operand, True)
+    if operator == "in":
+        options = [item.strip().strip('"') for item in operand.strip("()").split(",")]
+        return _coerce(value) in options
+    text = _coerce(value)
+    comparisons = {
+        "eq": lambda: text == operand,
+        "neq": lambda: text != operand,
+        "gt": lambda: value is not None and text > operand,
+        "gte": lambda: value is not None and text >= operand,
+        "lt": lambda: value is not None and text < operand,
+        "lte": lambda: value is not None and text <= operand,
+    }
+    check = comparisons.get(operator)
+    return check() if check else True
+
+
+class FakePostgrest(Upstream):
+    """Supabase REST (PostgREST), Storage signing and Auth user lookup."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        super().__init__("postgrest", latency, jitter, seed)
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.rpcs: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self.auth_users: Dict[str, Dict[str, Any]] = {}
+
+    def table(self, name: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(name, [])
+
+    def _select(self, name: str, params: httpx.QueryParams) -> List[Dict[str, Any]]:
+        rows = self.table(name)
+        for column, expression in params.multi_items():
+            if column in _RESERVED_PARAMS or column in ("or", "and"):
+                continue
+            rows = [row for row in rows if _matches(row, column, expression)]
+        return rows
+
+    def route(self, request: httpx.Request) -> Tuple[str, httpx.Response]:
+        path = request.url.path
+        if path.startswith("/rest/v1/rpc/"):
+            name = path.rsplit("/", 1)[-1]
+            handler = self.rpcs.get(name)
+            if handler is None:
+                return f"RPC {name}", httpx.Response(404, json={"code": "PGRST202", "message": f"{name} not found"})
+            return f"RPC {name}", httpx.Response(200, json=handler(json.loads(request.content or b"{}")))
+        if path.startswith("/rest/v1/"):
+            name = path[len("/rest/v1/"):]
+            return f"{request.method} {name}", self._rest(request, name)
+        if path.startswith("/storage/v1/object/sign/"):
+            body = json.loads(request.content or b"{}")
+            signed = [
+                {"path": p, "signedURL": f"/object/sign/{path.rsplit('/', 1)[-1]}/{p}?token=bench"}
+                for p in body.get("paths", [])
+            ]
+            return "POST storage sign", httpx.Response(200, json=signed)
+        if path == "/auth/v1/user":
+            token = request.headers.get("authorization", "").partition(" ")[2]
+            user = self.auth_users.get(token)
+            if user is None:
+                return "GET auth user", httpx.Response(401, json={"message": "invalid token"})
+            return "GET auth user", httpx.Response(200, json=user)
+        return f"{request.method} {path}", httpx.Response(404, json={"message": f"no fake for {path}"})
+
+    def _rest(self, request: httpx.Request, name: str) -> httpx.Response:
+        params = request.url.params
+        prefer = request.headers.get("prefer", "")
+
+        if request.method == "GET":
+            rows = self._select(name, params)
+            order = params.get("order")
+            if order:
+                column, _, direction = order.split(",")[0].partition(".")
+                rows = sorted(rows, key=lambda row: _coerce(row.get(column)), reverse=direction.startswith("desc"))
+            total = len(rows)
+            offset = int(params.get("offset", 0))
+            limit = params.get("limit")
+            page = rows[offset: offset + int(limit)] if limit is not None else rows[offset:]
+            headers = {}
+            if "count=exact" in prefer:
+                end = offset + len(page) - 1 if page else offset
+                headers["Content-Range"] = f"{offset}-{end}/{total}"
+            return httpx.Response(200, json=page, headers=headers)
+
+        if request.method == "POST":
+            body = json.loads(request.content or b"[]")
+            inserted = []
+            for row in body if isinstance(body, list) else [body]:
+                row = {"id": str(uuid.uuid4()), "created_at": _now(), **row}
+                self.table(name).append(row)
+                inserted.append(row)
+            return httpx.Response(201, json=inserted)
+
+        if request.method == "PATCH":
+            changes = json.loads(request.content or b"{}")
+            matched = self._select(name, params)
+            for row in matched:
+                row.update(changes)
+            return httpx.Response(200, json=matched)
+
+        if request.method == "DELETE":
+            matched = self._select(name, params)
+            ids = {id(row) for row in matched}
+            self.tables[name] = [row for row in self.table(name) if id(row) not in ids]
+            return httpx.Response(200, json=matched)
+
+        return httpx.Response(405, json={"message": "method not allowed"})
+
+
+def _now(offset: timedelta = timedelta()) -> str:
+    return (datetime.now(timezone.utc) + offset).isoformat()
+
+
+# ---------------------------------------------------------------------------
+# Whapi
+# ---------------------------------------------------------------------------
+class FakeWhapi(Upstream):
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        super().__init__("whapi", latency, jitter, seed)
+
+    def route(self, request: httpx.Request) -> Tuple[str, httpx.Response]:
+        path = request.url.path
+        if request.method == "POST" and path.endswith("/messages/text"):
+            body = json.loads(request.content or b"{}")
+            return "POST messages/text", httpx.Response(200, json={
+                "sent": True,
+                "message": {"id": uuid.uuid4().hex, "chat_id": body.get("to"), "status": "sent"},
+            })
+        return f"{request.method} {path}", httpx.Response(404, json={"error": "no fake"})
+
+
+# ---------------------------------------------------------------------------
+# Pipefy GraphQL
+# ---------------------------------------------------------------------------
+_ALIAS = re.compile(r"(c\d+): card\(id: \$(id\d+)\)")
+
+
+class FakePipefy(Upstream):
+    """
+    Phases map to card ids; cards are plain dicts shaped like Pipefy's
+    CardDetails fragment.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        super().__init__("pipefy", latency, jitter, seed)
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.cards: Dict[str, Dict[str, Any]] = {}
+
+    def route(self, request: httpx.Request) -> Tuple[str, httpx.Response]:
+        payload = json.loads(request.content or b"{}")
+        query = payload.get("query", "")
+        variables = payload.get("variables") or {}
+
+        if "phase(id:" in query:
+            return "graphql phase cards", httpx.Response(200, json={"data": {"phase": self._phase_page(variables)}})
+
+        aliases = _ALIAS.findall(query)
+        if aliases:
+            data = {alias: self.cards.get(str(variables.get(var))) for alias, var in aliases}
+            return f"graphql cards x{len(aliases)}", httpx.Response(200, json={"data": data})
+
+        return "graphql other", httpx.Response(200, json={"data": {}})
+
+    def _phase_page(self, variables: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        phase = self.phases.get(str(variables.get("phaseId")))
+        if phase is None:
+            return None
+        card_ids: List[str] = phase["card_ids"]
+        start = int(variables["after"]) if variables.get("after") else 0
+        page = card_ids[start: start + int(variables.get("first", 50))]
+        end = start + len(page)
+        return {
+            "id": phase["id"],
+            "name": phase["name"],
+            "cards_count": len(card_ids),
+            "fields": [],
+            "cards": {
+                "edges": [{"node": self.cards[card_id]} for card_id in page],
+                "pageInfo": {"hasNextPage": end < len(card_ids), "endCursor": str(end)},
+            },
+        }
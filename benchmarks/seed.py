@@ -0,0 +1,272 @@
+"""Deterministic data for the fakes: one organization with orders, citas,
+WhatsApp traffic and a Pipefy phase, sized by the caller.
+
+The RPCs registered here answer from the same tables, so the dashboard and
+marketing endpoints exercise their one-query paths; leave them out
+(``with_rpcs=False``) to measure the PostgREST fallbacks instead.
+"""
+
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from benchmarks.fakes import FakePipefy, FakePostgrest
+
+STATUSES = [
+    "recibido", "en_proceso", "pendiente_aprobacion", "aprobado",
+    "contactado", "agendado", "finalizada", "pagado", "cancelado",
+]
+TEMPLATE_NAME = "bench_followup"
+
+
+@dataclass(frozen=True)
+class Seeded:
+    organization_id: str
+    user_id: str
+    order_ids: List[str]
+    phase_id: str
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat()
+
+
+def seed(
+    postgrest: FakePostgrest,
+    pipefy: FakePipefy,
+    orders: int = 200,
+    files_per_order: int = 2,
+    citas: int = 60,
+    conversations: int = 150,
+    cards: int = 50,
+    with_rpcs: bool = True,
+    seed_value: int = 7,
+) -> Seeded:
+    rng = random.Random(seed_value)
+    ids = lambda: str(uuid.UUID(int=rng.getrandbits(128)))  # noqa: E731 -- stable across runs
+    now = datetime.now(timezone.utc)
+    org_id, user_id = ids(), ids()
+
+    postgrest.table("app_users").append({
+        "id": user_id,
+        "organization_id": org_id,
+        "name": "Bench User",
+        "email": "bench@example.com",
+        "role": "admin",
+        "organization": {"id": org_id, "name": "Bench", "legal_name": "Bench S.A.", "tax_id": "0"},
+    })
+    postgrest.table("message_templates").append({
+        "id": ids(),
+        "organization_id": org_id,
+        "name": TEMPLATE_NAME,
+        "body": "Hola {name}, su vehículo {plate} está listo.",
+        "params": ["name", "plate"],
+        "language": "es",
+        "is_active": True,
+    })
+
+    order_ids: List[str] = []
+    for i in range(orders):
+        order_id, customer_id, vehicle_id = ids(), ids(), ids()
+        received = now - timedelta(hours=rng.randint(0, 24 * 60))
+        order_ids.append(order_id)
+        postgrest.table("orders").append({
+            "id": order_id,
+            "organization_id": org_id,
+            "customer_id": customer_id,
+            "vehicle_id": vehicle_id,
+            "order_status": rng.choice(STATUSES),
+            "received_at": _iso(received),
+            "date_order": _iso(received),
+            "total_amount": round(rng.uniform(20, 900), 2),
+            "customer": {"id": customer_id, "name": f"Cliente {i}", "phone": f"5076{i:07d}"},
+            "vehicle": {"id": vehicle_id, "plate": f"BN{i:04d}", "brand": "Toyota", "model": "Hilux"},
+            "order_files": [
+                {"id": ids(), "order_id": order_id, "file_url": f"{order_id}/photo_{n}.jpg", "label": "recepcion"}
+                for n in range(files_per_order)
+            ],
+            "order_field_values": [],
+        })
+        for status in ("pagado", "cancelado"):
+            if rng.random() < 0.1:
+                postgrest.table("order_status_history").append({
+                    "id": ids(),
+                    "order_id": order_id,
+                    "organization_id": org_id,
+                    "to_status": status,
+                    "changed_at": _iso(now - timedelta(hours=rng.randint(0, 48))),
+                })
+
+    for i in range(citas):
+        customer_id = ids()
+        postgrest.table("citas").append({
+            "id": ids(),
+            "organization_id": org_id,
+            "customer_id": customer_id,
+            "vehicle_id": None,
+            "scheduled_at": _iso(now + timedelta(hours=rng.randint(0, 24 * 14))),
+            "service_type": "mantenimiento",
+            "status": "agendada",
+            "converted_order_id": None,
+            "created_at": _iso(now),
+            "updated_at": _iso(now),
+            "customer": {"id": customer_id, "name": f"Cita {i}", "phone": f"5076{i:07d}"},
+        })
+
+    for _ in range(conversations):
+        conversation_id = ids()
+        postgrest.table("wa_conversations").append({"id": conversation_id, "organization_id": org_id})
+        for direction in ("outbound", "inbound"):
+            if direction == "inbound" and rng.random() < 0.5:
+                continue
+            postgrest.table("wa_messages").append({
+                "id": ids(),
+                "conversation_id": conversation_id,
+                "direction": direction,
+                "sent_at": _iso(now - timedelta(hours=rng.randint(0, 24 * 7))),
+            })
+
+    if with_rpcs:
+        _register_rpcs(postgrest)
+
+    phase_id = "900000001"
+    _seed_pipefy(pipefy, phase_id, cards, rng)
+    return Seeded(org_id, user_id, order_ids, phase_id)
+
+
+def _register_rpcs(postgrest: FakePostgrest) -> None:
+    """Answers shaped like migrations 004-007 and 012, computed from the tables."""
+
+    def org_orders(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [o for o in postgrest.table("orders") if o["organization_id"] == payload["p_organization_id"]]
+
+    def distinct_transitions(org: str, status: str, after: str) -> int:
+        return len({
+            h["order_id"] for h in postgrest.table("order_status_history")
+            if h["organization_id"] == org and h["to_status"] == status and h["changed_at"] >= after
+        })
+
+    def dashboard_kpis(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        week, month = today - timedelta(days=today.weekday()), today.replace(day=1)
+        rows = org_orders(payload)
+        org = payload["p_organization_id"]
+        active = set(payload.get("p_active_statuses") or [])
+        return [{
+            "today_start": _iso(today),
+            "week_start": _iso(week),
+            "month_start": _iso(month),
+            "created_today": sum(o["received_at"] >= _iso(today) for o in rows),
+            "created_this_week": sum(o["received_at"] >= _iso(week) for o in rows),
+            "created_this_month": sum(o["received_at"] >= _iso(month) for o in rows),
+            "active_orders": sum(o["order_status"] in active for o in rows),
+            "completed_today": distinct_transitions(org, "pagado", _iso(today)),
+            "cancelled_today": distinct_transitions(org, "cancelado", _iso(today)),
+        }]
+
+    def order_status_counts(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        counts: Dict[str, int] = {}
+        for order in org_orders(payload):
+            counts[order["order_status"]] = counts.get(order["order_status"], 0) + 1
+        return [{"order_status": status, "order_count": count} for status, count in counts.items()]
+
+    def count_orders_reached_status(payload: Dict[str, Any]) -> int:
+        return distinct_transitions(payload["p_organization_id"], payload["p_to_status"], payload["p_changed_after"])
+
+    def marketing_response_counts(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        org_conversations = {
+            c["id"] for c in postgrest.table("wa_conversations")
+            if c["organization_id"] == payload["p_organization_id"]
+        }
+        by_direction: Dict[str, set] = {"outbound": set(), "inbound": set()}
+        for message in postgrest.table("wa_messages"):
+            if message["conversation_id"] in org_conversations and message["sent_at"] >= payload["p_sent_after"]:
+                by_direction.setdefault(message["direction"], set()).add(message["conversation_id"])
+        messaged = by_direction["outbound"]
+        return [{"messaged": len(messaged), "replied": len(messaged & by_direction["inbound"])}]
+
+    def transition_order_status(payload: Dict[str, Any]) -> Dict[str, Any]:
+        # Compare-and-set is not modelled: the benchmark never sends expected_status.
+        order = next((o for o in postgrest.table("orders") if o["id"] == payload["p_order_id"]), None)
+        if order is None:
+            return {"order": None, "from_status": None}
+        from_status = order["order_status"]
+        order.update(payload["p_changes"])
+        if order["order_status"] != from_status:
+            postgrest.table("order_status_history").append({
+                "id": str(uuid.uuid4()),
+                "order_id": order["id"],
+                "organization_id": order["organization_id"],
+                "status_type": "workshop",
+                "from_status": from_status,
+                "to_status": order["order_status"],
+                "changed_by": payload.get("p_changed_by"),
+                "changed_at": _iso(datetime.now(timezone.utc)),
+            })
+        return {"order": dict(order), "from_status": from_status}
+
+    postgrest.rpcs.update({
+        "transition_order_status": transition_order_status,
+        "dashboard_kpis": dashboard_kpis,
+        "order_status_counts": order_status_counts,
+        "count_orders_reached_status": count_orders_reached_status,
+        "marketing_response_counts": marketing_response_counts,
+    })
+
+
+def _field(field_id: str, value: Any = None, array_value: Any = None) -> Dict[str, Any]:
+    return {
+        "name": field_id,
+        "value": value,
+        "array_value": array_value,
+        "date_value": None,
+        "datetime_value": None,
+        "float_value": None,
+        "report_value": None,
+        "filled_at": None,
+        "updated_at": None,
+        "field": {"id": field_id, "label": field_id, "type": "connector" if array_value else "short_text"},
+    }
+
+
+def _card(card_id: str, title: str, fields: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "id": card_id,
+        "title": title,
+        "current_phase": {"id": "900000001", "name": "Recepción"},
+        "fields": fields,
+        "assignees": [],
+        "labels": [],
+        "attachments": [],
+        "pipe": {"id": "300000001", "name": "Taller"},
+        "created_at": "2024-01-01T00:00:00Z",
+        "createdAt": "2024-01-01T00:00:00Z",
+        "updated_at": "2024-01-01T00:00:00Z",
+        "due_date": None,
+        "url": f"https://app.pipefy.com/open-cards/{card_id}",
+    }
+
+
+def _seed_pipefy(pipefy: FakePipefy, phase_id: str, cards: int, rng: random.Random) -> None:
+    # Several order cards share a customer/vehicle card, as in production,
+    # so the connected-card cache and batching both get exercised.
+    customers = [str(800000000 + n) for n in range(max(1, cards // 3))]
+    vehicles = [str(700000000 + n) for n in range(max(1, cards // 3))]
+    for card_id in customers:
+        pipefy.cards[card_id] = _card(card_id, f"Cliente {card_id}", [_field("telefono", "+50760000000")])
+    for card_id in vehicles:
+        pipefy.cards[card_id] = _card(card_id, f"Auto {card_id}", [_field("placa", f"BN{card_id[-4:]}")])
+
+    card_ids = []
+    for n in range(cards):
+        card_id = str(600000000 + n)
+        card_ids.append(card_id)
+        pipefy.cards[card_id] = _card(card_id, f"Orden {n}", [
+            _field("nombre", array_value=[rng.choice(customers)]),
+            _field("auto_a_recibit", array_value=[rng.choice(vehicles)]),
+            _field("observaciones", "Cambio de aceite"),
+        ])
+    pipefy.phases[phase_id] = {"id": phase_id, "name": "Recepción", "card_ids": card_ids}
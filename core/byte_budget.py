@@ -0,0 +1,102 @@
+"""Per-worker cap on bytes held in memory by concurrent streams.
+
+A ``ByteBudget`` is a counting semaphore measured in bytes: a stream reserves
+the size of the chunk it is about to buffer and gives it back once the chunk
+has been handed downstream. When the budget is exhausted new reservations
+wait in FIFO order, so a burst of large downloads slows down instead of
+growing the worker's memory without bound.
+
+Waiters are plain futures on the running loop rather than an asyncio.Condition
+so a module-level budget can be shared by requests served from different
+event loops (TestClient runs each request in its own loop).
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+
+@dataclass
+class BudgetStats:
+    in_use: int = 0
+    peak_in_use: int = 0
+    waits: int = 0
+    rejected: int = 0
+
+
+class ByteBudget:
+    """FIFO byte semaphore with usage counters.
+
+    Args:
+        capacity: Total bytes that may be reserved at once. Single requests
+            larger than this are clamped to it, so they can never deadlock.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("ByteBudget capacity must be positive")
+        self.capacity = capacity
+        self._available = capacity
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        self._stats = BudgetStats()
+
+    def clamp(self, nbytes: int) -> int:
+        return max(1, min(nbytes, self.capacity))
+
+    async def acquire(self, nbytes: int, timeout: Optional[float] = None) -> int:
+        """Reserve ``nbytes`` (clamped) and return the amount reserved.
+
+        Raises asyncio.TimeoutError if the reservation is not granted within
+        ``timeout`` seconds; nothing is held in that case.
+        """
+        nbytes = self.clamp(nbytes)
+        if not self._waiters and self._available >= nbytes:
+            self._take(nbytes)
+            return nbytes
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((nbytes, future))
+        self._stats.waits += 1
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException as exc:
+            if future.done() and not future.cancelled():
+                # Granted in the same tick we gave up: hand it straight back.
+                self.release(nbytes)
+            else:
+                future.cancel()
+                self._wake()
+            if isinstance(exc, asyncio.TimeoutError):
+                self._stats.rejected += 1
+            raise
+        return nbytes
+
+    def release(self, nbytes: int) -> None:
+        self._available = min(self.capacity, self._available + nbytes)
+        self._stats.in_use = self.capacity - self._available
+        self._wake()
+
+    def _take(self, nbytes: int) -> None:
+        self._available -= nbytes
+        self._stats.in_use = self.capacity - self._available
+        self._stats.peak_in_use = max(self._stats.peak_in_use, self._stats.in_use)
+
+    def _wake(self) -> None:
+        while self._waiters:
+            nbytes, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self._available < nbytes:
+                return
+            self._waiters.popleft()
+            self._take(nbytes)
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **asdict(self._stats),
+            "capacity": self.capacity,
+            "waiting": sum(1 for _, f in self._waiters if not f.done()),
+        }
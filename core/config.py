@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -11,6 +13,60 @@ class Settings(BaseSettings):
     # an unknown value raises at startup rather than falling back silently.
     WHATSAPP_PROVIDER: str = "whapi"
     ENVIRONMENT: str = "development"  # Optional with default
+    # Shared Supabase HTTP pool (core/http_pool.py). HTTP/2 is only used when
+    # the optional `h2` package is installed.
+    POSTGREST_HTTP2: bool = True
+    POSTGREST_MAX_CONNECTIONS: int = 50
+    POSTGREST_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    POSTGREST_KEEPALIVE_EXPIRY: float = 30.0
+    POSTGREST_TIMEOUT: float = 30.0
+    POSTGREST_CONNECT_TIMEOUT: float = 10.0
+    # Local access-token verification (api/deps.get_current_user). HS256
+    # tokens need the project's JWT secret; asymmetric ones are checked
+    # against the project's JWKS. Unverifiable tokens fall back to Auth.
+    SUPABASE_JWT_SECRET: Optional[str] = None
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 1024
+    # Attachment download proxy (services/attachment_proxy.py). The byte
+    # budget caps how much file data this worker buffers across all
+    # concurrent downloads; a new download that cannot get its first chunk
+    # within the wait gets a 503 instead of queueing indefinitely.
+    ATTACHMENT_PROXY_CHUNK_SIZE: int = 64 * 1024
+    ATTACHMENT_PROXY_MAX_BUFFERED_BYTES: int = 16 * 1024 * 1024
+    ATTACHMENT_PROXY_WAIT_SECONDS: float = 5.0
+    ATTACHMENT_PROXY_MAX_CONNECTIONS: int = 20
+    ATTACHMENT_PROXY_TIMEOUT: float = 60.0
+    # Order file uploads streamed to Storage at once per request.
+    ORDER_FILE_UPLOAD_CONCURRENCY: int = 4
+    # Pipefy GraphQL client (repositories/pipefy_data.py). Pipefy allows 500
+    # requests per 30 s per token; the limiter stays under that with headroom
+    # for webhooks served by the same worker. 429/5xx/transport errors are
+    # retried with exponential backoff (honouring Retry-After).
+    PIPEFY_REQUESTS_PER_SECOND: float = 12.0
+    PIPEFY_BURST: int = 20
+    PIPEFY_MAX_RETRIES: int = 4
+    PIPEFY_BACKOFF_BASE_SECONDS: float = 0.5
+    PIPEFY_BACKOFF_MAX_SECONDS: float = 20.0
+    PIPEFY_MAX_CONNECTIONS: int = 20
+    # Cards processed at once by the phase sync / backup worker pool.
+    PIPEFY_SYNC_WORKERS: int = 8
+    # Per-organization dashboard/marketing metrics cache (core/swr_cache.py).
+    # Fresh results are served as-is; stale ones are served while a single
+    # background recompute runs; older ones are recomputed before answering.
+    METRICS_CACHE_FRESH_SECONDS: float = 15.0
+    METRICS_CACHE_STALE_SECONDS: float = 120.0
+    # Connected customer/vehicle card cache (repositories/pipefy_card_cache.py).
+    # Set PIPEFY_CARD_CACHE_PATH to a writable file to keep entries on disk.
+    PIPEFY_CARD_CACHE_TTL_SECONDS: float = 900.0
+    PIPEFY_CARD_CACHE_MAX_AGE_SECONDS: float = 7 * 24 * 3600.0
+    PIPEFY_CARD_CACHE_MAX_ENTRIES: int = 5000
+    PIPEFY_CARD_CACHE_PATH: Optional[str] = None
+    # sync-cards skips cards that already have card_actions. By default each
+    # page asks only about its own card ids; enabling the index keeps an
+    # incrementally refreshed in-process set per organization instead.
+    CARD_ACTIONS_INDEX_ENABLED: bool = False
+    CARD_ACTIONS_INDEX_REWARM_SECONDS: float = 3600.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,78 @@
+"""Small persistent key -> JSON store on SQLite (stdlib only).
+
+Backs in-process caches that are expensive to refill after a restart: a cold
+worker reads entries written by a previous process (or a sibling worker on
+the same host) instead of going back upstream. Values must be
+JSON-serializable. Calls are short synchronous statements guarded by a lock;
+callers on the event loop run them through asyncio.to_thread.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteStore:
+    """
+    Args:
+        path: SQLite file; parent directories are created.
+        table: Table name, so several stores can share one file.
+    """
+
+    def __init__(self, path: str, table: str = "kv"):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name {table!r}")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """Return the stored value, or None if missing or older than max_age."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, stored_at FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, stored_at = row
+        if max_age is not None and time.time() - stored_at > max_age:
+            self.delete(key)
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            logger.warning("Dropping unreadable entry %s from %s", key, self.path)
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        payload = json.dumps(value)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO {self._table} (key, value, stored_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, stored_at = excluded.stored_at",
+                (key, payload, time.time()),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,230 @@
+"""Process-wide pooled HTTP clients, one per upstream.
+
+Every repository used to open ``async with httpx.AsyncClient()`` per call, so
+each query paid a fresh TCP + TLS handshake to Supabase. This module owns one
+long-lived ``httpx.AsyncClient`` per upstream (the same idea as the shared
+Whapi client in integrations/messaging/factory.py), with connection limits,
+keep-alive and timeouts read from settings, plus a few counters per pool.
+
+Pools are keyed by name in ``_POOL_CONFIGS``; adding an upstream means one
+entry there. Clients are built lazily on first use and rebuilt if a previous
+one was closed, so the app lifespan can close everything on shutdown without
+breaking a later request (tests drive the app repeatedly in one process).
+
+Repositories use the Supabase pool as an async context manager, which keeps
+the call sites shaped like the old per-call client:
+
+    async with postgrest_client() as client:
+        response = await client.get(...)
+
+Leaving the block does NOT close the shared client; it only releases the
+in-flight slot counted in the pool's stats.
+"""
+
+import importlib.util
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Callable, Dict, Optional
+
+import httpx
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Transport tuning for one upstream."""
+
+    timeout: float = 30.0
+    connect_timeout: float = 10.0
+    max_connections: int = 50
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+
+@dataclass
+class PoolStats:
+    """Counters for one pool since process start."""
+
+    requests: int = 0
+    responses: int = 0
+    server_errors: int = 0
+    transport_errors: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    clients_built: int = 0
+
+
+def _http2_available() -> bool:
+    """httpx only speaks HTTP/2 when the optional `h2` package is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class HttpPool:
+    """One shared ``httpx.AsyncClient`` plus its usage counters."""
+
+    def __init__(
+        self,
+        name: str,
+        config: PoolConfig,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.name = name
+        self.config = config
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._stats = PoolStats()
+
+    @property
+    def http2(self) -> bool:
+        return self.config.http2 and _http2_available()
+
+    def _build(self) -> httpx.AsyncClient:
+        cfg = self.config
+        self._stats.clients_built += 1
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(cfg.timeout, connect=cfg.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=cfg.max_connections,
+                max_keepalive_connections=cfg.max_keepalive_connections,
+                keepalive_expiry=cfg.keepalive_expiry,
+            ),
+            http2=self.http2,
+            transport=self._transport,
+            event_hooks={
+                "request": [self._on_request],
+                "response": [self._on_response],
+            },
+        )
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        self._stats.requests += 1
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        self._stats.responses += 1
+        if response.status_code >= 500:
+            self._stats.server_errors += 1
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client, built on first use (or after a close)."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build()
+        return self._client
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[httpx.AsyncClient]:
+        """Borrow the shared client for one unit of work (never closes it)."""
+        stats = self._stats
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        try:
+            yield self.client
+        except httpx.TransportError:
+            stats.transport_errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            **asdict(self._stats),
+            "http2": self.http2,
+            "max_connections": self.config.max_connections,
+            "max_keepalive_connections": self.config.max_keepalive_connections,
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+# SEAM: how each upstream is tuned. Read lazily so tests that patch settings
+# see their values when a pool is first built.
+_POOL_CONFIGS: Dict[str, Callable[[], PoolConfig]] = {
+    "postgrest": lambda: PoolConfig(
+        timeout=settings.POSTGREST_TIMEOUT,
+        connect_timeout=settings.POSTGREST_CONNECT_TIMEOUT,
+        max_connections=settings.POSTGREST_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.POSTGREST_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.POSTGREST_KEEPALIVE_EXPIRY,
+        http2=settings.POSTGREST_HTTP2,
+    ),
+    # Pipefy file storage, used by the attachment download proxy. Streams are
+    # long-lived, so the read timeout bounds a stalled chunk, not the file.
+    "attachments": lambda: PoolConfig(
+        timeout=settings.ATTACHMENT_PROXY_TIMEOUT,
+        max_connections=settings.ATTACHMENT_PROXY_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.ATTACHMENT_PROXY_MAX_CONNECTIONS,
+    ),
+    # Pipefy GraphQL API.
+    "pipefy": lambda: PoolConfig(
+        timeout=30.0,
+        max_connections=settings.PIPEFY_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.PIPEFY_MAX_CONNECTIONS,
+    ),
+}
+
+_pools: Dict[str, HttpPool] = {}
+
+
+def get_pool(name: str) -> HttpPool:
+    """Return the named pool, creating it from its config on first use."""
+    pool = _pools.get(name)
+    if pool is None:
+        if name not in _POOL_CONFIGS:
+            raise ValueError(
+                f"Unknown HTTP pool {name!r}; expected one of {sorted(_POOL_CONFIGS)}"
+            )
+        pool = _pools[name] = HttpPool(name, _POOL_CONFIGS[name]())
+    return pool
+
+
+async def use_transport(
+    name: str, transport: Optional[httpx.AsyncBaseTransport]
+) -> None:
+    """Route the named pool through ``transport`` (e.g. the benchmark's fakes).
+
+    Replaces the pool, closing the previous client if one was built; its
+    config and counters start over. ``None`` restores the network transport.
+    """
+    if name not in _POOL_CONFIGS:
+        raise ValueError(
+            f"Unknown HTTP pool {name!r}; expected one of {sorted(_POOL_CONFIGS)}"
+        )
+    previous = _pools.get(name)
+    if previous is not None:
+        await previous.aclose()
+    _pools[name] = HttpPool(name, _POOL_CONFIGS[name](), transport=transport)
+
+
+def postgrest_client():
+    """Borrow the shared Supabase client (PostgREST, Auth and Storage REST)."""
+    return get_pool("postgrest").session()
+
+
+def attachments_client():
+    """Borrow the shared client for Pipefy file storage downloads."""
+    return get_pool("attachments").session()
+
+
+def pipefy_client():
+    """Borrow the shared client for the Pipefy GraphQL API."""
+    return get_pool("pipefy").session()
+
+
+def pool_stats() -> Dict[str, Dict[str, object]]:
+    """Stats for every pool built so far, keyed by pool name."""
+    return {name: pool.stats() for name, pool in _pools.items()}
+
+
+async def close_pools() -> None:
+    """Close every pooled client. Called from the app lifespan on shutdown."""
+    for pool in _pools.values():
+        await pool.aclose()
+    logger.info("Closed %d HTTP pool(s)", len(_pools))
@@ -0,0 +1,140 @@
+"""Stale-while-revalidate cache for values that are expensive to compute.
+
+Built for the dashboard/marketing metrics, which every open browser tab
+polls: within ``fresh_for`` seconds a stored value is returned as-is; for the
+next ``stale_for`` seconds it is still returned immediately while one
+background task recomputes it; after that the caller waits for a recompute.
+
+Computations are single-flight per key: however many callers miss at once,
+only one ``compute()`` runs and they all get its result. ``invalidate()``
+drops the entry and makes any computation already running for the key
+discard its result, so a write is never hidden behind an older value.
+
+Per-worker and event-loop only, like core.ttl_cache.TTLCache.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from core.ttl_cache import register_cache
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+@dataclass
+class SWRStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    computes: int = 0
+    errors: int = 0
+    evictions: int = 0
+
+
+class SWRCache(Generic[V]):
+    """
+    Args:
+        fresh_for: Seconds a value is served without recomputing.
+        stale_for: Further seconds a value is served while it is refreshed
+            in the background.
+        max_entries: Upper bound on stored keys (least recently used evicted).
+        clock: Monotonic time source (injectable for tests).
+        name: When given, stats are reported by core.ttl_cache.cache_stats().
+    """
+
+    def __init__(
+        self,
+        fresh_for: float,
+        stale_for: float,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+        name: Optional[str] = None,
+    ):
+        if name is not None:
+            register_cache(name, self)
+        self.fresh_for = fresh_for
+        self.stale_for = stale_for
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._inflight: Dict[Hashable, "asyncio.Task[V]"] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self._stats = SWRStats()
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[V]]) -> V:
+        """Return the value for ``key``, computing it with ``compute()`` if needed."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = self._clock() - stored_at
+            if age < self.fresh_for:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return value
+            if age < self.fresh_for + self.stale_for:
+                self._entries.move_to_end(key)
+                self._stats.stale_hits += 1
+                self._load(key, compute)
+                return value
+            del self._entries[key]
+
+        self._stats.misses += 1
+        # Shielded so a cancelled request does not cancel the shared compute.
+        return await asyncio.shield(self._load(key, compute))
+
+    def _load(self, key: Hashable, compute: Callable[[], Awaitable[V]]) -> "asyncio.Task[V]":
+        task = self._inflight.get(key)
+        if task is None:
+            generation = self._generations.get(key, 0)
+            task = asyncio.ensure_future(self._compute(key, compute, generation))
+            task.add_done_callback(self._log_failure)
+            self._inflight[key] = task
+        return task
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[V]], generation: int) -> V:
+        try:
+            self._stats.computes += 1
+            value = await compute()
+            if self._generations.get(key, 0) == generation:
+                self._store(key, value)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    def _store(self, key: Hashable, value: V) -> None:
+        self._entries[key] = (self._clock(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._generations.pop(evicted, None)
+            self._stats.evictions += 1
+
+    def _log_failure(self, task: "asyncio.Task[V]") -> None:
+        # Also marks the exception as retrieved when no caller awaited it
+        # (a background refresh).
+        if not task.cancelled() and task.exception() is not None:
+            self._stats.errors += 1
+            logger.warning("Cache recompute failed: %s", task.exception())
+
+    def invalidate(self, key: Hashable) -> None:
+        """Forget ``key``; a computation already running for it is not stored."""
+        self._entries.pop(key, None)
+        self._inflight.pop(key, None)
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self) -> None:
+        for key in list(self._entries) + list(self._inflight):
+            self.invalidate(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {**asdict(self._stats), "size": len(self._entries), "inflight": len(self._inflight)}
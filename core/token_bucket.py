@@ -0,0 +1,67 @@
+"""Async token-bucket rate limiter.
+
+Each call to ``acquire()`` takes one token. Tokens refill continuously at
+``rate`` per second up to ``capacity`` (the allowed burst). A caller that
+finds the bucket empty reserves its token anyway and sleeps until the refill
+would have produced it, so concurrent callers are served in call order and
+no lock is needed (everything runs on the event loop).
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict
+
+
+class TokenBucket:
+    """
+    Args:
+        rate: Tokens added per second (the sustained request rate).
+        capacity: Maximum stored tokens (the burst size).
+        clock: Monotonic time source (injectable for tests).
+        sleep: Coroutine used to wait (injectable for tests).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("TokenBucket rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._acquired = 0
+        self._waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Take ``tokens``, waiting if needed. Returns the seconds waited."""
+        self._refill()
+        self._tokens -= tokens
+        self._acquired += 1
+        if self._tokens >= 0:
+            return 0.0
+        wait = -self._tokens / self.rate
+        self._waited_seconds += wait
+        await self._sleep(wait)
+        return wait
+
+    def stats(self) -> Dict[str, float]:
+        self._refill()
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "tokens": round(self._tokens, 3),
+            "acquired": self._acquired,
+            "waited_seconds": round(self._waited_seconds, 3),
+        }
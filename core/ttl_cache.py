@@ -0,0 +1,107 @@
+"""Bounded in-process TTL cache with LRU eviction and hit/miss counters.
+
+Used for small, hot lookups that would otherwise cost an upstream round trip
+on every request (e.g. the authenticated user's app_users row). Entries are
+per-worker: with several uvicorn workers each keeps its own copy, so values
+cached here must tolerate being stale for up to their TTL.
+
+Not thread-safe by design -- it is only touched from the event loop.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_named_caches: Dict[str, "TTLCache"] = {}
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class TTLCache(Generic[V]):
+    """Mapping of key -> value that forgets entries after ``ttl`` seconds.
+
+    Args:
+        ttl: Default lifetime of an entry, in seconds.
+        max_entries: Upper bound on stored entries; the least recently used
+            entry is evicted when a new key would exceed it.
+        clock: Monotonic time source (injectable for tests).
+        name: When given, the cache's stats are reported by cache_stats().
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+        name: Optional[str] = None,
+    ):
+        if name is not None:
+            register_cache(name, self)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._stats = CacheStats()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return the live value for ``key``, or None (counted as a miss)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self._stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        """Store ``value`` for ``ttl`` seconds (the cache default when None)."""
+        lifetime = self.ttl if ttl is None else ttl
+        if lifetime <= 0:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = (self._clock() + lifetime, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {**asdict(self._stats), "size": len(self._entries)}
+
+
+def register_cache(name: str, cache) -> None:
+    """Report ``cache`` (anything with a ``stats()`` method) under ``name``."""
+    _named_caches[name] = cache
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Stats for every named cache, keyed by name."""
+    return {name: cache.stats() for name, cache in _named_caches.items()}
+
+
+def clear_caches() -> None:
+    """Empty every named cache (benchmarks measuring the uncached path)."""
+    for cache in _named_caches.values():
+        cache.clear()
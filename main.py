@@ -1,12 +1,24 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import HTTPException
 from core.cors import add_cors
 from api.v1.router import router as v1_router
 from integrations.messaging.factory import verify_provider_configured
+from core.http_pool import close_pools
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Pooled upstream clients are built lazily on first use; release their
+    # keep-alive connections when the worker shuts down.
+    await close_pools()
+
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="WhatsApp Metrics API", version="1.0.0")
+    app = FastAPI(title="WhatsApp Metrics API", version="1.0.0", lifespan=lifespan)
 
     # Fail on boot, not on the first customer message, if WHATSAPP_PROVIDER
     # names a provider that does not exist.
@@ -0,0 +1,88 @@
+-- =============================================================================
+-- 004_dashboard_kpis.sql
+--
+-- public.dashboard_kpis(org, active_statuses): every dashboard KPI in one
+-- query, called through PostgREST RPC (POST /rest/v1/rpc/dashboard_kpis).
+--
+-- The dashboard used to fire six PostgREST requests per load (four
+-- count=exact counts on orders, two status-history reads deduped in Python).
+-- This computes the same six numbers with one scan of the org's orders and one
+-- of today's pagado/cancelado transitions, and returns the America/Panama
+-- day/week(Monday)/month boundaries it used, so the API and SQL agree on
+-- "today". Semantics mirror services/dashboard_service.py exactly; the
+-- service falls back to the fan-out when this function is absent.
+--
+-- Idempotent: CREATE OR REPLACE, self-registered in schema_migrations.
+-- Execution is revoked from PUBLIC; the backend calls it with service_role.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION public.dashboard_kpis(
+    p_organization_id uuid,
+    p_active_statuses text[] DEFAULT ARRAY[
+        'recibido', 'en_proceso', 'pendiente_aprobacion', 'aprobado'
+    ]::text[]
+)
+ RETURNS TABLE (
+    today_start        timestamptz,
+    week_start         timestamptz,
+    month_start        timestamptz,
+    created_today      bigint,
+    created_this_week  bigint,
+    created_this_month bigint,
+    active_orders      bigint,
+    completed_today    bigint,
+    cancelled_today    bigint
+ )
+ LANGUAGE sql
+ STABLE
+ SET search_path TO 'public'
+AS $function$
+    WITH bounds AS (
+        SELECT
+            date_trunc('day',   now() AT TIME ZONE 'America/Panama') AT TIME ZONE 'America/Panama' AS today_start,
+            date_trunc('week',  now() AT TIME ZONE 'America/Panama') AT TIME ZONE 'America/Panama' AS week_start,
+            date_trunc('month', now() AT TIME ZONE 'America/Panama') AT TIME ZONE 'America/Panama' AS month_start
+    ),
+    order_counts AS (
+        SELECT
+            count(*) FILTER (WHERE o.received_at >= b.today_start)          AS created_today,
+            count(*) FILTER (WHERE o.received_at >= b.week_start)           AS created_this_week,
+            count(*) FILTER (WHERE o.received_at >= b.month_start)          AS created_this_month,
+            count(*) FILTER (WHERE o.order_status = ANY (p_active_statuses)) AS active_orders
+        FROM orders o, bounds b
+        WHERE o.organization_id = p_organization_id
+    ),
+    -- An order can enter the same status more than once: count orders, not rows.
+    transitions AS (
+        SELECT
+            count(DISTINCT h.order_id) FILTER (WHERE h.to_status = 'pagado')    AS completed_today,
+            count(DISTINCT h.order_id) FILTER (WHERE h.to_status = 'cancelado') AS cancelled_today
+        FROM order_status_history h, bounds b
+        WHERE h.organization_id = p_organization_id
+          AND h.to_status IN ('pagado', 'cancelado')
+          AND h.changed_at >= b.today_start
+    )
+    SELECT
+        b.today_start, b.week_start, b.month_start,
+        oc.created_today, oc.created_this_week, oc.created_this_month, oc.active_orders,
+        t.completed_today, t.cancelled_today
+    FROM bounds b, order_counts oc, transitions t;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.dashboard_kpis(uuid, text[]) FROM PUBLIC;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION public.dashboard_kpis(uuid, text[]) TO service_role;
+    END IF;
+END $$;
+
+-- Make the new function visible to PostgREST without a restart.
+NOTIFY pgrst, 'reload schema';
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('004_dashboard_kpis')
+ON CONFLICT (version) DO NOTHING;
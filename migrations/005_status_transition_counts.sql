@@ -0,0 +1,63 @@
+-- =============================================================================
+-- 005_status_transition_counts.sql
+--
+-- Server-side distinct counting of orders that entered a status.
+--
+-- DashboardRepository.count_orders_reached_status used to download every
+-- matching order_status_history row (select=order_id) and dedupe in Python,
+-- so "completed today" transferred one row per transition. The function below
+-- answers with a single integer, and the composite index makes both it and
+-- 004's dashboard_kpis a range scan: equality on (organization_id, to_status),
+-- range on changed_at, with order_id INCLUDEd so the count never touches the
+-- heap.
+--
+-- Idempotent: CREATE INDEX IF NOT EXISTS / CREATE OR REPLACE, self-registered
+-- in schema_migrations. Execution is revoked from PUBLIC; the backend calls it
+-- with service_role.
+-- =============================================================================
+
+-- ---------------------------------------------------------------------------
+-- INDEXES
+-- ---------------------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_osh_org_to_status_changed
+    ON order_status_history USING btree (organization_id, to_status, changed_at)
+    INCLUDE (order_id);
+
+-- ---------------------------------------------------------------------------
+-- FUNCTIONS
+-- ---------------------------------------------------------------------------
+-- An order can transition to the same status more than once; count orders.
+CREATE OR REPLACE FUNCTION public.count_orders_reached_status(
+    p_organization_id uuid,
+    p_to_status text,
+    p_changed_after timestamptz
+)
+ RETURNS bigint
+ LANGUAGE sql
+ STABLE
+ SET search_path TO 'public'
+AS $function$
+    SELECT count(DISTINCT h.order_id)
+    FROM order_status_history h
+    WHERE h.organization_id = p_organization_id
+      AND h.to_status = p_to_status
+      AND h.changed_at >= p_changed_after;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.count_orders_reached_status(uuid, text, timestamptz) FROM PUBLIC;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION public.count_orders_reached_status(uuid, text, timestamptz) TO service_role;
+    END IF;
+END $$;
+
+-- Make the new function visible to PostgREST without a restart.
+NOTIFY pgrst, 'reload schema';
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('005_status_transition_counts')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,77 @@
+-- =============================================================================
+-- 006_marketing_response_counts.sql
+--
+-- public.marketing_response_counts(org, sent_after): the marketing response
+-- rate's numerator and denominator computed in Postgres.
+--
+-- MarketingRepository.conversation_ids_with_message used to download up to
+-- 10,000 wa_messages rows per direction (one row per message, truncated past
+-- that) and intersect the two conversation-id sets in Python. This groups the
+-- org's messages since p_sent_after by conversation and returns two counts:
+--   messaged: conversations with at least one outbound message
+--   replied:  of those, conversations that also have an inbound message
+-- so the rate is exact at any message volume and the response is one row.
+--
+-- The index lets each conversation's window be read as a range scan on
+-- (conversation_id, sent_at) without visiting the heap for direction.
+--
+-- Idempotent: CREATE INDEX IF NOT EXISTS / CREATE OR REPLACE, self-registered
+-- in schema_migrations. Execution is revoked from PUBLIC; the backend calls it
+-- with service_role.
+-- =============================================================================
+
+-- ---------------------------------------------------------------------------
+-- INDEXES
+-- ---------------------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_wa_msg_conv_sent
+    ON wa_messages USING btree (conversation_id, sent_at)
+    INCLUDE (direction);
+
+-- ---------------------------------------------------------------------------
+-- FUNCTIONS
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.marketing_response_counts(
+    p_organization_id uuid,
+    p_sent_after timestamptz
+)
+ RETURNS TABLE (
+    messaged bigint,
+    replied  bigint
+ )
+ LANGUAGE sql
+ STABLE
+ SET search_path TO 'public'
+AS $function$
+    WITH per_conversation AS (
+        SELECT
+            bool_or(m.direction = 'outbound') AS has_outbound,
+            bool_or(m.direction = 'inbound')  AS has_inbound
+        FROM wa_conversations c
+        JOIN wa_messages m ON m.conversation_id = c.id
+        WHERE c.organization_id = p_organization_id
+          AND m.sent_at >= p_sent_after
+        GROUP BY c.id
+    )
+    SELECT
+        count(*) FILTER (WHERE has_outbound)                 AS messaged,
+        count(*) FILTER (WHERE has_outbound AND has_inbound) AS replied
+    FROM per_conversation;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.marketing_response_counts(uuid, timestamptz) FROM PUBLIC;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION public.marketing_response_counts(uuid, timestamptz) TO service_role;
+    END IF;
+END $$;
+
+-- Make the new function visible to PostgREST without a restart.
+NOTIFY pgrst, 'reload schema';
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('006_marketing_response_counts')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,58 @@
+-- =============================================================================
+-- 007_order_status_counts.sql
+--
+-- public.order_status_counts(org): how many of the org's orders are in each
+-- order_status, as one grouped query.
+--
+-- The marketing funnel issued one count=exact request per follow-up status
+-- and the status board would need one per column. This returns every
+-- (order_status, order_count) pair for the org in one round trip; statuses
+-- with no orders are absent (callers fill in zeros). The composite index
+-- turns the GROUP BY into an index-only scan of the org's slice of orders.
+--
+-- Idempotent: CREATE INDEX IF NOT EXISTS / CREATE OR REPLACE, self-registered
+-- in schema_migrations. Execution is revoked from PUBLIC; the backend calls it
+-- with service_role.
+-- =============================================================================
+
+-- ---------------------------------------------------------------------------
+-- INDEXES
+-- ---------------------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_orders_org_status
+    ON orders USING btree (organization_id, order_status);
+
+-- ---------------------------------------------------------------------------
+-- FUNCTIONS
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.order_status_counts(p_organization_id uuid)
+ RETURNS TABLE (
+    order_status text,
+    order_count  bigint
+ )
+ LANGUAGE sql
+ STABLE
+ SET search_path TO 'public'
+AS $function$
+    SELECT o.order_status, count(*) AS order_count
+    FROM orders o
+    WHERE o.organization_id = p_organization_id
+    GROUP BY o.order_status;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.order_status_counts(uuid) FROM PUBLIC;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION public.order_status_counts(uuid) TO service_role;
+    END IF;
+END $$;
+
+-- Make the new function visible to PostgREST without a restart.
+NOTIFY pgrst, 'reload schema';
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('007_order_status_counts')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,282 @@
+-- =============================================================================
+-- 008_daily_rollups.sql
+--
+-- Per-organization daily counters, maintained by triggers, for trend charts.
+--
+-- The dashboard and marketing KPIs only exist for "today / this week / this
+-- month" and are recounted from raw rows on every load. daily_rollups keeps
+-- one row per (organization, metric, dimension, America/Panama day):
+--
+--   metric            dimension     value
+--   ----------------  ------------  ------------------------------------------
+--   orders_received   ''            orders whose received_at falls on the day
+--   status_entered    <to_status>   distinct orders that entered the status
+--                                   (completed = 'pagado', cancelled = 'cancelado')
+--   messages_outbound ''            outbound wa_messages sent that day
+--   messages_inbound  ''            inbound wa_messages received that day
+--
+-- Triggers on orders, order_status_history and wa_messages bump the counters
+-- as rows are written, so a range of days is an index scan on the primary
+-- key. status_entered is deduplicated through daily_rollup_status_entries,
+-- one row per (organization, order, status, day): the trigger only counts an
+-- entry whose marker it inserted, and the marker's primary key makes two
+-- transactions moving the same order into the same status at once count it
+-- once (the second waits for the first and then conflicts).
+--
+-- public.rebuild_daily_rollups(from, to[, org]) recomputes a range, markers
+-- included, from the raw rows: run it once after applying this migration to
+-- backfill history (`python -m services.daily_rollups --from 2024-01-01`),
+-- and again for any range that needs repairing. Counters follow writes, not deletes
+-- of status history or messages; a rebuild reflects the rows as they are now.
+--
+-- Idempotent: CREATE ... IF NOT EXISTS / CREATE OR REPLACE, triggers created
+-- only when absent, self-registered in schema_migrations. RLS enabled with no
+-- policies; functions revoked from PUBLIC and granted to service_role.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    organization_id uuid        NOT NULL,
+    metric          text        NOT NULL,
+    dimension       text        NOT NULL DEFAULT ''::text,
+    day             date        NOT NULL,
+    value           bigint      NOT NULL DEFAULT 0,
+    updated_at      timestamptz NOT NULL DEFAULT now(),
+    -- Key order serves the only read pattern: one org, one metric, a day range.
+    CONSTRAINT daily_rollups_pkey PRIMARY KEY (organization_id, metric, dimension, day)
+);
+
+-- One row per order that entered a status on a day; dedupes status_entered.
+CREATE TABLE IF NOT EXISTS daily_rollup_status_entries (
+    organization_id uuid NOT NULL,
+    order_id        uuid NOT NULL,
+    to_status       text NOT NULL,
+    day             date NOT NULL,
+    CONSTRAINT daily_rollup_status_entries_pkey PRIMARY KEY (organization_id, order_id, to_status, day)
+);
+
+-- ---------------------------------------------------------------------------
+-- FOREIGN KEYS (guarded for idempotency, matching 001)
+-- ---------------------------------------------------------------------------
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'daily_rollups_organization_id_fkey' AND conrelid = 'public.daily_rollups'::regclass) THEN
+        ALTER TABLE daily_rollups ADD CONSTRAINT daily_rollups_organization_id_fkey
+            FOREIGN KEY (organization_id) REFERENCES organization(id) ON DELETE CASCADE;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'daily_rollup_status_entries_order_id_fkey' AND conrelid = 'public.daily_rollup_status_entries'::regclass) THEN
+        ALTER TABLE daily_rollup_status_entries ADD CONSTRAINT daily_rollup_status_entries_order_id_fkey
+            FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE;
+    END IF;
+END $$;
+
+-- ---------------------------------------------------------------------------
+-- ROW LEVEL SECURITY: enabled, no policies => blanket deny for anon/authenticated.
+-- The backend reads these tables with the service_role key only.
+-- ---------------------------------------------------------------------------
+ALTER TABLE daily_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE daily_rollup_status_entries ENABLE ROW LEVEL SECURITY;
+
+-- ---------------------------------------------------------------------------
+-- FUNCTIONS
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.bump_daily_rollup(
+    p_organization_id uuid,
+    p_metric text,
+    p_dimension text,
+    p_at timestamptz,
+    p_delta bigint
+)
+ RETURNS void
+ LANGUAGE sql
+ SECURITY DEFINER
+ SET search_path TO 'public'
+AS $function$
+    INSERT INTO daily_rollups (organization_id, metric, dimension, day, value)
+    VALUES (p_organization_id, p_metric, p_dimension, (p_at AT TIME ZONE 'America/Panama')::date, p_delta)
+    ON CONFLICT (organization_id, metric, dimension, day)
+    DO UPDATE SET value = daily_rollups.value + excluded.value, updated_at = now();
+$function$;
+
+-- orders: received_at can be edited, and deleted orders stop counting.
+CREATE OR REPLACE FUNCTION public.daily_rollups_on_orders()
+ RETURNS trigger
+ LANGUAGE plpgsql
+ SECURITY DEFINER
+ SET search_path TO 'public'
+AS $function$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND OLD.received_at IS NOT DISTINCT FROM NEW.received_at
+       AND OLD.organization_id = NEW.organization_id THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.received_at IS NOT NULL THEN
+        PERFORM bump_daily_rollup(OLD.organization_id, 'orders_received', '', OLD.received_at, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.received_at IS NOT NULL THEN
+        PERFORM bump_daily_rollup(NEW.organization_id, 'orders_received', '', NEW.received_at, 1);
+    END IF;
+    RETURN NULL;
+END;
+$function$;
+
+-- order_status_history: count an order once per status per day, like the KPIs.
+-- The marker insert is the check: a history row whose (order, status, day)
+-- is already marked, by this or a concurrent transaction, adds nothing.
+CREATE OR REPLACE FUNCTION public.daily_rollups_on_status_history()
+ RETURNS trigger
+ LANGUAGE plpgsql
+ SECURITY DEFINER
+ SET search_path TO 'public'
+AS $function$
+BEGIN
+    INSERT INTO daily_rollup_status_entries (organization_id, order_id, to_status, day)
+    VALUES (NEW.organization_id, NEW.order_id, NEW.to_status,
+            (NEW.changed_at AT TIME ZONE 'America/Panama')::date)
+    ON CONFLICT DO NOTHING;
+    IF FOUND THEN
+        PERFORM bump_daily_rollup(NEW.organization_id, 'status_entered', NEW.to_status, NEW.changed_at, 1);
+    END IF;
+    RETURN NULL;
+END;
+$function$;
+
+-- wa_messages: scoped to the org through its conversation.
+CREATE OR REPLACE FUNCTION public.daily_rollups_on_wa_messages()
+ RETURNS trigger
+ LANGUAGE plpgsql
+ SECURITY DEFINER
+ SET search_path TO 'public'
+AS $function$
+DECLARE
+    v_organization_id uuid;
+BEGIN
+    IF NEW.sent_at IS NULL THEN
+        RETURN NULL;
+    END IF;
+    SELECT c.organization_id INTO v_organization_id
+    FROM wa_conversations c WHERE c.id = NEW.conversation_id;
+    IF v_organization_id IS NOT NULL THEN
+        PERFORM bump_daily_rollup(v_organization_id, 'messages_' || NEW.direction, '', NEW.sent_at, 1);
+    END IF;
+    RETURN NULL;
+END;
+$function$;
+
+-- Recompute [p_from, p_to] (inclusive, America/Panama days) from the raw rows,
+-- for one organization or all of them, status_entered markers included.
+-- Returns the number of rollup rows written. Blocks the triggers' writes to
+-- daily_rollup_status_entries and daily_rollups (locked in the order the
+-- status trigger writes them) until it commits, so no concurrent bump is lost
+-- between the delete and the re-insert.
+CREATE OR REPLACE FUNCTION public.rebuild_daily_rollups(
+    p_from date,
+    p_to date,
+    p_organization_id uuid DEFAULT NULL
+)
+ RETURNS bigint
+ LANGUAGE plpgsql
+ SECURITY DEFINER
+ SET search_path TO 'public'
+AS $function$
+DECLARE
+    v_start timestamptz := p_from::timestamp AT TIME ZONE 'America/Panama';
+    v_end   timestamptz := (p_to + 1)::timestamp AT TIME ZONE 'America/Panama';
+    v_rows  bigint;
+    v_total bigint := 0;
+BEGIN
+    IF p_to < p_from THEN
+        RAISE EXCEPTION 'rebuild_daily_rollups: p_to (%) is before p_from (%)', p_to, p_from;
+    END IF;
+
+    LOCK TABLE daily_rollup_status_entries IN SHARE ROW EXCLUSIVE MODE;
+    LOCK TABLE daily_rollups IN SHARE ROW EXCLUSIVE MODE;
+
+    DELETE FROM daily_rollup_status_entries e
+    WHERE e.day BETWEEN p_from AND p_to
+      AND (p_organization_id IS NULL OR e.organization_id = p_organization_id);
+
+    DELETE FROM daily_rollups r
+    WHERE r.day BETWEEN p_from AND p_to
+      AND (p_organization_id IS NULL OR r.organization_id = p_organization_id);
+
+    INSERT INTO daily_rollup_status_entries (organization_id, order_id, to_status, day)
+    SELECT DISTINCT h.organization_id, h.order_id, h.to_status,
+           (h.changed_at AT TIME ZONE 'America/Panama')::date
+    FROM order_status_history h
+    WHERE h.changed_at >= v_start AND h.changed_at < v_end
+      AND (p_organization_id IS NULL OR h.organization_id = p_organization_id);
+
+    INSERT INTO daily_rollups (organization_id, metric, dimension, day, value)
+    SELECT o.organization_id, 'orders_received', '', (o.received_at AT TIME ZONE 'America/Panama')::date, count(*)
+    FROM orders o
+    WHERE o.received_at >= v_start AND o.received_at < v_end
+      AND (p_organization_id IS NULL OR o.organization_id = p_organization_id)
+    GROUP BY 1, 4;
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    v_total := v_total + v_rows;
+
+    INSERT INTO daily_rollups (organization_id, metric, dimension, day, value)
+    SELECT e.organization_id, 'status_entered', e.to_status, e.day, count(*)
+    FROM daily_rollup_status_entries e
+    WHERE e.day BETWEEN p_from AND p_to
+      AND (p_organization_id IS NULL OR e.organization_id = p_organization_id)
+    GROUP BY 1, 3, 4;
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    v_total := v_total + v_rows;
+
+    INSERT INTO daily_rollups (organization_id, metric, dimension, day, value)
+    SELECT c.organization_id, 'messages_' || m.direction, '',
+           (m.sent_at AT TIME ZONE 'America/Panama')::date, count(*)
+    FROM wa_messages m
+    JOIN wa_conversations c ON c.id = m.conversation_id
+    WHERE m.sent_at >= v_start AND m.sent_at < v_end
+      AND (p_organization_id IS NULL OR c.organization_id = p_organization_id)
+    GROUP BY 1, 2, 4;
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    v_total := v_total + v_rows;
+
+    RETURN v_total;
+END;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.bump_daily_rollup(uuid, text, text, timestamptz, bigint) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION public.rebuild_daily_rollups(date, date, uuid) FROM PUBLIC;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION public.rebuild_daily_rollups(date, date, uuid) TO service_role;
+    END IF;
+END $$;
+
+-- ---------------------------------------------------------------------------
+-- TRIGGERS (created only when absent, matching 001)
+-- ---------------------------------------------------------------------------
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'daily_rollups_orders' AND tgrelid = 'public.orders'::regclass) THEN
+        CREATE TRIGGER daily_rollups_orders
+            AFTER INSERT OR DELETE OR UPDATE OF received_at, organization_id ON orders
+            FOR EACH ROW EXECUTE FUNCTION public.daily_rollups_on_orders();
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'daily_rollups_status_history' AND tgrelid = 'public.order_status_history'::regclass) THEN
+        CREATE TRIGGER daily_rollups_status_history
+            AFTER INSERT ON order_status_history
+            FOR EACH ROW EXECUTE FUNCTION public.daily_rollups_on_status_history();
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'daily_rollups_wa_messages' AND tgrelid = 'public.wa_messages'::regclass) THEN
+        CREATE TRIGGER daily_rollups_wa_messages
+            AFTER INSERT ON wa_messages
+            FOR EACH ROW EXECUTE FUNCTION public.daily_rollups_on_wa_messages();
+    END IF;
+END $$;
+
+-- Make the new function visible to PostgREST without a restart.
+NOTIFY pgrst, 'reload schema';
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('008_daily_rollups')
+ON CONFLICT (version) DO NOTHING;
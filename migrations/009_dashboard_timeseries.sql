@@ -0,0 +1,87 @@
+-- =============================================================================
+-- 009_dashboard_timeseries.sql
+--
+-- public.dashboard_timeseries(org, from, to, bucket): created / completed /
+-- cancelled order counts per day, week (Monday) or month, read from the
+-- daily_rollups counters of 008.
+--
+-- One query serves a whole chart: the org's rollup rows for the range are a
+-- primary-key range scan, summed per bucket, and LEFT JOINed onto a
+-- generate_series of every bucket in the range so empty buckets come back as
+-- zeros instead of being missing. Days are America/Panama days, so buckets
+-- match the dashboard's "today / this week / this month".
+--
+--   created   = orders_received
+--   completed = status_entered 'pagado'   (distinct orders per day, summed)
+--   cancelled = status_entered 'cancelado'
+--
+-- The first and last buckets only count the days inside [p_from, p_to];
+-- bucket_start is the bucket's first day even when it precedes p_from.
+--
+-- Idempotent: CREATE OR REPLACE, self-registered in schema_migrations.
+-- Execution is revoked from PUBLIC; the backend calls it with service_role.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION public.dashboard_timeseries(
+    p_organization_id uuid,
+    p_from date,
+    p_to date,
+    p_bucket text DEFAULT 'day'
+)
+ RETURNS TABLE (
+    bucket_start date,
+    created      bigint,
+    completed    bigint,
+    cancelled    bigint
+ )
+ LANGUAGE sql
+ STABLE
+ SET search_path TO 'public'
+AS $function$
+    WITH buckets AS (
+        SELECT gs::date AS bucket_start
+        FROM generate_series(
+            date_trunc(p_bucket, p_from::timestamp),
+            date_trunc(p_bucket, p_to::timestamp),
+            ('1 ' || p_bucket)::interval
+        ) AS gs
+    ),
+    sums AS (
+        SELECT
+            date_trunc(p_bucket, r.day::timestamp)::date AS bucket_start,
+            sum(r.value) FILTER (WHERE r.metric = 'orders_received')                              AS created,
+            sum(r.value) FILTER (WHERE r.metric = 'status_entered' AND r.dimension = 'pagado')    AS completed,
+            sum(r.value) FILTER (WHERE r.metric = 'status_entered' AND r.dimension = 'cancelado') AS cancelled
+        FROM daily_rollups r
+        WHERE r.organization_id = p_organization_id
+          AND r.metric IN ('orders_received', 'status_entered')
+          AND r.day BETWEEN p_from AND p_to
+        GROUP BY 1
+    )
+    SELECT
+        b.bucket_start,
+        coalesce(s.created, 0)::bigint,
+        coalesce(s.completed, 0)::bigint,
+        coalesce(s.cancelled, 0)::bigint
+    FROM buckets b
+    LEFT JOIN sums s USING (bucket_start)
+    ORDER BY b.bucket_start;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.dashboard_timeseries(uuid, date, date, text) FROM PUBLIC;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION public.dashboard_timeseries(uuid, date, date, text) TO service_role;
+    END IF;
+END $$;
+
+-- Make the new function visible to PostgREST without a restart.
+NOTIFY pgrst, 'reload schema';
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('009_dashboard_timeseries')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,26 @@
+-- =============================================================================
+-- 010_orders_keyset_index.sql
+--
+-- Index behind the keyset (cursor) pagination of the full order details
+-- listing (GET /api/orders/fullOrderDetails/page).
+--
+-- The listing orders an org's orders by date_order DESC, id DESC and asks
+-- for the rows after the last one it returned
+-- (date_order < X OR (date_order = X AND id < Y)). With this index every
+-- page is a range scan that starts at the cursor, however deep the page,
+-- instead of walking and discarding `offset` rows plus their embeds.
+-- id is DESC as well so the one index serves the whole ORDER BY; NULLS
+-- FIRST is the DESC default and matches PostgREST's `date_order.desc`.
+--
+-- Idempotent: CREATE INDEX IF NOT EXISTS, self-registered in
+-- schema_migrations.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_orders_org_date_order_id
+    ON orders USING btree (organization_id, date_order DESC, id DESC);
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('010_orders_keyset_index')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,106 @@
+-- =============================================================================
+-- 011_order_versions.sql
+--
+-- Row versions behind the ETags of the order and customer GET endpoints.
+--
+-- The order detail, the order listings and the customer directory/profile
+-- answer `If-None-Match` with 304 Not Modified. To decide that without
+-- loading the full embed tree, the API reads only (id, updated_at) of the
+-- rows a response is built from and hashes them into the ETag, so every
+-- write that changes a response has to move an updated_at:
+--
+--   orders, customers     updated_at added here (backfilled with now())
+--   orders, customers,    BEFORE UPDATE trigger sets updated_at = now()
+--   vehicles
+--   order_files,          AFTER INSERT/UPDATE/DELETE trigger bumps the
+--   order_field_values    parent order's updated_at
+--
+-- Until this migration is applied the API finds the column missing and
+-- serves full responses without an ETag.
+--
+-- Idempotent: ADD COLUMN IF NOT EXISTS / CREATE OR REPLACE, triggers created
+-- only when absent, self-registered in schema_migrations. The trigger
+-- functions are not callable directly, so nothing is granted.
+-- =============================================================================
+
+ALTER TABLE orders    ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+ALTER TABLE customers ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+
+-- ---------------------------------------------------------------------------
+-- FUNCTIONS
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.touch_updated_at()
+ RETURNS trigger
+ LANGUAGE plpgsql
+ SET search_path TO 'public'
+AS $function$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$function$;
+
+-- A file or custom field value is part of its order's representation.
+-- Touching the order (which runs touch_updated_at through the orders
+-- trigger) invalidates the order's ETag and that of every listing page it
+-- appears on.
+CREATE OR REPLACE FUNCTION public.touch_parent_order()
+ RETURNS trigger
+ LANGUAGE plpgsql
+ SECURITY DEFINER
+ SET search_path TO 'public'
+AS $function$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE orders SET updated_at = now() WHERE id = OLD.order_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND (TG_OP = 'INSERT' OR NEW.order_id IS DISTINCT FROM OLD.order_id) THEN
+        UPDATE orders SET updated_at = now() WHERE id = NEW.order_id;
+    END IF;
+    RETURN NULL;
+END;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.touch_updated_at() FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION public.touch_parent_order() FROM PUBLIC;
+
+-- ---------------------------------------------------------------------------
+-- TRIGGERS (created only when absent, matching 001)
+-- ---------------------------------------------------------------------------
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'touch_orders_updated_at' AND tgrelid = 'public.orders'::regclass) THEN
+        CREATE TRIGGER touch_orders_updated_at
+            BEFORE UPDATE ON orders
+            FOR EACH ROW EXECUTE FUNCTION public.touch_updated_at();
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'touch_customers_updated_at' AND tgrelid = 'public.customers'::regclass) THEN
+        CREATE TRIGGER touch_customers_updated_at
+            BEFORE UPDATE ON customers
+            FOR EACH ROW EXECUTE FUNCTION public.touch_updated_at();
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'touch_vehicles_updated_at' AND tgrelid = 'public.vehicles'::regclass) THEN
+        CREATE TRIGGER touch_vehicles_updated_at
+            BEFORE UPDATE ON vehicles
+            FOR EACH ROW EXECUTE FUNCTION public.touch_updated_at();
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'touch_order_on_order_files' AND tgrelid = 'public.order_files'::regclass) THEN
+        CREATE TRIGGER touch_order_on_order_files
+            AFTER INSERT OR UPDATE OR DELETE ON order_files
+            FOR EACH ROW EXECUTE FUNCTION public.touch_parent_order();
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'touch_order_on_order_field_values' AND tgrelid = 'public.order_field_values'::regclass) THEN
+        CREATE TRIGGER touch_order_on_order_field_values
+            AFTER INSERT OR UPDATE OR DELETE ON order_field_values
+            FOR EACH ROW EXECUTE FUNCTION public.touch_parent_order();
+    END IF;
+END $$;
+
+-- Make the new columns visible to PostgREST without a restart.
+NOTIFY pgrst, 'reload schema';
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('011_order_versions')
+ON CONFLICT (version) DO NOTHING;
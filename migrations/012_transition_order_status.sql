@@ -0,0 +1,121 @@
+-- =============================================================================
+-- 012_transition_order_status.sql
+--
+-- public.transition_order_status(order, changes[, expected_status,
+-- changed_by]): patch an order and record its status change in
+-- order_status_history, in one transaction and one round trip.
+--
+-- A status change used to take three requests: read the embedded order to
+-- learn its current status, PATCH the order, then POST the history row. A
+-- concurrent change between the read and the PATCH left the history with
+-- the wrong from_status. This function locks the order row, reads the
+-- status under the lock, optionally compares it with `expected_status`,
+-- applies `changes` and inserts the history row when the status moved.
+--
+--   changes          jsonb of order columns to set (keys absent keep their
+--                    value), e.g. {"order_status": "aprobado"}
+--   expected_status  when given and the order is in another status, nothing
+--                    is written and the call fails with SQLSTATE PT409,
+--                    which PostgREST answers as HTTP 409
+--
+-- The history row's status_type is the target status's order_statuses
+-- entry, read here under the same round trip; a target status missing from
+-- the catalog fails with SQLSTATE PT422 (HTTP 422). Re-sending the current
+-- status moves nothing and looks nothing up.
+--
+-- Returns {"order": <orders row>, "from_status": <status before>}, with
+-- "order": null when no order has that id.
+--
+-- Idempotent: the earlier signature with a p_status_type argument is dropped,
+-- CREATE OR REPLACE, self-registered in schema_migrations.
+-- Execution is revoked from PUBLIC; the backend calls it with service_role.
+-- =============================================================================
+
+-- ---------------------------------------------------------------------------
+-- FUNCTIONS
+-- ---------------------------------------------------------------------------
+DROP FUNCTION IF EXISTS public.transition_order_status(uuid, jsonb, text, uuid, text);
+
+CREATE OR REPLACE FUNCTION public.transition_order_status(
+    p_order_id        uuid,
+    p_changes         jsonb,
+    p_expected_status text DEFAULT NULL,
+    p_changed_by      uuid DEFAULT NULL
+)
+ RETURNS jsonb
+ LANGUAGE plpgsql
+ SET search_path TO 'public'
+AS $function$
+DECLARE
+    v_from        text;
+    v_to          text := p_changes->>'order_status';
+    v_status_type text;
+    v_order       orders;
+BEGIN
+    SELECT o.order_status INTO v_from
+    FROM orders o
+    WHERE o.id = p_order_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('order', NULL, 'from_status', NULL);
+    END IF;
+
+    IF p_expected_status IS NOT NULL AND v_from IS DISTINCT FROM p_expected_status THEN
+        RAISE SQLSTATE 'PT409' USING
+            MESSAGE = format('Order %s is in status %s, not %s', p_order_id, v_from, p_expected_status),
+            DETAIL = v_from;
+    END IF;
+
+    IF v_to IS NOT NULL AND v_to IS DISTINCT FROM v_from THEN
+        SELECT s.status_type INTO v_status_type
+        FROM order_statuses s
+        WHERE s.code = v_to;
+        IF NOT FOUND THEN
+            RAISE SQLSTATE 'PT422' USING
+                MESSAGE = format('Unknown order status ''%s''', v_to);
+        END IF;
+    END IF;
+
+    -- The columns of schemas.order.OrderUpdate; jsonb_populate_record keeps
+    -- the current value of every column absent from p_changes.
+    UPDATE orders o
+       SET (customer_id, vehicle_id, assigned_to, service_type, order_status,
+            priority, order_reason, total_amount, received_at, completed_at,
+            km_in, order_comments)
+         = (SELECT r.customer_id, r.vehicle_id, r.assigned_to, r.service_type,
+                   r.order_status, r.priority, r.order_reason, r.total_amount,
+                   r.received_at, r.completed_at, r.km_in, r.order_comments
+            FROM jsonb_populate_record(o, p_changes) r)
+     WHERE o.id = p_order_id
+    RETURNING o.* INTO v_order;
+
+    IF v_order.order_status IS DISTINCT FROM v_from THEN
+        INSERT INTO order_status_history
+            (order_id, organization_id, status_type, from_status, to_status, changed_by)
+        VALUES
+            (v_order.id, v_order.organization_id, v_status_type, v_from,
+             v_order.order_status, p_changed_by);
+    END IF;
+
+    RETURN jsonb_build_object('order', to_jsonb(v_order), 'from_status', v_from);
+END;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.transition_order_status(uuid, jsonb, text, uuid) FROM PUBLIC;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION public.transition_order_status(uuid, jsonb, text, uuid) TO service_role;
+    END IF;
+END $$;
+
+-- Make the new function visible to PostgREST without a restart.
+NOTIFY pgrst, 'reload schema';
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('012_transition_order_status')
+ON CONFLICT (version) DO NOTHING;
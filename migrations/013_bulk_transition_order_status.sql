@@ -0,0 +1,84 @@
+-- =============================================================================
+-- 013_bulk_transition_order_status.sql
+--
+-- public.bulk_transition_order_status(order_ids, to_status[, org,
+-- changed_by, status_type]): move many orders to one status and write their
+-- order_status_history rows, as one statement in one round trip.
+--
+-- Backs PATCH /api/orders/bulk-status (the kanban board's "move these cars
+-- to en_proceso / pagado" at shift change), which otherwise needs one
+-- transition per card. The orders are locked in id order (so two
+-- overlapping batches can't deadlock), their current status is read under
+-- the lock, the ones not already in `to_status` are updated with a single
+-- UPDATE and their history rows inserted with a single INSERT ... SELECT.
+--
+-- Returns one (order_id, organization_id, from_status, changed) row per
+-- order found; ids that don't exist (or belong to another organization
+-- when p_organization_id is given) are absent.
+--
+-- Idempotent: CREATE OR REPLACE, self-registered in schema_migrations.
+-- Execution is revoked from PUBLIC; the backend calls it with service_role.
+-- =============================================================================
+
+-- ---------------------------------------------------------------------------
+-- FUNCTIONS
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.bulk_transition_order_status(
+    p_order_ids       uuid[],
+    p_to_status       text,
+    p_organization_id uuid DEFAULT NULL,
+    p_changed_by      uuid DEFAULT NULL,
+    p_status_type     text DEFAULT 'workshop'
+)
+ RETURNS TABLE (
+    order_id        uuid,
+    organization_id uuid,
+    from_status     text,
+    changed         boolean
+ )
+ LANGUAGE sql
+ SET search_path TO 'public'
+AS $function$
+    WITH locked AS (
+        SELECT o.id, o.organization_id, o.order_status AS from_status
+        FROM orders o
+        WHERE o.id = ANY (p_order_ids)
+          AND (p_organization_id IS NULL OR o.organization_id = p_organization_id)
+        ORDER BY o.id
+        FOR UPDATE
+    ),
+    updated AS (
+        UPDATE orders o
+           SET order_status = p_to_status
+          FROM locked l
+         WHERE o.id = l.id
+           AND l.from_status IS DISTINCT FROM p_to_status
+        RETURNING o.id, o.organization_id, l.from_status
+    ),
+    history AS (
+        INSERT INTO order_status_history
+            (order_id, organization_id, status_type, from_status, to_status, changed_by)
+        SELECT u.id, u.organization_id, p_status_type, u.from_status, p_to_status, p_changed_by
+        FROM updated u
+    )
+    SELECT l.id, l.organization_id, l.from_status, l.from_status IS DISTINCT FROM p_to_status
+    FROM locked l;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.bulk_transition_order_status(uuid[], text, uuid, uuid, text) FROM PUBLIC;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION public.bulk_transition_order_status(uuid[], text, uuid, uuid, text) TO service_role;
+    END IF;
+END $$;
+
+-- Make the new function visible to PostgREST without a restart.
+NOTIFY pgrst, 'reload schema';
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('013_bulk_transition_order_status')
+ON CONFLICT (version) DO NOTHING;
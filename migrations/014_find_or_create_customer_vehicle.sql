@@ -0,0 +1,216 @@
+-- =============================================================================
+-- 014_find_or_create_customer_vehicle.sql
+--
+-- Race-free, single-round-trip find-or-create for customers (by national_id)
+-- and vehicles (by plate), both within an organization.
+--
+-- Creating an order looked the customer / vehicle up and then inserted it:
+-- two round trips, and two receptionists entering the same plate at once
+-- both missed the lookup and created duplicates. The natural keys are now
+-- unique and the lookup-or-insert runs in one SQL function:
+--
+--   customers  UNIQUE (organization_id, national_id), added here. Blank
+--              national_ids are normalised to NULL first (NULLs don't
+--              conflict, so customers without one are never merged).
+--   vehicles   UNIQUE (organization_id, plate_key), added here.
+--              plate_key is the plate upper-cased without spaces, dashes
+--              or other punctuation (generated column), so "ABC-123",
+--              "abc 123" and "ABC123" are one vehicle. The raw
+--              UNIQUE (plate, organization_id) from 001 stays.
+--
+-- public.find_or_create_customer(org, customer jsonb) and
+-- public.find_or_create_vehicle(org, vehicle jsonb) look the key up,
+-- INSERT ... ON CONFLICT DO NOTHING when it is absent and, when a
+-- concurrent insert won, return that row instead.
+-- The existing row is returned unchanged (the API treats the stored
+-- make/model/name as the source of truth), and isn't touched, so its
+-- updated_at and the ETags built on it (011) don't move.
+--
+-- If an organization already has duplicate national_ids (or plates that
+-- only differ in spelling) the constraint can't be added: the migration
+-- raises a WARNING with the number of duplicated keys and carries on; the
+-- functions still return an existing match, but two concurrent creations of
+-- a new key can race again. Merge the duplicates and re-run to add the
+-- constraint:
+--
+--   SELECT organization_id, national_id, count(*) FROM customers
+--   WHERE national_id IS NOT NULL GROUP BY 1, 2 HAVING count(*) > 1;
+--   SELECT organization_id, plate_key, count(*) FROM vehicles
+--   WHERE plate_key IS NOT NULL GROUP BY 1, 2 HAVING count(*) > 1;
+--
+-- Idempotent: ADD COLUMN IF NOT EXISTS, constraints added only when absent,
+-- CREATE OR REPLACE,
+-- self-registered in schema_migrations. Execution is revoked from PUBLIC;
+-- the backend calls the functions with service_role.
+-- =============================================================================
+
+-- ---------------------------------------------------------------------------
+-- NORMALIZED COLUMNS
+-- ---------------------------------------------------------------------------
+ALTER TABLE vehicles ADD COLUMN IF NOT EXISTS plate_key text
+    GENERATED ALWAYS AS (NULLIF(upper(regexp_replace(plate, '[^A-Za-z0-9]', '', 'g')), '')) STORED;
+
+-- ---------------------------------------------------------------------------
+-- CONSTRAINTS
+-- ---------------------------------------------------------------------------
+UPDATE customers SET national_id = NULL WHERE btrim(national_id) = '';
+
+DO $$
+DECLARE
+    v_duplicates bigint;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'customers_org_national_id_unique' AND conrelid = 'public.customers'::regclass) THEN
+        SELECT count(*) INTO v_duplicates
+        FROM (
+            SELECT 1 FROM customers
+            WHERE national_id IS NOT NULL
+            GROUP BY organization_id, national_id
+            HAVING count(*) > 1
+        ) d;
+        IF v_duplicates = 0 THEN
+            ALTER TABLE customers
+                ADD CONSTRAINT customers_org_national_id_unique UNIQUE (organization_id, national_id);
+        ELSE
+            RAISE WARNING 'customers_org_national_id_unique not added: % duplicated (organization_id, national_id) key(s)', v_duplicates;
+        END IF;
+    END IF;
+END $$;
+
+DO $$
+DECLARE
+    v_duplicates bigint;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'vehicles_org_plate_key_unique' AND conrelid = 'public.vehicles'::regclass) THEN
+        SELECT count(*) INTO v_duplicates
+        FROM (
+            SELECT 1 FROM vehicles
+            WHERE plate_key IS NOT NULL
+            GROUP BY organization_id, plate_key
+            HAVING count(*) > 1
+        ) d;
+        IF v_duplicates = 0 THEN
+            ALTER TABLE vehicles
+                ADD CONSTRAINT vehicles_org_plate_key_unique UNIQUE (organization_id, plate_key);
+        ELSE
+            RAISE WARNING 'vehicles_org_plate_key_unique not added: % duplicated (organization_id, plate_key) key(s)', v_duplicates;
+            -- The lookup still needs an index without the constraint.
+            CREATE INDEX IF NOT EXISTS idx_vehicles_org_plate_key ON vehicles USING btree (organization_id, plate_key);
+        END IF;
+    END IF;
+END $$;
+
+-- ---------------------------------------------------------------------------
+-- FUNCTIONS
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.find_or_create_customer(
+    p_organization_id uuid,
+    p_customer        jsonb
+)
+ RETURNS customers
+ LANGUAGE plpgsql
+ SET search_path TO 'public'
+AS $function$
+DECLARE
+    v_new      customers := jsonb_populate_record(NULL::customers, p_customer);
+    v_customer customers;
+BEGIN
+    v_new.national_id := NULLIF(btrim(v_new.national_id), '');
+
+    -- Look up first: without the unique constraint (duplicates present)
+    -- ON CONFLICT has nothing to conflict on and would insert yet another.
+    IF v_new.national_id IS NOT NULL THEN
+        SELECT * INTO v_customer
+        FROM customers c
+        WHERE c.organization_id = p_organization_id
+          AND c.national_id = v_new.national_id
+        ORDER BY c.created_at
+        LIMIT 1;
+        IF FOUND THEN
+            RETURN v_customer;
+        END IF;
+    END IF;
+
+    INSERT INTO customers (organization_id, name, phone, national_id)
+    VALUES (p_organization_id, v_new.name, v_new.phone, v_new.national_id)
+    ON CONFLICT DO NOTHING
+    RETURNING * INTO v_customer;
+
+    IF NOT FOUND THEN
+        -- Inserted concurrently since the lookup: return that row.
+        SELECT * INTO v_customer
+        FROM customers c
+        WHERE c.organization_id = p_organization_id
+          AND c.national_id = v_new.national_id;
+    END IF;
+
+    RETURN v_customer;
+END;
+$function$;
+
+CREATE OR REPLACE FUNCTION public.find_or_create_vehicle(
+    p_organization_id uuid,
+    p_vehicle         jsonb
+)
+ RETURNS vehicles
+ LANGUAGE plpgsql
+ SET search_path TO 'public'
+AS $function$
+DECLARE
+    v_new       vehicles := jsonb_populate_record(NULL::vehicles, p_vehicle);
+    v_plate_key text := NULLIF(upper(regexp_replace(v_new.plate, '[^A-Za-z0-9]', '', 'g')), '');
+    v_vehicle   vehicles;
+BEGIN
+    -- Look up first, by the normalized plate: "abc 123" finds "ABC-123".
+    -- Without the unique constraint (duplicates present) ON CONFLICT would
+    -- insert yet another.
+    IF v_plate_key IS NOT NULL THEN
+        SELECT * INTO v_vehicle
+        FROM vehicles v
+        WHERE v.organization_id = p_organization_id
+          AND v.plate_key = v_plate_key
+        ORDER BY v.plate = v_new.plate DESC, v.updated_at DESC NULLS LAST
+        LIMIT 1;
+        IF FOUND THEN
+            RETURN v_vehicle;
+        END IF;
+    END IF;
+
+    INSERT INTO vehicles (organization_id, plate, make, model, year, km_last_service)
+    VALUES (p_organization_id, v_new.plate, v_new.make, v_new.model, v_new.year,
+            COALESCE(v_new.km_last_service, 0))
+    ON CONFLICT DO NOTHING
+    RETURNING * INTO v_vehicle;
+
+    IF NOT FOUND THEN
+        -- Inserted concurrently since the lookup, possibly spelled
+        -- differently: return that row.
+        SELECT * INTO v_vehicle
+        FROM vehicles v
+        WHERE v.organization_id = p_organization_id
+          AND v.plate_key = v_plate_key
+        LIMIT 1;
+    END IF;
+
+    RETURN v_vehicle;
+END;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.find_or_create_customer(uuid, jsonb) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION public.find_or_create_vehicle(uuid, jsonb) FROM PUBLIC;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION public.find_or_create_customer(uuid, jsonb) TO service_role;
+        GRANT EXECUTE ON FUNCTION public.find_or_create_vehicle(uuid, jsonb) TO service_role;
+    END IF;
+END $$;
+
+-- Make the new functions visible to PostgREST without a restart.
+NOTIFY pgrst, 'reload schema';
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('014_find_or_create_customer_vehicle')
+ON CONFLICT (version) DO NOTHING;
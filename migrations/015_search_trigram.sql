@@ -0,0 +1,237 @@
+-- =============================================================================
+-- 015_search_trigram.sql
+--
+-- Indexed, ranked customer and vehicle search.
+--
+-- The search boxes (POST /api/orders/customers/search, /vehicles/search and
+-- GET /api/customers?search=) match `ilike '%term%'`, which no btree can
+-- serve, so every keystroke scanned all of the organization's rows. This
+-- migration adds:
+--
+--   pg_trgm GIN indexes    customers.name / phone / national_id /
+--                          phone_digits, vehicles.plate_key / make / model
+--                          (the columns the functions below filter on):
+--                          LIKE / ILIKE '%term%' and similarity (%)
+--                          become index scans
+--   customers.phone_digits the phone with every non-digit removed
+--                          (generated), so "+507 6000-0000" and
+--                          "60000000" match; btree per organization for
+--                          exact lookups, trigram for partial ones
+--
+-- vehicles.plate_key (the normalized plate) and its per-organization unique
+-- key come from 014_find_or_create_customer_vehicle.sql.
+--
+-- and public.search_customers_ranked / public.search_vehicles_ranked:
+--
+--   1. exact fast path: a full phone (>= 7 digits) or national_id for
+--      customers, a full plate for vehicles; when it hits, only those rows
+--      are returned
+--   2. otherwise substring or trigram-similar matches on any of the given
+--      fields, best similarity first
+--   3. at most p_limit rows (capped at 50)
+--
+-- Checking the plan of a plate fragment (the most common vehicle search) on
+-- a database with enough vehicles for the planner to prefer an index:
+--
+--   EXPLAIN SELECT * FROM vehicles
+--   WHERE organization_id = '<org>' AND plate_key LIKE '%B12%';
+--
+-- shows a Bitmap Index Scan on idx_vehicles_plate_key_trgm. Fragments under
+-- three characters have no complete trigram and scan the organization's
+-- vehicles regardless.
+--
+-- Idempotent: CREATE EXTENSION / ADD COLUMN / CREATE INDEX IF NOT EXISTS,
+-- CREATE OR REPLACE, self-registered in schema_migrations. Execution is
+-- revoked from PUBLIC; the backend calls the functions with service_role.
+-- =============================================================================
+
+-- Supabase keeps extensions in the `extensions` schema (and may already have
+-- pg_trgm there); a plain Postgres gets it in the default schema. The
+-- functions below put `extensions` on their search_path and the indexes
+-- name the operator class by the schema pg_trgm actually lives in, so both
+-- layouts resolve.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_namespace WHERE nspname = 'extensions') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+    ELSE
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    END IF;
+END $$;
+
+-- ---------------------------------------------------------------------------
+-- NORMALIZED COLUMNS
+-- ---------------------------------------------------------------------------
+ALTER TABLE customers ADD COLUMN IF NOT EXISTS phone_digits text
+    GENERATED ALWAYS AS (NULLIF(regexp_replace(phone, '[^0-9]', '', 'g'), '')) STORED;
+
+-- ---------------------------------------------------------------------------
+-- INDEXES
+-- ---------------------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_customers_org_phone_digits ON customers USING btree (organization_id, phone_digits);
+
+-- Plates are searched through plate_key (014), not the raw plate.
+DROP INDEX IF EXISTS idx_vehicles_plate_trgm;
+
+DO $$
+DECLARE
+    v_opclass text;
+    v_index   record;
+BEGIN
+    SELECT format('%I.gin_trgm_ops', n.nspname) INTO v_opclass
+    FROM pg_extension e
+    JOIN pg_namespace n ON n.oid = e.extnamespace
+    WHERE e.extname = 'pg_trgm';
+
+    FOR v_index IN
+        SELECT * FROM (VALUES
+            ('idx_customers_name_trgm',         'customers', 'name'),
+            ('idx_customers_phone_trgm',        'customers', 'phone'),
+            ('idx_customers_national_id_trgm',  'customers', 'national_id'),
+            ('idx_customers_phone_digits_trgm', 'customers', 'phone_digits'),
+            ('idx_vehicles_plate_key_trgm',     'vehicles',  'plate_key'),
+            ('idx_vehicles_make_trgm',          'vehicles',  'make'),
+            ('idx_vehicles_model_trgm',         'vehicles',  'model')
+        ) AS t (index_name, table_name, column_name)
+    LOOP
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I USING gin (%I %s)',
+                       v_index.index_name, v_index.table_name, v_index.column_name, v_opclass);
+    END LOOP;
+END $$;
+
+-- ---------------------------------------------------------------------------
+-- FUNCTIONS
+-- ---------------------------------------------------------------------------
+-- '%term%' for LIKE/ILIKE with the term's own wildcards escaped.
+CREATE OR REPLACE FUNCTION public.search_like_pattern(p_term text)
+ RETURNS text
+ LANGUAGE sql
+ IMMUTABLE
+ SET search_path TO 'public'
+AS $function$
+    SELECT '%' || replace(replace(replace(p_term, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+$function$;
+
+CREATE OR REPLACE FUNCTION public.search_customers_ranked(
+    p_organization_id uuid,
+    p_name            text DEFAULT NULL,
+    p_phone           text DEFAULT NULL,
+    p_national_id     text DEFAULT NULL,
+    p_limit           integer DEFAULT 20
+)
+ RETURNS SETOF customers
+ LANGUAGE plpgsql
+ STABLE
+ SET search_path TO public, extensions
+AS $function$
+DECLARE
+    v_limit  integer := LEAST(GREATEST(COALESCE(p_limit, 20), 1), 50);
+    v_name   text := NULLIF(btrim(p_name), '');
+    v_nid    text := NULLIF(btrim(p_national_id), '');
+    v_digits text := NULLIF(regexp_replace(COALESCE(p_phone, ''), '[^0-9]', '', 'g'), '');
+BEGIN
+    -- 1. Exact phone / national_id.
+    IF (v_digits IS NOT NULL AND length(v_digits) >= 7) OR v_nid IS NOT NULL THEN
+        RETURN QUERY
+        SELECT c.*
+        FROM customers c
+        WHERE c.organization_id = p_organization_id
+          AND ((length(v_digits) >= 7 AND c.phone_digits = v_digits)
+               OR c.national_id = v_nid)
+        ORDER BY c.created_at DESC
+        LIMIT v_limit;
+        IF FOUND THEN
+            RETURN;
+        END IF;
+    END IF;
+
+    -- 2. Partial or similar, ranked.
+    RETURN QUERY
+    SELECT c.*
+    FROM customers c
+    WHERE c.organization_id = p_organization_id
+      AND (
+            (v_name IS NOT NULL AND (c.name ILIKE search_like_pattern(v_name) OR c.name % v_name))
+         OR (v_nid IS NOT NULL AND c.national_id ILIKE search_like_pattern(v_nid))
+         OR (v_digits IS NOT NULL AND c.phone_digits LIKE search_like_pattern(v_digits))
+      )
+    ORDER BY GREATEST(
+                 similarity(c.name, v_name),
+                 similarity(c.national_id, v_nid),
+                 similarity(c.phone_digits, v_digits)
+             ) DESC NULLS LAST,
+             c.created_at DESC
+    LIMIT v_limit;
+END;
+$function$;
+
+CREATE OR REPLACE FUNCTION public.search_vehicles_ranked(
+    p_organization_id uuid,
+    p_plate           text DEFAULT NULL,
+    p_make            text DEFAULT NULL,
+    p_model           text DEFAULT NULL,
+    p_limit           integer DEFAULT 20
+)
+ RETURNS SETOF vehicles
+ LANGUAGE plpgsql
+ STABLE
+ SET search_path TO public, extensions
+AS $function$
+DECLARE
+    v_limit     integer := LEAST(GREATEST(COALESCE(p_limit, 20), 1), 50);
+    v_plate_key text := NULLIF(upper(regexp_replace(COALESCE(p_plate, ''), '[^A-Za-z0-9]', '', 'g')), '');
+    v_make      text := NULLIF(btrim(p_make), '');
+    v_model     text := NULLIF(btrim(p_model), '');
+BEGIN
+    -- 1. Exact plate, whatever its spacing, dashes or case.
+    IF v_plate_key IS NOT NULL THEN
+        RETURN QUERY
+        SELECT v.*
+        FROM vehicles v
+        WHERE v.organization_id = p_organization_id
+          AND v.plate_key = v_plate_key
+        LIMIT v_limit;
+        IF FOUND THEN
+            RETURN;
+        END IF;
+    END IF;
+
+    -- 2. Partial or similar, ranked.
+    RETURN QUERY
+    SELECT v.*
+    FROM vehicles v
+    WHERE v.organization_id = p_organization_id
+      AND (
+            (v_plate_key IS NOT NULL AND v.plate_key LIKE search_like_pattern(v_plate_key))
+         OR (v_make IS NOT NULL AND (v.make ILIKE search_like_pattern(v_make) OR v.make % v_make))
+         OR (v_model IS NOT NULL AND (v.model ILIKE search_like_pattern(v_model) OR v.model % v_model))
+      )
+    ORDER BY GREATEST(
+                 similarity(v.plate_key, v_plate_key),
+                 similarity(v.make, v_make),
+                 similarity(v.model, v_model)
+             ) DESC NULLS LAST,
+             v.updated_at DESC NULLS LAST
+    LIMIT v_limit;
+END;
+$function$;
+
+REVOKE EXECUTE ON FUNCTION public.search_customers_ranked(uuid, text, text, text, integer) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION public.search_vehicles_ranked(uuid, text, text, text, integer) FROM PUBLIC;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION public.search_customers_ranked(uuid, text, text, text, integer) TO service_role;
+        GRANT EXECUTE ON FUNCTION public.search_vehicles_ranked(uuid, text, text, text, integer) TO service_role;
+    END IF;
+END $$;
+
+-- Make the new column and functions visible to PostgREST without a restart.
+NOTIFY pgrst, 'reload schema';
+
+-- ===========================================================================
+-- Record this migration
+-- ===========================================================================
+INSERT INTO schema_migrations (version) VALUES ('015_search_trigram')
+ON CONFLICT (version) DO NOTHING;
@@ -1,6 +1,7 @@
 import httpx
 from typing import Optional
 from core.config import settings
+from core.http_pool import postgrest_client
 
 
 class AttachmentRepository:
@@ -18,7 +19,7 @@ class AttachmentRepository:
     async def get_by_storage_path(self, storage_path: str) -> Optional[dict]:
         print(f"Querying for existing attachment with storage_path={storage_path}")
         try:
-            async with httpx.AsyncClient() as client:
+            async with postgrest_client() as client:
                 response = await client.get(
                     f"{self.base_url}/pipefy_attachments",
                     headers=self.headers,
@@ -33,7 +34,7 @@ class AttachmentRepository:
             return None
 
     async def get_by_card_id(self, pipefy_card_id: str) -> list[dict]:
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/pipefy_attachments",
                 headers=self.headers,
@@ -47,7 +48,7 @@ class AttachmentRepository:
             **self.headers,
             "Prefer": "resolution=merge-duplicates,return=representation",
         }
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/pipefy_attachments",
                 headers=headers,
@@ -1,6 +1,16 @@
-import httpx
-from typing import List, Dict, Any
+import asyncio
+import logging
+import time
+from typing import List, Dict, Any, Optional, Set, Tuple
 from core.config import settings
+from core.http_pool import postgrest_client
+
+logger = logging.getLogger(__name__)
+
+# Rows per request when paging through card_actions by id.
+_PAGE_SIZE = 1000
+# Card ids per in.(...) probe; keeps the query string well under URL limits.
+_PROBE_CHUNK = 200
 
 
 class CardActionsRepository:
@@ -32,7 +42,7 @@ class CardActionsRepository:
         Returns:
             List of action records for this card
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/card_actions",
                 params={
@@ -64,7 +74,7 @@ class CardActionsRepository:
         if not card_ids:
             return {}
 
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             # Supabase PostgREST syntax for IN query
             card_ids_param = ",".join(card_ids)
             response = await client.get(
@@ -90,14 +100,87 @@ class CardActionsRepository:
 
             return actions_by_card
 
+    async def get_existing_card_ids(
+        self,
+        organization_id: str,
+        card_ids: List[str]
+    ) -> Set[str]:
+        """
+        Return which of ``card_ids`` already have actions recorded.
+
+        Asks only about the given ids with an ``in.(...)`` filter (served by
+        idx_card_actions_org_card), so the cost follows the page size rather
+        than the size of card_actions.
+
+        Args:
+            organization_id: The organization UUID
+            card_ids: Pipefy card IDs to check
+
+        Returns:
+            The subset of card_ids present in card_actions
+        """
+        unique = list(dict.fromkeys(str(card_id) for card_id in card_ids if card_id))
+        existing: Set[str] = set()
+        async with postgrest_client() as client:
+            for start in range(0, len(unique), _PROBE_CHUNK):
+                chunk = unique[start:start + _PROBE_CHUNK]
+                quoted = ",".join(f'"{card_id}"' for card_id in chunk)
+                response = await client.get(
+                    f"{self.base_url}/card_actions",
+                    params={
+                        "select": "pipefy_card_id",
+                        "organization_id": f"eq.{organization_id}",
+                        "pipefy_card_id": f"in.({quoted})",
+                    },
+                    headers=self.headers
+                )
+                response.raise_for_status()
+                existing.update(
+                    row["pipefy_card_id"] for row in response.json() if row.get("pipefy_card_id")
+                )
+        return existing
+
+    async def get_card_ids_after(
+        self,
+        organization_id: str,
+        after_id: int,
+        limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        Page through an organization's card_actions in id order.
+
+        card_actions.id is a serial, so ``id > after_id`` returns exactly the
+        rows inserted since a previous read (keyset pagination on the PK).
+
+        Returns:
+            Up to ``limit`` rows of {id, pipefy_card_id}, ascending by id
+        """
+        async with postgrest_client() as client:
+            response = await client.get(
+                f"{self.base_url}/card_actions",
+                params={
+                    "select": "id,pipefy_card_id",
+                    "organization_id": f"eq.{organization_id}",
+                    "id": f"gt.{after_id}",
+                    "order": "id.asc",
+                    "limit": limit,
+                },
+                headers=self.headers
+            )
+            response.raise_for_status()
+            return response.json()
+
     async def get_all_card_ids(self) -> set:
         """
         Get all unique pipefy_card_id values from card_actions table
 
+        Downloads the whole table; prefer get_existing_card_ids (or the
+        KnownCardIndex) to test specific cards.
+
         Returns:
             Set of all card IDs that have actions recorded
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/card_actions",
                 params={
@@ -111,3 +194,79 @@ class CardActionsRepository:
             # Extract unique card IDs
             card_ids = {action["pipefy_card_id"] for action in actions if action.get("pipefy_card_id")}
             return card_ids
+
+
+class KnownCardIndex:
+    """
+    In-process set of an organization's card ids that have actions.
+
+    Warmed once by paging through card_actions in id order, then kept up to
+    date incrementally: every lookup first pulls only the rows inserted
+    since the highest id seen (usually an empty response), so new actions
+    are picked up no matter which process wrote them. Deleted rows are only
+    noticed on the periodic full re-warm (CARD_ACTIONS_INDEX_REWARM_SECONDS).
+    """
+
+    def __init__(self, organization_id: str, repo: Optional[CardActionsRepository] = None):
+        self.organization_id = organization_id
+        self._repo = repo or CardActionsRepository()
+        self._card_ids: Set[str] = set()
+        self._high_water = 0
+        self._warmed_at: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _pull(self) -> int:
+        """Load rows past the high-water mark; returns how many were read."""
+        read = 0
+        while True:
+            rows = await self._repo.get_card_ids_after(
+                self.organization_id, self._high_water, limit=_PAGE_SIZE
+            )
+            for row in rows:
+                if row.get("pipefy_card_id"):
+                    self._card_ids.add(row["pipefy_card_id"])
+                self._high_water = max(self._high_water, int(row["id"]))
+            read += len(rows)
+            if len(rows) < _PAGE_SIZE:
+                return read
+
+    async def refresh(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = time.monotonic()
+            if self._warmed_at is None or now - self._warmed_at > settings.CARD_ACTIONS_INDEX_REWARM_SECONDS:
+                self._card_ids, self._high_water = set(), 0
+                read = await self._pull()
+                self._warmed_at = now
+                logger.info(
+                    f"Warmed card_actions index for org {self.organization_id}: "
+                    f"{len(self._card_ids)} cards from {read} rows"
+                )
+            else:
+                await self._pull()
+
+    async def existing(self, card_ids: List[str]) -> Set[str]:
+        await self.refresh()
+        return {str(card_id) for card_id in card_ids if str(card_id) in self._card_ids}
+
+    def stats(self) -> Tuple[int, int]:
+        return len(self._card_ids), self._high_water
+
+
+_indexes: Dict[str, KnownCardIndex] = {}
+
+
+async def known_card_ids(organization_id: str, card_ids: List[str]) -> Set[str]:
+    """
+    Which of ``card_ids`` already have card_actions, via the in-process
+    index when CARD_ACTIONS_INDEX_ENABLED, else a direct in.(...) probe.
+    """
+    if not card_ids:
+        return set()
+    if not settings.CARD_ACTIONS_INDEX_ENABLED:
+        return await CardActionsRepository().get_existing_card_ids(organization_id, card_ids)
+    index = _indexes.get(organization_id)
+    if index is None:
+        index = _indexes[organization_id] = KnownCardIndex(organization_id)
+    return await index.existing(card_ids)
@@ -13,6 +13,7 @@ import httpx
 from fastapi import HTTPException
 
 from core.config import settings
+from core.http_pool import postgrest_client
 
 logger = logging.getLogger(__name__)
 
@@ -59,7 +60,7 @@ class CitaRepository:
             The created row as PostgREST returned it.
         """
         payload = {**data, "organization_id": str(organization_id)}
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/citas", json=payload, headers=self.headers
             )
@@ -96,7 +97,7 @@ class CitaRepository:
         if status:
             params["status"] = f"eq.{status}"
 
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/citas", params=params, headers=self.headers
             )
@@ -113,7 +114,7 @@ class CitaRepository:
             "organization_id": f"eq.{organization_id}",
             "limit": "1",
         }
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/citas", params=params, headers=self.headers
             )
@@ -136,7 +137,7 @@ class CitaRepository:
             "organization_id": f"eq.{organization_id}",
             "select": CITA_SELECT,
         }
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.patch(
                 f"{self.base_url}/citas",
                 params=params,
@@ -163,7 +164,7 @@ class CitaRepository:
             "id": f"eq.{cita_id}",
             "organization_id": f"eq.{organization_id}",
         }
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             # Prefer: return=representation (already in self.headers) makes
             # PostgREST echo the deleted rows, which is how a miss is told
             # apart from a success.
@@ -0,0 +1,106 @@
+"""Repository for the daily_rollups table (migrations/008_daily_rollups.sql).
+
+Rows are written by Postgres triggers as orders, status history and
+WhatsApp messages are inserted; this repository rebuilds ranges of them
+(rebuild_daily_rollups) and reads them bucketed for charts
+(dashboard_timeseries, migrations/009_dashboard_timeseries.sql).
+"""
+
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from core.config import settings
+from repositories.rpc import call_rpc
+
+logger = logging.getLogger(__name__)
+
+
+class DailyRollupRepository:
+    """Access to per-organization daily counters."""
+
+    def __init__(self):
+        self.supabase_url = settings.SUPABASE_URL
+        self.service_role_key = settings.SUPABASE_SERVICE_ROLE_KEY
+        self.base_url = f"{self.supabase_url}/rest/v1"
+        self.headers = {
+            "apikey": self.service_role_key,
+            "Authorization": f"Bearer {self.service_role_key}",
+            "Content-Type": "application/json",
+        }
+
+    async def rebuild(
+        self,
+        start: date,
+        end: date,
+        organization_id: Optional[str] = None,
+    ) -> int:
+        """
+        Recompute the rollups for the America/Panama days [start, end] from
+        the raw rows, for one organization or all of them.
+
+        Returns:
+            The number of rollup rows written.
+
+        Raises:
+            HTTPException 503 if migration 008 has not been applied.
+        """
+        written = await call_rpc(
+            self.base_url,
+            self.headers,
+            "rebuild_daily_rollups",
+            {
+                "p_from": start.isoformat(),
+                "p_to": end.isoformat(),
+                "p_organization_id": organization_id,
+            },
+        )
+        if written is None:
+            raise HTTPException(
+                status_code=503,
+                detail="daily_rollups is not deployed (apply migrations/008_daily_rollups.sql)",
+            )
+        return int(written)
+
+    async def get_timeseries(
+        self,
+        organization_id: str,
+        start: date,
+        end: date,
+        bucket: str,
+    ) -> List[Dict[str, Any]]:
+        """
+        Created / completed / cancelled counts per bucket over [start, end].
+
+        Args:
+            organization_id: The organization UUID to scope by
+            start: First America/Panama day included
+            end: Last America/Panama day included
+            bucket: 'day', 'week' (Monday-based) or 'month'
+
+        Returns:
+            One row per bucket, oldest first, with bucket_start (date) and
+            created/completed/cancelled; empty buckets are present with zeros.
+
+        Raises:
+            HTTPException 503 if migration 009 has not been applied.
+        """
+        rows = await call_rpc(
+            self.base_url,
+            self.headers,
+            "dashboard_timeseries",
+            {
+                "p_organization_id": organization_id,
+                "p_from": start.isoformat(),
+                "p_to": end.isoformat(),
+                "p_bucket": bucket,
+            },
+        )
+        if rows is None:
+            raise HTTPException(
+                status_code=503,
+                detail="dashboard_timeseries is not deployed (apply migrations/009_dashboard_timeseries.sql)",
+            )
+        return rows
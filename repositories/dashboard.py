@@ -1,12 +1,15 @@
 """Repository for dashboard metric queries against Supabase (PostgREST)."""
 
+import asyncio
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 import httpx
 from fastapi import HTTPException
 
 from core.config import settings
+from core.http_pool import postgrest_client
+from repositories.rpc import call_rpc
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +27,40 @@ class DashboardRepository:
             "Content-Type": "application/json",
         }
 
+    async def _call_rpc(self, name: str, payload: Dict[str, Any]) -> Optional[Any]:
+        """POST /rpc/<name>; None when the function is not deployed (see repositories.rpc)."""
+        return await call_rpc(self.base_url, self.headers, name, payload)
+
+    async def get_kpis(
+        self,
+        organization_id: str,
+        active_statuses: List[str],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        All dashboard KPIs in one round trip via the dashboard_kpis SQL
+        function (migrations/004_dashboard_kpis.sql).
+
+        Args:
+            organization_id: The organization UUID to scope by
+            active_statuses: order_status codes counted as active
+
+        Returns:
+            A row with today_start/week_start/month_start (Panama boundaries,
+            as timestamptz) and created_today, created_this_week,
+            created_this_month, active_orders, completed_today,
+            cancelled_today; or None if the function is not deployed.
+        """
+        rows = await self._call_rpc(
+            "dashboard_kpis",
+            {
+                "p_organization_id": organization_id,
+                "p_active_statuses": active_statuses,
+            },
+        )
+        if rows is None:
+            return None
+        return rows[0] if rows else {}
+
     async def count_orders(
         self,
         organization_id: str,
@@ -58,7 +95,7 @@ class DashboardRepository:
             params["order_status"] = f"in.({quoted})"
 
         headers = {**self.headers, "Prefer": "count=exact"}
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/orders", params=params, headers=headers
             )
@@ -70,6 +107,48 @@ class DashboardRepository:
                 raise HTTPException(status_code=response.status_code, detail=detail)
             return int(response.headers.get("Content-Range", "0-0/0").split("/")[1])
 
+    async def get_status_counts(self, organization_id: str) -> Optional[Dict[str, int]]:
+        """
+        Orders per order_status for an organization, in one grouped query via
+        the order_status_counts SQL function (migrations/007_order_status_counts.sql).
+
+        Returns:
+            {order_status: count} for statuses that have orders (others are
+            absent), or None if the function is not deployed.
+        """
+        rows = await self._call_rpc(
+            "order_status_counts", {"p_organization_id": organization_id}
+        )
+        if rows is None:
+            return None
+        return {row["order_status"]: int(row["order_count"]) for row in rows}
+
+    async def count_orders_by_status(
+        self,
+        organization_id: str,
+        statuses: List[str],
+    ) -> Dict[str, int]:
+        """
+        Count an organization's orders in each of `statuses`.
+
+        One grouped query (get_status_counts); if that function is not
+        deployed, one count_orders request per status, run concurrently.
+
+        Args:
+            organization_id: The organization UUID to scope by
+            statuses: order_status codes to report
+
+        Returns:
+            {status: count} with an entry (possibly 0) for every requested status.
+        """
+        grouped = await self.get_status_counts(organization_id)
+        if grouped is not None:
+            return {status: grouped.get(status, 0) for status in statuses}
+        counts = await asyncio.gather(
+            *(self.count_orders(organization_id, statuses=[status]) for status in statuses)
+        )
+        return dict(zip(statuses, counts))
+
     async def count_orders_reached_status(
         self,
         organization_id: str,
@@ -79,9 +158,12 @@ class DashboardRepository:
         """
         Count distinct orders that transitioned to `to_status` since a time.
 
-        Reads order_status_history rows (select=order_id) and dedupes in
-        Python, because an order can transition to the same status more than
-        once and orders.completed_at is not reliably populated.
+        Counted in Postgres by the count_orders_reached_status SQL function
+        (migrations/005_status_transition_counts.sql), which returns a single
+        integer. If that function is not deployed, falls back to reading
+        order_status_history rows (select=order_id) and deduping in Python,
+        because an order can transition to the same status more than once and
+        orders.completed_at is not reliably populated.
 
         Args:
             organization_id: The organization UUID to scope by
@@ -91,13 +173,24 @@ class DashboardRepository:
         Returns:
             The number of distinct orders that reached the status in the window.
         """
+        count = await self._call_rpc(
+            "count_orders_reached_status",
+            {
+                "p_organization_id": organization_id,
+                "p_to_status": to_status,
+                "p_changed_after": changed_after,
+            },
+        )
+        if count is not None:
+            return int(count)
+
         params = {
             "organization_id": f"eq.{organization_id}",
             "to_status": f"eq.{to_status}",
             "changed_at": f"gte.{changed_after}",
             "select": "order_id",
         }
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/order_status_history",
                 params=params,
@@ -5,6 +5,7 @@ import httpx
 from fastapi import HTTPException
 
 from core.config import settings
+from core.http_pool import postgrest_client
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +32,7 @@ class FieldDefinitionRepository:
             "organization_id": f"eq.{organization_id}",
             "order": "display_order.asc",
         }
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/field_definitions",
                 params=params,
@@ -46,7 +47,7 @@ class FieldDefinitionRepository:
             return response.json()
 
     async def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/field_definitions",
                 json=data,
@@ -61,7 +62,7 @@ class FieldDefinitionRepository:
             return response.json()[0]
 
     async def delete(self, field_id: str) -> Optional[Dict[str, Any]]:
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.delete(
                 f"{self.base_url}/field_definitions",
                 params={"id": f"eq.{field_id}"},
@@ -89,7 +90,7 @@ class OrderFieldValueRepository:
             "order_id": f"eq.{order_id}",
             "select": "*,field_definition:field_definitions(*)",
         }
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/order_field_values",
                 params=params,
@@ -112,7 +113,7 @@ class OrderFieldValueRepository:
         need to diff added/removed/changed values. `rows` should already carry
         order_id and non-empty values only.
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             # 1. Wipe existing values for this order.
             del_response = await client.delete(
                 f"{self.base_url}/order_field_values",
@@ -6,22 +6,20 @@ using PostgREST embedded-resource filtering (`wa_conversations!inner(...)`).
 """
 
 import logging
-from typing import Optional, Set
+from typing import AsyncIterator, List, Optional, Set, Tuple
 
 import httpx
 from fastapi import HTTPException
 
 from core.config import settings
+from core.http_pool import postgrest_client
+from repositories.rpc import call_rpc
 
 logger = logging.getLogger(__name__)
 
-# PostgREST caps the number of rows a single request can return (server-side
-# max-rows setting); a query with more matches than this is silently
-# truncated rather than erroring. This is a soft ceiling to make truncation
-# observable via logs rather than a hard guarantee of completeness. If
-# message volume grows past this, switch to full keyset pagination or a
-# Postgres RPC that aggregates server-side (documented follow-up).
-_MAX_CONVERSATION_ROWS = 10000
+# Keyset page size for the row-reading fallback. Kept at or under PostgREST's
+# max-rows (1000 on Supabase) so a page is never silently shortened.
+_PAGE_SIZE = 1000
 
 
 class MarketingRepository:
@@ -73,7 +71,7 @@ class MarketingRepository:
         params["limit"] = "1"
 
         headers = {**self.headers, "Prefer": "count=exact"}
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/wa_messages", params=params, headers=headers
             )
@@ -85,6 +83,45 @@ class MarketingRepository:
                 raise HTTPException(status_code=response.status_code, detail=detail)
             return int(response.headers.get("Content-Range", "0-0/0").split("/")[1])
 
+    async def response_counts(
+        self,
+        organization_id: str,
+        sent_after: str,
+    ) -> Tuple[int, int]:
+        """
+        Count conversations messaged since `sent_after` and how many of those
+        got an inbound reply in the same window.
+
+        Computed in Postgres by the marketing_response_counts SQL function
+        (migrations/006_marketing_response_counts.sql). If that function is not
+        deployed, the conversation ids are streamed page by page instead and
+        intersected here; only one page of message rows is held at a time.
+
+        Args:
+            organization_id: The organization UUID to scope by (via conversation)
+            sent_after: ISO timestamp; only messages with sent_at >= this
+
+        Returns:
+            (messaged, replied) distinct conversation counts.
+        """
+        rows = await call_rpc(
+            self.base_url,
+            self.headers,
+            "marketing_response_counts",
+            {"p_organization_id": organization_id, "p_sent_after": sent_after},
+        )
+        if rows is not None:
+            row = rows[0] if rows else {}
+            return int(row.get("messaged") or 0), int(row.get("replied") or 0)
+
+        messaged = await self.conversation_ids_with_message(
+            organization_id, "outbound", sent_after
+        )
+        replied: Set[str] = set()
+        async for page in self._conversation_id_pages(organization_id, "inbound", sent_after):
+            replied.update(conversation_id for conversation_id in page if conversation_id in messaged)
+        return len(messaged), len(replied)
+
     async def conversation_ids_with_message(
         self,
         organization_id: str,
@@ -93,8 +130,9 @@ class MarketingRepository:
     ) -> Set[str]:
         """
         Return the set of conversation ids that have >=1 message of `direction`
-        since `sent_after`, scoped to the org. Dedupes in Python (a conversation
-        may have many messages).
+        since `sent_after`, scoped to the org. Message rows are read in keyset
+        pages and deduped as they arrive (a conversation may have many
+        messages), so the result is complete at any volume.
 
         Args:
             organization_id: The organization UUID to scope by (via conversation)
@@ -104,29 +142,45 @@ class MarketingRepository:
         Returns:
             Distinct conversation ids matching the filter.
         """
+        conversation_ids: Set[str] = set()
+        async for page in self._conversation_id_pages(organization_id, direction, sent_after):
+            conversation_ids.update(page)
+        return conversation_ids
+
+    async def _conversation_id_pages(
+        self,
+        organization_id: str,
+        direction: str,
+        sent_after: str,
+    ) -> AsyncIterator[List[str]]:
+        """
+        Yield the conversation ids of matching messages, one page at a time.
+
+        Keyset pagination on the primary key (`id=gt.<last id>`, ordered by
+        id) rather than offsets, so each page is an index range scan and rows
+        inserted meanwhile cannot shift a page boundary. Stops at the first
+        empty page, since a short page may just be PostgREST's max-rows.
+        """
         params = self._scoped_params(organization_id)
+        params["select"] = f"id,{params['select']}"
         params["direction"] = f"eq.{direction}"
         params["sent_at"] = f"gte.{sent_after}"
-        params["limit"] = str(_MAX_CONVERSATION_ROWS)
+        params["order"] = "id.asc"
+        params["limit"] = str(_PAGE_SIZE)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/wa_messages", params=params, headers=self.headers
-            )
-            try:
-                response.raise_for_status()
-            except httpx.HTTPStatusError as exc:
-                detail = response.json() if response.text else str(exc)
-                logger.error("Error fetching conversation ids: %s", detail)
-                raise HTTPException(status_code=response.status_code, detail=detail)
-            rows = response.json()
-            if len(rows) >= _MAX_CONVERSATION_ROWS:
-                logger.warning(
-                    "conversation_ids_with_message hit the %d-row cap for org %s "
-                    "(direction=%s); results may be truncated and response_rate "
-                    "may be approximate.",
-                    _MAX_CONVERSATION_ROWS,
-                    organization_id,
-                    direction,
+        async with postgrest_client() as client:
+            while True:
+                response = await client.get(
+                    f"{self.base_url}/wa_messages", params=params, headers=self.headers
                 )
-            return {row["conversation_id"] for row in rows if row.get("conversation_id")}
+                try:
+                    response.raise_for_status()
+                except httpx.HTTPStatusError as exc:
+                    detail = response.json() if response.text else str(exc)
+                    logger.error("Error fetching conversation ids: %s", detail)
+                    raise HTTPException(status_code=response.status_code, detail=detail)
+                rows = response.json()
+                if not rows:
+                    return
+                yield [row["conversation_id"] for row in rows if row.get("conversation_id")]
+                params["id"] = f"gt.{rows[-1]['id']}"
@@ -15,6 +15,7 @@ import httpx
 from fastapi import HTTPException
 
 from core.config import settings
+from core.http_pool import postgrest_client
 from integrations.messaging.templates import MessageTemplate
 
 logger = logging.getLogger(__name__)
@@ -66,7 +67,7 @@ class MessageTemplateRepository:
         if active_only:
             params["is_active"] = "is.true"
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/message_templates",
                 headers=self.headers,
@@ -79,7 +80,7 @@ class MessageTemplateRepository:
         self, organization_id: str, name: str
     ) -> Optional[Dict[str, Any]]:
         """One template by its logical name, or None. The send path's lookup."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/message_templates",
                 headers=self.headers,
@@ -100,7 +101,7 @@ class MessageTemplateRepository:
     ) -> Dict[str, Any]:
         """Insert one template, stamping the owning organization here."""
         payload = {**data, "organization_id": organization_id}
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/message_templates",
                 headers=self.headers,
@@ -114,7 +115,7 @@ class MessageTemplateRepository:
     ) -> Optional[Dict[str, Any]]:
         """Patch one template. organization_id is the tenant guard, not a filter
         convenience: without it a caller could patch another org's row by id."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with postgrest_client() as client:
             response = await client.patch(
                 f"{self.base_url}/message_templates",
                 headers=self.headers,
@@ -130,7 +131,7 @@ class MessageTemplateRepository:
 
     async def delete(self, organization_id: str, template_id: str) -> bool:
         """Delete one template. Returns False when nothing matched."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with postgrest_client() as client:
             response = await client.delete(
                 f"{self.base_url}/message_templates",
                 headers=self.headers,
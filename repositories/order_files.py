@@ -5,6 +5,7 @@ import httpx
 from fastapi import HTTPException
 
 from core.config import settings
+from core.http_pool import postgrest_client
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +43,7 @@ class OrderFileRepository:
         """Bulk-insert order_file rows and return the created records."""
         if not records:
             return []
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/order_files",
                 json=records,
@@ -53,7 +54,7 @@ class OrderFileRepository:
 
     async def list_by_order(self, order_id: str) -> List[Dict[str, Any]]:
         """Return every file attached to an order, oldest first."""
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/order_files",
                 params={
@@ -67,7 +68,7 @@ class OrderFileRepository:
 
     async def get_by_id(self, file_id: str) -> Optional[Dict[str, Any]]:
         """Return a single order_file row, or None if it doesn't exist."""
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/order_files",
                 params={"id": f"eq.{file_id}", "limit": 1},
@@ -81,7 +82,7 @@ class OrderFileRepository:
         self, file_id: str, data: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
         """Patch editable metadata (label / file_type) on a file row."""
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.patch(
                 f"{self.base_url}/order_files",
                 params={"id": f"eq.{file_id}"},
@@ -94,7 +95,7 @@ class OrderFileRepository:
 
     async def delete(self, file_id: str) -> Optional[Dict[str, Any]]:
         """Delete a file row and return it (so the caller can clean Storage)."""
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.delete(
                 f"{self.base_url}/order_files",
                 params={"id": f"eq.{file_id}"},
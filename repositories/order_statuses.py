@@ -10,6 +10,8 @@ from typing import Any, Dict, List, Optional
 import httpx
 from fastapi import HTTPException
 
+from core.http_pool import postgrest_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,7 +47,7 @@ class OrderStatusRepository:
         Raises:
             HTTPException: If creation fails (e.g., duplicate code)
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/order_statuses",
                 json=data,
@@ -71,7 +73,7 @@ class OrderStatusRepository:
         Returns:
             Status record or None if not found
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/order_statuses",
                 params={"id": f"eq.{status_id}"},
@@ -97,7 +99,7 @@ class OrderStatusRepository:
         Returns:
             Status record or None if not found
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/order_statuses",
                 params={"code": f"eq.{code}"},
@@ -136,7 +138,7 @@ class OrderStatusRepository:
         if status_type:
             params["status_type"] = f"eq.{status_type}"
 
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/order_statuses",
                 params=params,
@@ -165,7 +167,7 @@ class OrderStatusRepository:
         """
         headers = {**self.headers, "Prefer": "count=exact"}
 
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             # Get total count
             params = {}
             if status_type:
@@ -220,7 +222,7 @@ class OrderStatusRepository:
         Raises:
             HTTPException: If update fails
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.patch(
                 f"{self.base_url}/order_statuses",
                 params={"id": f"eq.{status_id}"},
@@ -252,7 +254,7 @@ class OrderStatusRepository:
         Raises:
             HTTPException: If deletion fails (e.g., foreign key constraint)
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.delete(
                 f"{self.base_url}/order_statuses",
                 params={"id": f"eq.{status_id}"},
@@ -1,11 +1,19 @@
 import logging
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from fastapi import HTTPException
 from core.config import settings
+from core.http_pool import postgrest_client
+from repositories.rpc import call_rpc
 
 logger = logging.getLogger(__name__)
 
+# Rows returned by the customer / vehicle search boxes (and the most a caller
+# may ask for); the SQL functions of migrations/015_search_trigram.sql
+# enforce the same cap.
+SEARCH_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+
 
 class CustomerRepository:
     """Repository for managing customers in Supabase"""
@@ -26,26 +34,54 @@ class CustomerRepository:
         organization_id: str,
         name: Optional[str] = None,
         phone: Optional[str] = None,
-        national_id: Optional[str] = None
+        national_id: Optional[str] = None,
+        limit: int = SEARCH_LIMIT,
     ) -> List[Dict[str, Any]]:
         """
         Search customers within an organization
 
-        Filters by organization_id and matches a case-insensitive partial
-        (ilike) on ANY of the provided fields (name / phone / national_id),
-        so a single search term can hit any of them.
+        Matches ANY of the provided fields (name / phone / national_id), so a
+        single search term can hit any of them, via the
+        search_customers_ranked SQL function
+        (migrations/015_search_trigram.sql): an exact phone (digits only) or
+        national_id match is returned on its own, otherwise partial and
+        trigram-similar matches, best first. Both are index scans.
+
+        If that function is not deployed, falls back to a case-insensitive
+        partial (ilike) match, newest first. Without any field the newest
+        customers are returned.
 
         Args:
             organization_id: The organization UUID
             name: Optional name fragment to match
             phone: Optional phone fragment to match
             national_id: Optional national_id fragment to match
+            limit: Max customers to return (capped at SEARCH_MAX_LIMIT)
 
         Returns:
             List of matching customer records
         """
+        limit = min(limit, SEARCH_MAX_LIMIT)
+        if name or phone or national_id:
+            rows = await call_rpc(
+                self.base_url,
+                self.headers,
+                "search_customers_ranked",
+                {
+                    "p_organization_id": str(organization_id),
+                    "p_name": name,
+                    "p_phone": phone,
+                    "p_national_id": national_id,
+                    "p_limit": limit,
+                },
+            )
+            if rows is not None:
+                return rows
+
         params: Dict[str, Any] = {
-            "organization_id": f"eq.{organization_id}"
+            "organization_id": f"eq.{organization_id}",
+            "order": "created_at.desc",
+            "limit": str(limit),
         }
 
         # Top-level PostgREST filters are AND-ed, so combine the provided
@@ -60,7 +96,7 @@ class CustomerRepository:
         if or_filters:
             params["or"] = "(" + ",".join(or_filters) + ")"
 
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/customers",
                 params=params,
@@ -72,7 +108,7 @@ class CustomerRepository:
     async def update_customer(
         self, customer_id: str, data: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.patch(
                 f"{self.base_url}/customers",
                 params={"id": f"eq.{customer_id}"},
@@ -104,7 +140,7 @@ class CustomerRepository:
             The created customer record from Supabase
         """
         payload = {**data, "organization_id": str(organization_id)}
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/customers",
                 json=payload,
@@ -113,12 +149,66 @@ class CustomerRepository:
             response.raise_for_status()
             return response.json()[0]  # Return the created record
 
+    async def find_or_create(
+        self, organization_id: str, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        The organization's customer with `data["national_id"]`, created from
+        `data` if there is none, in one round trip via the
+        find_or_create_customer SQL function
+        (migrations/014_find_or_create_customer_vehicle.sql). Without a
+        national_id a new customer is always created.
+
+        If that function is not deployed, falls back to an exact national_id
+        lookup followed by create_customer (two round trips, not race-free).
+
+        Args:
+            organization_id: The organization UUID
+            data: Customer fields (name, phone, national_id)
+
+        Returns:
+            The existing customer record unchanged, or the created one.
+        """
+        row = await call_rpc(
+            self.base_url,
+            self.headers,
+            "find_or_create_customer",
+            {"p_organization_id": str(organization_id), "p_customer": data},
+        )
+        if row is not None:
+            return row
+
+        if data.get("national_id"):
+            params = {
+                "organization_id": f"eq.{organization_id}",
+                "national_id": f"eq.{data['national_id']}",
+                "order": "created_at.asc",
+                "limit": "1",
+            }
+            async with postgrest_client() as client:
+                response = await client.get(
+                    f"{self.base_url}/customers",
+                    params=params,
+                    headers=self.headers,
+                )
+                try:
+                    response.raise_for_status()
+                except httpx.HTTPStatusError as exc:
+                    detail = response.json() if response.text else str(exc)
+                    logger.error("Error looking up customer by national_id: %s", detail)
+                    raise HTTPException(status_code=response.status_code, detail=detail)
+                rows = response.json()
+            if rows:
+                return rows[0]
+        return await self.create_customer(organization_id, data)
+
     async def list_with_order_counts(
         self,
         organization_id: str,
         search: Optional[str] = None,
         limit: int = 100,
         offset: int = 0,
+        select: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         List customers within an organization with an embedded order count.
@@ -129,15 +219,17 @@ class CustomerRepository:
 
         Args:
             organization_id: The organization UUID
-            search: Optional term matched (ilike) against name/phone/national_id
+            search: Optional term matched (ilike) against name/phone/national_id;
+                served by the trigram indexes of migrations/015_search_trigram.sql
             limit: Max customers to return
             offset: Pagination offset
+            select: Override of the columns (e.g. CUSTOMER_LIST_VERSIONS_SELECT)
 
         Returns:
             A list of customer dicts, each with an `orders: [{"count": N}]` key.
         """
         params: Dict[str, Any] = {
-            "select": "id,name,phone,national_id,type,source,created_at,orders(count)",
+            "select": select or "id,name,phone,national_id,type,source,created_at,orders(count)",
             "organization_id": f"eq.{organization_id}",
             "order": "created_at.desc",
             "limit": str(limit),
@@ -149,7 +241,7 @@ class CustomerRepository:
                 f"national_id.ilike.*{search}*)"
             )
 
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/customers",
                 params=params,
@@ -168,7 +260,7 @@ class CustomerRepository:
             return response.json()
 
     async def get_detail_with_orders(
-        self, customer_id: str
+        self, customer_id: str, select: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Get a single customer with its full order history embedded.
@@ -178,6 +270,7 @@ class CustomerRepository:
 
         Args:
             customer_id: The customer UUID
+            select: Override of the columns (e.g. CUSTOMER_DETAIL_VERSIONS_SELECT)
 
         Returns:
             The customer record with an `orders` array, or None if not found.
@@ -185,14 +278,14 @@ class CustomerRepository:
         params: Dict[str, Any] = {
             "id": f"eq.{customer_id}",
             "limit": "1",
-            "select": (
+            "select": select or (
                 "*,orders(id,date_order,received_at,completed_at,order_status,"
                 "order_reason,service_type,total_amount,priority,km_in,"
                 "vehicle:vehicles(plate,make,model,year,km_last_service),"
                 "technician:app_users!orders_assigned_to_fkey(name))"
             ),
         }
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/customers",
                 params=params,
@@ -229,26 +322,54 @@ class VehicleRepository:
         organization_id: str,
         plate: Optional[str] = None,
         make: Optional[str] = None,
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        limit: int = SEARCH_LIMIT,
     ) -> List[Dict[str, Any]]:
         """
         Search vehicles within an organization
 
-        Filters by organization_id and matches a case-insensitive partial
-        (ilike) on ANY of the provided fields (plate / make / model), so a
-        single search term can hit any of them.
+        Matches ANY of the provided fields (plate / make / model), so a
+        single search term can hit any of them, via the
+        search_vehicles_ranked SQL function
+        (migrations/015_search_trigram.sql): an exact plate match (ignoring
+        case, spaces and dashes) is returned on its own, otherwise partial
+        and trigram-similar matches, best first. Both are index scans.
+
+        If that function is not deployed, falls back to a case-insensitive
+        partial (ilike) match. Without any field the most recently updated
+        vehicles are returned.
 
         Args:
             organization_id: The organization UUID
             plate: Optional plate fragment to match
             make: Optional make fragment to match
             model: Optional model fragment to match
+            limit: Max vehicles to return (capped at SEARCH_MAX_LIMIT)
 
         Returns:
             List of matching vehicle records
         """
+        limit = min(limit, SEARCH_MAX_LIMIT)
+        if plate or make or model:
+            rows = await call_rpc(
+                self.base_url,
+                self.headers,
+                "search_vehicles_ranked",
+                {
+                    "p_organization_id": str(organization_id),
+                    "p_plate": plate,
+                    "p_make": make,
+                    "p_model": model,
+                    "p_limit": limit,
+                },
+            )
+            if rows is not None:
+                return rows
+
         params: Dict[str, Any] = {
-            "organization_id": f"eq.{organization_id}"
+            "organization_id": f"eq.{organization_id}",
+            "order": "updated_at.desc.nullslast",
+            "limit": str(limit),
         }
 
         # Top-level PostgREST filters are AND-ed, so combine the provided
@@ -263,7 +384,7 @@ class VehicleRepository:
         if or_filters:
             params["or"] = "(" + ",".join(or_filters) + ")"
 
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/vehicles",
                 params=params,
@@ -287,7 +408,7 @@ class VehicleRepository:
         Returns:
             The matching vehicle record, or None if not found
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/vehicles",
                 params={
@@ -304,7 +425,7 @@ class VehicleRepository:
     async def update_vehicle(
         self, vehicle_id: str, data: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.patch(
                 f"{self.base_url}/vehicles",
                 params={"id": f"eq.{vehicle_id}"},
@@ -320,6 +441,60 @@ class VehicleRepository:
             rows = response.json()
             return rows[0] if rows else None
 
+    async def find_or_create(
+        self, organization_id: str, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        The organization's vehicle with `data["plate"]`, created from `data`
+        if there is none, in one round trip via the find_or_create_vehicle
+        SQL function (migrations/014_find_or_create_customer_vehicle.sql).
+        Plates are compared ignoring case, spaces and dashes, so "abc 123"
+        finds "ABC-123".
+
+        If that function is not deployed, falls back to an insert that
+        ignores a conflict on the raw (plate, organization_id) unique key,
+        followed by get_vehicle_by_plate when the plate already existed:
+        one round trip for a new vehicle, two for a known one, race-free
+        either way.
+
+        Args:
+            organization_id: The organization UUID
+            data: Vehicle fields (plate, make, model, year, km_last_service)
+
+        Returns:
+            The existing vehicle record unchanged, or the created one.
+        """
+        payload = {**data, "organization_id": str(organization_id)}
+        row = await call_rpc(
+            self.base_url,
+            self.headers,
+            "find_or_create_vehicle",
+            {"p_organization_id": str(organization_id), "p_vehicle": payload},
+        )
+        if row is not None:
+            return row
+
+        async with postgrest_client() as client:
+            response = await client.post(
+                f"{self.base_url}/vehicles",
+                params={"on_conflict": "plate,organization_id"},
+                json=payload,
+                headers={
+                    **self.headers,
+                    "Prefer": "resolution=ignore-duplicates,return=representation",
+                },
+            )
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as exc:
+                detail = response.json() if response.text else str(exc)
+                logger.error("Error creating vehicle %s: %s", data.get("plate"), detail)
+                raise HTTPException(status_code=response.status_code, detail=detail)
+            rows = response.json()
+        if rows:
+            return rows[0]
+        return await self.get_vehicle_by_plate(data["plate"], str(organization_id))
+
     async def create_vehicle(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a new vehicle record in Supabase
@@ -330,7 +505,7 @@ class VehicleRepository:
         Returns:
             The created vehicle record from Supabase
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/vehicles",
                 json=data,
@@ -340,6 +515,117 @@ class VehicleRepository:
             return response.json()[0]  # Return the created record
 
 
+# ---------------------------------------------------------------------------
+# Order listing projections
+# ---------------------------------------------------------------------------
+# Columns a client may ask for with `fields=`; anything else is rejected so
+# user input never reaches the select string unvalidated.
+ORDER_COLUMNS = (
+    "id", "organization_id", "customer_id", "vehicle_id", "assigned_to",
+    "created_by", "service_type", "order_status", "priority", "order_reason",
+    "total_amount", "received_at", "completed_at", "date_order", "km_in",
+    "order_comments",
+)
+
+# Embeds a client may ask for with `include=`, keyed by the response key.
+ORDER_EMBEDS = {
+    "customer": "customer:customers(*)",
+    "vehicle": "vehicle:vehicles(*)",
+    "order_files": "order_files(*)",
+    "order_field_values": "order_field_values(*,field_definition:field_definitions(*))",
+}
+
+# Named projections: (columns, {embed: select fragment}). "detail" is what
+# the listings always returned and stays the default. Presets may narrow an
+# embed's own columns.
+ORDER_SELECT_PRESETS: Dict[str, Tuple[Tuple[str, ...], Dict[str, str]]] = {
+    "detail": (("*",), dict(ORDER_EMBEDS)),
+    "kanban": (
+        ("id", "order_status", "priority", "service_type", "received_at",
+         "date_order", "assigned_to"),
+        {
+            "customer": "customer:customers(id,name,phone)",
+            "vehicle": "vehicle:vehicles(id,make,model,plate)",
+        },
+    ),
+    "export": (
+        ORDER_COLUMNS,
+        {
+            "customer": "customer:customers(id,name,phone,national_id)",
+            "vehicle": "vehicle:vehicles(id,make,model,year,plate)",
+        },
+    ),
+}
+
+# Always selected: the keyset cursor is built from them.
+_REQUIRED_COLUMNS = ("id", "date_order")
+
+# Versions behind the ETags of the order responses (core.etag): only the
+# rows' updated_at, which migration 011 moves on every write to an order,
+# its files and field values, its customer or its vehicle.
+ORDER_VERSIONS_SELECT = (
+    "id,updated_at,customer:customers(updated_at),vehicle:vehicles(updated_at)"
+)
+CUSTOMER_LIST_VERSIONS_SELECT = "id,updated_at,orders(count)"
+CUSTOMER_DETAIL_VERSIONS_SELECT = (
+    "id,updated_at,orders(id,updated_at,vehicle:vehicles(updated_at))"
+)
+
+
+def order_select(
+    preset: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    include: Optional[List[str]] = None,
+) -> str:
+    """
+    PostgREST `select` for the order listings.
+
+    Starts from `preset` (default "detail"); `fields` replaces its columns
+    and `include` its embeds (an empty list means none). An embed the preset
+    narrows keeps the preset's columns.
+
+    Raises:
+        ValueError: unknown preset, column or embed.
+    """
+    name = preset or "detail"
+    if name not in ORDER_SELECT_PRESETS:
+        raise ValueError(
+            f"Unknown preset {name!r}; expected one of {sorted(ORDER_SELECT_PRESETS)}"
+        )
+    columns, embeds = ORDER_SELECT_PRESETS[name]
+
+    if fields is not None:
+        unknown = sorted(set(fields) - set(ORDER_COLUMNS))
+        if unknown:
+            raise ValueError(f"Unknown order field(s): {', '.join(unknown)}")
+        columns = tuple(dict.fromkeys([*_REQUIRED_COLUMNS, *fields]))
+
+    if include is not None:
+        unknown = sorted(set(include) - set(ORDER_EMBEDS))
+        if unknown:
+            raise ValueError(
+                f"Unknown include(s): {', '.join(unknown)}; "
+                f"expected any of {', '.join(ORDER_EMBEDS)}"
+            )
+        embeds = {key: embeds.get(key, ORDER_EMBEDS[key]) for key in dict.fromkeys(include)}
+
+    return ",".join([*columns, *embeds.values()])
+
+
+def _keyset_after(date_order: Optional[str], order_id: str) -> str:
+    """
+    PostgREST `or` filter for the rows after (date_order, id) in
+    `date_order.desc,id.desc` order. NULL dates sort first, so after a NULL
+    come the remaining NULLs and then every dated order.
+    """
+    if date_order is None:
+        return f'(and(date_order.is.null,id.lt."{order_id}"),date_order.not.is.null)'
+    return (
+        f'(date_order.lt."{date_order}",'
+        f'and(date_order.eq."{date_order}",id.lt."{order_id}"))'
+    )
+
+
 class OrderRepository:
     """Repository for managing orders in Supabase"""
 
@@ -355,11 +641,11 @@ class OrderRepository:
         }
 
     async def get_full_detail_by_id(
-        self, order_id: str
+        self, order_id: str, select: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         params = {
             "id": f"eq.{order_id}",
-            "select": (
+            "select": select or (
                 "*,customer:customers(*),vehicle:vehicles(*),order_files(*),"
                 "order_field_values(*,field_definition:field_definitions(*)),"
                 "created_by_user:app_users!orders_created_by_fkey(id,name,role),"
@@ -367,7 +653,7 @@ class OrderRepository:
             ),
             "limit": "1",
         }
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/orders",
                 params=params,
@@ -394,7 +680,7 @@ class OrderRepository:
             The created order record from Supabase (including DB-generated
             fields such as id, date_order and total_amount)
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/orders",
                 json=data,
@@ -417,6 +703,8 @@ class OrderRepository:
         status: Optional[List[str]] = None,
         limit: int = 100,
         offset: int = 0,
+        after: Optional[Tuple[Optional[str], str]] = None,
+        select: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         List orders with their customer, vehicle and files embedded.
@@ -432,23 +720,27 @@ class OrderRepository:
             organization_id: Optional org filter
             status: Optional list of statuses to filter by (matches any in the list)
             limit: Max number of orders to return (applies to orders, not rows)
-            offset: Pagination offset
+            offset: Pagination offset (ignored when `after` is given)
+            after: Keyset cursor, the (date_order, id) of the last order of
+                the previous page; returns the orders that sort after it.
+            select: Projection from order_select(); the "detail" preset
+                (every column and embed) when None.
+
+        Orders sort by date_order desc (NULLs first, as in Postgres), then
+        id desc, so pages are stable when several orders share a date_order.
 
         Returns:
             A list of order dicts with embedded relations.
         """
         params: Dict[str, Any] = {
-            "select": (
-                "*,"
-                "customer:customers(*),"
-                "vehicle:vehicles(*),"
-                "order_files(*),"
-                "order_field_values(*,field_definition:field_definitions(*))"
-            ),
-            "order": "date_order.desc",
+            "select": select or order_select(),
+            "order": "date_order.desc,id.desc",
             "limit": str(limit),
-            "offset": str(offset),
         }
+        if after is not None:
+            params["or"] = _keyset_after(*after)
+        else:
+            params["offset"] = str(offset)
         if organization_id:
             params["organization_id"] = f"eq.{organization_id}"
         if status:
@@ -457,7 +749,7 @@ class OrderRepository:
             quoted = ",".join(f'"{s}"' for s in status)
             params["order_status"] = f"in.({quoted})"
 
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/orders",
                 params=params,
@@ -471,8 +763,279 @@ class OrderRepository:
                 raise HTTPException(status_code=response.status_code, detail=detail)
             return response.json()
 
+    async def get_status(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """
+        The id, organization_id and order_status of an order, for callers
+        that don't need the embedded detail.
+
+        Returns:
+            The slim order record, or None if not found.
+        """
+        params = {
+            "id": f"eq.{order_id}",
+            "select": "id,organization_id,order_status",
+            "limit": "1",
+        }
+        async with postgrest_client() as client:
+            response = await client.get(
+                f"{self.base_url}/orders",
+                params=params,
+                headers=self.headers,
+            )
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as exc:
+                detail = response.json() if response.text else str(exc)
+                logger.error("Error fetching status of order %s: %s", order_id, detail)
+                raise HTTPException(status_code=response.status_code, detail=detail)
+            rows = response.json()
+            return rows[0] if rows else None
+
+    async def get_status_type(self, code: str) -> str:
+        """
+        The status_type of `code` in the order_statuses catalog.
+
+        Raises:
+            HTTPException 422: `code` is not in the catalog.
+        """
+        async with postgrest_client() as client:
+            response = await client.get(
+                f"{self.base_url}/order_statuses",
+                params={"code": f"eq.{code}", "select": "status_type"},
+                headers=self.headers,
+            )
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as exc:
+                detail = response.json() if response.text else str(exc)
+                logger.error("Error fetching status type of %s: %s", code, detail)
+                raise HTTPException(status_code=response.status_code, detail=detail)
+            rows = response.json()
+        if not rows:
+            raise HTTPException(status_code=422, detail=f"Unknown order status '{code}'")
+        return rows[0]["status_type"]
+
+    async def transition_status(
+        self,
+        order_id: str,
+        data: Dict[str, Any],
+        expected_status: Optional[str] = None,
+        changed_by: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Patch an order and record its status change in order_status_history
+        in one round trip, via the transition_order_status SQL function
+        (migrations/012_transition_order_status.sql). The history row's
+        status_type is the target status's order_statuses entry.
+
+        If that function is not deployed, falls back to get_status, a catalog
+        lookup of the target status when it differs, a PATCH conditioned on
+        the status just read and a history POST; a concurrent status change
+        then fails the PATCH instead of being misrecorded.
+
+        Args:
+            order_id: The order UUID to update
+            data: Partial fields to set, usually including order_status
+            expected_status: Only apply the change if the order is in this status
+            changed_by: app_users.id recorded in the history row
+
+        Returns:
+            {"order": updated record, "from_status": status before}, or None
+            if no order matched.
+
+        Raises:
+            HTTPException 409: the order is not in `expected_status`, or its
+                status changed while the fallback was applying the patch.
+            HTTPException 422: the target status is not in order_statuses.
+        """
+        result = await call_rpc(
+            self.base_url,
+            self.headers,
+            "transition_order_status",
+            {
+                "p_order_id": order_id,
+                "p_changes": data,
+                "p_expected_status": expected_status,
+                "p_changed_by": changed_by,
+            },
+        )
+        if result is not None:
+            return result if result.get("order") else None
+
+        current = await self.get_status(order_id)
+        if not current:
+            return None
+        from_status = current.get("order_status")
+        if expected_status is not None and from_status != expected_status:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Order {order_id} is in status {from_status}, not {expected_status}",
+            )
+        status_type = None
+        if data.get("order_status") not in (None, from_status):
+            status_type = await self.get_status_type(data["order_status"])
+        updated = await self.update_order(order_id, data, expected_status=from_status)
+        if not updated:
+            raise HTTPException(
+                status_code=409, detail=f"Order {order_id} changed status concurrently"
+            )
+        to_status = updated.get("order_status")
+        if to_status != from_status:
+            await self.create_status_history({
+                "order_id": order_id,
+                "organization_id": str(updated["organization_id"]),
+                "status_type": status_type,
+                "from_status": from_status,
+                "to_status": to_status,
+                "changed_by": changed_by,
+            })
+        return {"order": updated, "from_status": from_status}
+
+    async def bulk_transition_status(
+        self,
+        order_ids: List[str],
+        to_status: str,
+        organization_id: Optional[str] = None,
+        changed_by: Optional[str] = None,
+        status_type: str = "workshop",
+    ) -> List[Dict[str, Any]]:
+        """
+        Move many orders to `to_status` and write their order_status_history
+        rows, via the bulk_transition_order_status SQL function
+        (migrations/013_bulk_transition_order_status.sql): one round trip.
+
+        If that function is not deployed: one read of the orders' current
+        status, one PATCH per distinct current status (filtered on it, so an
+        order whose status changed meanwhile is left alone and reported as a
+        conflict) and one bulk insert of the history rows.
+
+        Args:
+            order_ids: The order UUIDs to move
+            to_status: Target order_status code
+            organization_id: When given, orders of other organizations are
+                treated as not found
+            changed_by: app_users.id recorded in the history rows
+            status_type: status_type of the history rows
+
+        Returns:
+            One {"order_id", "organization_id", "from_status", "outcome"} per
+            order found, outcome being "updated", "unchanged" (already in
+            `to_status`) or "conflict" (fallback only). Missing ids are absent.
+        """
+        rows = await call_rpc(
+            self.base_url,
+            self.headers,
+            "bulk_transition_order_status",
+            {
+                "p_order_ids": order_ids,
+                "p_to_status": to_status,
+                "p_organization_id": organization_id,
+                "p_changed_by": changed_by,
+                "p_status_type": status_type,
+            },
+        )
+        if rows is not None:
+            return [
+                {
+                    "order_id": str(row["order_id"]),
+                    "organization_id": str(row["organization_id"]),
+                    "from_status": row["from_status"],
+                    "outcome": "updated" if row["changed"] else "unchanged",
+                }
+                for row in rows
+            ]
+
+        current = await self.get_statuses(order_ids, organization_id=organization_id)
+        results = {
+            str(row["id"]): {
+                "order_id": str(row["id"]),
+                "organization_id": str(row["organization_id"]),
+                "from_status": row["order_status"],
+                "outcome": "unchanged" if row["order_status"] == to_status else "conflict",
+            }
+            for row in current
+        }
+        by_status: Dict[str, List[str]] = {}
+        for result in results.values():
+            if result["outcome"] == "conflict":
+                by_status.setdefault(result["from_status"], []).append(result["order_id"])
+
+        history: List[Dict[str, Any]] = []
+        for from_status, ids in by_status.items():
+            for row in await self.update_status_where(ids, from_status, to_status):
+                result = results[str(row["id"])]
+                result["outcome"] = "updated"
+                history.append({
+                    "order_id": result["order_id"],
+                    "organization_id": result["organization_id"],
+                    "status_type": status_type,
+                    "from_status": from_status,
+                    "to_status": to_status,
+                    "changed_by": changed_by,
+                })
+        if history:
+            await self.create_status_history_many(history)
+        return list(results.values())
+
+    async def get_statuses(
+        self, order_ids: List[str], organization_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """id, organization_id and order_status of the given orders (get_status for many)."""
+        params = {
+            "id": f"in.({','.join(order_ids)})",
+            "select": "id,organization_id,order_status",
+        }
+        if organization_id:
+            params["organization_id"] = f"eq.{organization_id}"
+        async with postgrest_client() as client:
+            response = await client.get(
+                f"{self.base_url}/orders",
+                params=params,
+                headers=self.headers,
+            )
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as exc:
+                detail = response.json() if response.text else str(exc)
+                logger.error("Error fetching statuses of %d order(s): %s", len(order_ids), detail)
+                raise HTTPException(status_code=response.status_code, detail=detail)
+            return response.json()
+
+    async def update_status_where(
+        self, order_ids: List[str], from_status: str, to_status: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Set order_status = `to_status` on those of `order_ids` still in
+        `from_status`, in one PATCH.
+
+        Returns:
+            The {"id", "organization_id"} of the orders updated.
+        """
+        params = {
+            "id": f"in.({','.join(order_ids)})",
+            "order_status": f"eq.{from_status}",
+            "select": "id,organization_id",
+        }
+        async with postgrest_client() as client:
+            response = await client.patch(
+                f"{self.base_url}/orders",
+                params=params,
+                json={"order_status": to_status},
+                headers=self.headers,
+            )
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as exc:
+                detail = response.json() if response.text else str(exc)
+                logger.error("Error moving orders to %s: %s", to_status, detail)
+                raise HTTPException(status_code=response.status_code, detail=detail)
+            return response.json()
+
     async def update_order(
-        self, order_id: str, data: Dict[str, Any]
+        self,
+        order_id: str,
+        data: Dict[str, Any],
+        expected_status: Optional[str] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         Patch an order's fields and return the updated record.
@@ -480,14 +1043,18 @@ class OrderRepository:
         Args:
             order_id: The order UUID to update
             data: Partial fields to set (only the columns provided)
+            expected_status: Only patch the order if it is in this status
 
         Returns:
             The updated order record, or None if no order matched.
         """
-        async with httpx.AsyncClient() as client:
+        params = {"id": f"eq.{order_id}"}
+        if expected_status is not None:
+            params["order_status"] = f"eq.{expected_status}"
+        async with postgrest_client() as client:
             response = await client.patch(
                 f"{self.base_url}/orders",
-                params={"id": f"eq.{order_id}"},
+                params=params,
                 json=data,
                 headers=self.headers,
             )
@@ -501,7 +1068,7 @@ class OrderRepository:
             return rows[0] if rows else None
 
     async def create_status_history(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/order_status_history",
                 json=data,
@@ -515,6 +1082,24 @@ class OrderRepository:
                 raise HTTPException(status_code=response.status_code, detail=detail)
             return response.json()[0]
 
+    async def create_status_history_many(
+        self, rows: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Insert several order_status_history rows in one request."""
+        async with postgrest_client() as client:
+            response = await client.post(
+                f"{self.base_url}/order_status_history",
+                json=rows,
+                headers=self.headers,
+            )
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as exc:
+                detail = response.json() if response.text else str(exc)
+                logger.error("Error creating %d status history row(s): %s", len(rows), detail)
+                raise HTTPException(status_code=response.status_code, detail=detail)
+            return response.json()
+
     async def delete_order(self, order_id: str) -> Optional[Dict[str, Any]]:
         """
         Delete an order and return the deleted record.
@@ -529,7 +1114,7 @@ class OrderRepository:
         Returns:
             The deleted order record, or None if no order matched.
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.delete(
                 f"{self.base_url}/orders",
                 params={"id": f"eq.{order_id}"},
@@ -1,6 +1,6 @@
-import httpx
 from typing import List, Dict, Any
 from core.config import settings
+from core.http_pool import postgrest_client
 
 
 class OrganizationRepository:
@@ -27,7 +27,7 @@ class OrganizationRepository:
         Returns:
             The created organization record from Supabase
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/organization",
                 json=organization_data,
@@ -0,0 +1,131 @@
+"""
+Cache for Pipefy cards that many order cards point to (customer and vehicle
+cards), so webhooks and bulk syncs stop re-fetching the same ones.
+
+Two tiers: an in-process LRU (core.ttl_cache.TTLCache, reported as
+"pipefy_cards" at /api/health/caches) and, when PIPEFY_CARD_CACHE_PATH is
+set, an on-disk SQLite store shared across restarts and workers on the host.
+
+An entry is served as-is for PIPEFY_CARD_CACHE_TTL_SECONDS. After that it is
+revalidated: only the card's `updated_at` is asked from Pipefy (batched with
+other revalidations) and, if it did not change, the entry is fresh again
+without downloading the card. Entries not confirmed for
+PIPEFY_CARD_CACHE_MAX_AGE_SECONDS are dropped outright.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from core.config import settings
+from core.disk_store import SqliteStore
+from core.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+Fetch = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class PipefyCardCache:
+    """
+    Args:
+        ttl: Seconds an entry is served without asking Pipefy.
+        max_age: Seconds after which an entry is discarded, revalidated or not.
+        max_entries: In-process LRU bound.
+        store: Optional persistent second tier.
+        clock: Wall-clock source (entries outlive the process, so not monotonic).
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_age: float,
+        max_entries: int,
+        store: Optional[SqliteStore] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl = ttl
+        self.max_age = max_age
+        self._store = store
+        self._clock = clock
+        self._memory: TTLCache[Dict[str, Any]] = TTLCache(
+            ttl=max_age, max_entries=max_entries, name="pipefy_cards"
+        )
+        self.counters = {"fresh": 0, "revalidated": 0, "refetched": 0, "disk_hits": 0}
+
+    async def _lookup(self, card_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(card_id)
+        if entry is None and self._store is not None:
+            entry = await asyncio.to_thread(self._store.get, card_id, self.max_age)
+            if entry is not None:
+                self.counters["disk_hits"] += 1
+                self._memory.set(card_id, entry)
+        return entry
+
+    async def _save(self, card_id: str, entry: Dict[str, Any]) -> None:
+        self._memory.set(card_id, entry)
+        if self._store is not None:
+            try:
+                await asyncio.to_thread(self._store.set, card_id, entry)
+            except Exception as e:  # the disk tier is an optimization only
+                logger.warning(f"Could not persist Pipefy card {card_id}: {e}")
+
+    async def get(self, card_id: str, fetch: Fetch, fetch_updated_at: Fetch) -> Optional[Dict[str, Any]]:
+        """
+        Return the card, fetching or revalidating it through the given
+        callables (the repository's batched loaders) when needed.
+        """
+        now = self._clock()
+        entry = await self._lookup(card_id)
+
+        if entry is not None:
+            if now < entry["fresh_until"]:
+                self.counters["fresh"] += 1
+                return entry["card"]
+            try:
+                current = await fetch_updated_at(card_id)
+            except Exception as e:
+                logger.warning(f"Could not revalidate Pipefy card {card_id}: {e}")
+                current = None
+            if current is not None and current == entry["updated_at"]:
+                self.counters["revalidated"] += 1
+                entry = {**entry, "fresh_until": now + self.ttl}
+                await self._save(card_id, entry)
+                return entry["card"]
+
+        self.counters["refetched"] += 1
+        card = await fetch(card_id)
+        if card:
+            await self._save(card_id, {
+                "card": card,
+                "updated_at": card.get("updated_at"),
+                "fresh_until": now + self.ttl,
+            })
+        return card
+
+    async def invalidate(self, card_id: str) -> None:
+        self._memory.invalidate(card_id)
+        if self._store is not None:
+            await asyncio.to_thread(self._store.delete, card_id)
+
+
+_card_cache: Optional[PipefyCardCache] = None
+
+
+def get_card_cache() -> PipefyCardCache:
+    """The process-wide cache, built from settings on first use."""
+    global _card_cache
+    if _card_cache is None:
+        store = None
+        if settings.PIPEFY_CARD_CACHE_PATH:
+            try:
+                store = SqliteStore(settings.PIPEFY_CARD_CACHE_PATH, table="pipefy_cards")
+            except Exception as e:
+                logger.warning(f"Pipefy card disk cache disabled ({e}); using memory only")
+        _card_cache = PipefyCardCache(
+            ttl=settings.PIPEFY_CARD_CACHE_TTL_SECONDS,
+            max_age=settings.PIPEFY_CARD_CACHE_MAX_AGE_SECONDS,
+            max_entries=settings.PIPEFY_CARD_CACHE_MAX_ENTRIES,
+            store=store,
+        )
+    return _card_cache
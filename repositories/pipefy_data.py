@@ -1,5 +1,162 @@
+import asyncio
+import logging
+import random
 import httpx
-from typing import Optional, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from core.config import settings
+from core.http_pool import pipefy_client
+from repositories.pipefy_card_cache import get_card_cache
+from core.token_bucket import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# One limiter per worker process, shared by every repository instance, so the
+# sync worker pool and webhook handlers draw from the same request budget.
+rate_limiter = TokenBucket(
+    rate=settings.PIPEFY_REQUESTS_PER_SECOND,
+    capacity=settings.PIPEFY_BURST,
+)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _backoff_seconds(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Delay before retry ``attempt`` (0-based): Retry-After, else jittered 2^n."""
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), settings.PIPEFY_BACKOFF_MAX_SECONDS)
+        except ValueError:
+            pass  # HTTP-date form; fall back to exponential backoff
+    ceiling = min(
+        settings.PIPEFY_BACKOFF_MAX_SECONDS,
+        settings.PIPEFY_BACKOFF_BASE_SECONDS * (2 ** attempt),
+    )
+    return random.uniform(ceiling / 2, ceiling)
+
+
+# Selection used for every card lookup (single or batched).
+CARD_DETAILS_FRAGMENT = """
+fragment CardDetails on Card {
+    id
+    title
+    current_phase {
+        id
+        name
+    }
+    fields {
+        name
+        value
+        array_value
+        date_value
+        datetime_value
+        float_value
+        report_value
+        filled_at
+        updated_at
+        field {
+            id
+            label
+            type
+        }
+    }
+    assignees {
+        id
+        name
+        email
+    }
+    labels {
+        id
+        name
+        color
+    }
+    attachments {
+        url
+    }
+    created_at
+    updated_at
+    due_date
+    url
+}
+"""
+
+# Cards per aliased query; keeps each request well inside Pipefy's query
+# complexity limits.
+CARD_BATCH_SIZE = 30
+
+
+class _CardLoader:
+    """
+    DataLoader-style batcher: ``load(id)`` calls made in the same event-loop
+    tick are collected and dispatched together via ``call_soon``, duplicate
+    ids share one future, and results fan back out per id.
+
+    A result is forgotten once delivered, so a long sync run holds only the
+    cards in flight; cross-request reuse belongs to the bounded
+    pipefy_card_cache. ``prime(id)`` keeps a successful result until the
+    next ``load(id)`` consumes it, which is how prefetched pages reach their
+    workers. Failures are never kept, so a later call can retry.
+    """
+
+    def __init__(
+        self,
+        fetch_many: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+        max_batch: Optional[int] = None,
+    ):
+        self._fetch_many = fetch_many
+        self._max_batch = max_batch
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._primed: Set[str] = set()
+        self._pending: List[str] = []
+        self._inflight: Set[asyncio.Task] = set()  # the loop keeps only weak refs
+
+    def load(self, key: str) -> "asyncio.Future[Any]":
+        future = self._futures.get(key)
+        if future is not None:
+            if future.done():
+                del self._futures[key]
+                self._primed.discard(key)
+            return future
+        loop = asyncio.get_running_loop()
+        future = self._futures[key] = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._dispatch)
+        self._pending.append(key)
+        return future
+
+    def prime(self, key: str) -> "asyncio.Future[Any]":
+        """Like ``load``, but the result waits for one later ``load(key)``."""
+        self._primed.add(key)
+        future = self._futures.get(key)
+        return future if future is not None else self.load(key)
+
+    def _dispatch(self) -> None:
+        keys, self._pending = self._pending, []
+        size = self._max_batch or CARD_BATCH_SIZE
+        for start in range(0, len(keys), size):
+            task = asyncio.ensure_future(self._run(keys[start:start + size]))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, keys: List[str]) -> None:
+        try:
+            results = await self._fetch_many(keys)
+        except Exception as e:
+            results = {key: e for key in keys}
+        for key in keys:
+            future = self._futures[key]
+            value = results.get(key, {})
+            if isinstance(value, Exception) or key not in self._primed:
+                del self._futures[key]
+                self._primed.discard(key)
+            if future.done():
+                continue
+            if isinstance(value, Exception):
+                future.set_exception(value)
+            else:
+                future.set_result(value)
 
 
 class PipeFyDataRepository:
@@ -19,6 +176,8 @@ class PipeFyDataRepository:
             "Authorization": f"Bearer {api_token}",
             "Content-Type": "application/json"
         }
+        self._card_loader = _CardLoader(self._fetch_cards)
+        self._updated_at_loader = _CardLoader(self._fetch_updated_at)
 
     async def _execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -32,89 +191,146 @@ class PipeFyDataRepository:
             Response data from Pipefy API
 
         Raises:
-            httpx.HTTPError: If the request fails
+            httpx.HTTPError: If the request fails after all retries
         """
         payload = {"query": query}
         if variables:
             payload["variables"] = variables
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.PIPEFY_GRAPHQL_ENDPOINT,
-                json=payload,
-                headers=self.headers,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            result = response.json()
+        response = await self._post(payload)
+        result = response.json()
 
-            # Check for GraphQL errors
-            if "errors" in result:
-                raise Exception(f"GraphQL errors: {result['errors']}")
+        # Check for GraphQL errors
+        if "errors" in result:
+            raise Exception(f"GraphQL errors: {result['errors']}")
+
+        return result.get("data", {})
 
-            return result.get("data", {})
+    async def _post(self, payload: Dict[str, Any]) -> httpx.Response:
+        """
+        POST to the GraphQL endpoint through the shared rate limiter.
+
+        429, 5xx and transport errors are retried up to PIPEFY_MAX_RETRIES
+        times with exponential backoff; any other 4xx is raised immediately.
+        """
+        max_retries = settings.PIPEFY_MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            await rate_limiter.acquire()
+            try:
+                async with pipefy_client() as client:
+                    response = await client.post(
+                        self.PIPEFY_GRAPHQL_ENDPOINT,
+                        json=payload,
+                        headers=self.headers,
+                    )
+            except httpx.TransportError as e:
+                if attempt == max_retries:
+                    raise
+                delay = _backoff_seconds(attempt)
+                logger.warning(f"Pipefy request failed ({e!r}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt == max_retries:
+                    response.raise_for_status()
+                    return response
+                delay = _backoff_seconds(attempt, response)
+                logger.warning(
+                    f"Pipefy answered {response.status_code}, retrying in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{max_retries})"
+                )
+            await asyncio.sleep(delay)
 
-    async def get_card_details(self, card_id: str) -> Dict[str, Any]:
+    async def get_card_details(self, card_id: str, use_cache: bool = False) -> Dict[str, Any]:
         """
         Get detailed information about a card by ID, including file attachments
 
+        Lookups issued in the same event-loop tick on this repository are
+        sent as ONE aliased GraphQL query (see _CardLoader); a card
+        prefetched by prefetch_cards is served from memory, once.
+
         Args:
             card_id: The Pipefy card ID
+            use_cache: Serve from the cross-request card cache
+                (repositories/pipefy_card_cache.py), revalidating by
+                `updated_at` once the entry's TTL has passed. Meant for
+                connected customer/vehicle cards, not the card whose
+                change is being processed.
 
         Returns:
             Dictionary containing card details including attachments with preview URLs
         """
-        query = """
-        query GetCard($cardId: ID!) {
-            card(id: $cardId) {
-                id
-                title
-                current_phase {
-                    id
-                    name
-                }
-               fields {
-                    name
-                    value
-                    array_value
-                    date_value
-                    datetime_value
-                    float_value
-                    report_value
-                    filled_at
-                    updated_at
-                    field {
-                    id
-                    label
-                    type
-                    }
-                }
-                assignees {
-                    id
-                    name
-                    email
-                }
-                labels {
-                    id
-                    name
-                    color
-                }
-                attachments { 
-                  url
-                }
-                created_at
-                updated_at
-                due_date
-                url
-                
-            }
+        card_id = str(card_id)
+        if use_cache:
+            return await get_card_cache().get(
+                card_id, self._card_loader.load, self._updated_at_loader.load
+            )
+        return await self._card_loader.load(card_id)
+
+    async def prefetch_cards(self, card_ids: List[str]) -> None:
+        """
+        Load many cards in batched queries so the next get_card_details call
+        for each on this instance is served from memory; that call releases
+        it, so a multi-page run holds at most the cards of the pages not yet
+        processed. Failures are not kept; those cards are fetched again (and
+        fail for real) when asked for.
+        """
+        await asyncio.gather(
+            *(self._card_loader.prime(str(card_id)) for card_id in card_ids),
+            return_exceptions=True,
+        )
+
+    async def _fetch_cards(self, card_ids: List[str]) -> Dict[str, Any]:
+        """Full CardDetails for each id (see _fetch_aliased)."""
+        return await self._fetch_aliased(card_ids, "{ ...CardDetails }", CARD_DETAILS_FRAGMENT)
+
+    async def _fetch_updated_at(self, card_ids: List[str]) -> Dict[str, Any]:
+        """Just `updated_at` per id, for revalidating cached cards."""
+        cards = await self._fetch_aliased(card_ids, "{ id updated_at }")
+        return {
+            card_id: card if isinstance(card, Exception) else (card or {}).get("updated_at")
+            for card_id, card in cards.items()
         }
+
+    async def _fetch_aliased(
+        self,
+        card_ids: List[str],
+        selection: str,
+        fragment: str = "",
+    ) -> Dict[str, Any]:
         """
+        Fetch ``card_ids`` in one aliased query:
+            query GetCards($id0: ID!, $id1: ID!) {
+                c0: card(id: $id0) <selection>
+                c1: card(id: $id1) <selection>
+            }
 
-        variables = {"cardId": card_id}
-        result = await self._execute_query(query, variables)
+        Returns {card_id: card dict, or an Exception for that card only}.
+        GraphQL errors are attributed to a card through their ``path``; an
+        error without a path fails the whole batch.
+        """
+        params = ", ".join(f"$id{i}: ID!" for i in range(len(card_ids)))
+        selections = "\n".join(
+            f"    c{i}: card(id: $id{i}) {selection}" for i in range(len(card_ids))
+        )
+        query = f"query GetCards({params}) {{\n{selections}\n}}\n{fragment}"
+        variables = {f"id{i}": card_id for i, card_id in enumerate(card_ids)}
+
+        response = await self._post({"query": query, "variables": variables})
+        result = response.json()
+        data = result.get("data") or {}
+
+        failed: Dict[str, Exception] = {}
+        for error in result.get("errors") or []:
+            path = error.get("path") or []
+            alias = path[0] if path else None
+            if not (isinstance(alias, str) and alias.startswith("c") and alias[1:].isdigit()):
+                raise Exception(f"GraphQL errors: {result['errors']}")
+            failed[alias] = Exception(f"GraphQL errors: {[error]}")
 
-        return result.get("card", {})
+        cards: Dict[str, Any] = {}
+        for i, card_id in enumerate(card_ids):
+            alias = f"c{i}"
+            cards[card_id] = failed[alias] if alias in failed else data.get(alias, {})
+        return cards
 
     async def get_all_cards_in_phase(
         self,
@@ -1,6 +1,7 @@
 import httpx
 from typing import Optional, Dict, Any
 from core.config import settings
+from core.http_pool import postgrest_client
 from schemas.pipefy_events import PipefyEventUpdateActions, PipefyEventResponse
 
 
@@ -40,7 +41,7 @@ class PipefyEventsRepository:
         Returns:
             The created event record
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             payload = {
                 "organization_id": organization_id,
                 "event_type": event_type,
@@ -81,11 +82,8 @@ class PipefyEventsRepository:
         Returns:
             List of event records
         """
-        # Configure httpx client with increased limits for large JSON payloads
-        async with httpx.AsyncClient(
-            timeout=httpx.Timeout(60.0, connect=10.0),
-            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
-        ) as client:
+        # Large JSON payloads: allow a longer read than the pool default
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/pipefy_events",
                 params={
@@ -93,7 +91,8 @@ class PipefyEventsRepository:
                     "order": "created_at.desc",
                     "limit": limit
                 },
-                headers=self.headers
+                headers=self.headers,
+                timeout=httpx.Timeout(60.0, connect=10.0)
             )
             response.raise_for_status()
             return response.json()
@@ -113,7 +112,7 @@ class PipefyEventsRepository:
         Returns:
             List of event records
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/pipefy_events",
                 params={
@@ -147,7 +146,7 @@ class PipefyEventsRepository:
         """
         payload = update_data.model_dump(exclude_unset=True)
 
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.patch(
                 f"{self.base_url}/pipefy_events?id=eq.{event_id}",
                 json=payload,
@@ -186,7 +185,7 @@ class PipefyEventsRepository:
         if not events:
             return []
 
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/pipefy_events",
                 json=events,
@@ -204,7 +203,7 @@ class PipefyEventsRepository:
         Returns:
             List of event records with actions_taken field included 
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/card_actions",
                 params={
@@ -1,6 +1,7 @@
 import httpx
 from typing import Optional, Dict, Any
 from core.config import settings
+from core.http_pool import postgrest_client
 
 
 class PipefyEventsBackupRepository:
@@ -40,7 +41,7 @@ class PipefyEventsBackupRepository:
         Returns:
             The created backup event record
         """
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             payload = {
                 "organization_id": organization_id,
                 "event_type": event_type,
@@ -92,7 +93,7 @@ class PipefyEventsBackupRepository:
         if not events:
             return []
 
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             response = await client.post(
                 f"{self.base_url}/pipefy_events_backup",
                 json=events,
@@ -117,10 +118,7 @@ class PipefyEventsBackupRepository:
         Returns:
             List of backup event records
         """
-        async with httpx.AsyncClient(
-            timeout=httpx.Timeout(60.0, connect=10.0),
-            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
-        ) as client:
+        async with postgrest_client() as client:
             response = await client.get(
                 f"{self.base_url}/pipefy_events_backup",
                 params={
@@ -128,7 +126,8 @@ class PipefyEventsBackupRepository:
                     "order": "created_at.desc",
                     "limit": limit
                 },
-                headers=self.headers
+                headers=self.headers,
+                timeout=httpx.Timeout(60.0, connect=10.0)
             )
             response.raise_for_status()
             return response.json()
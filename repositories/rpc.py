@@ -0,0 +1,68 @@
+"""Calling Postgres functions through PostgREST (POST /rest/v1/rpc/<name>).
+
+Aggregates that would otherwise transfer rows to be counted in Python live
+in SQL functions shipped as migrations. Until a migration has been applied
+the function does not exist, so callers keep an equivalent PostgREST-query
+fallback: call_rpc returns None for a missing function and remembers that
+for _MISSING_RPC_RETRY_SECONDS, so the fallback does not pay a failed probe
+on every request.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from core.http_pool import postgrest_client
+
+logger = logging.getLogger(__name__)
+
+# PostgREST error code for "function not found in the schema cache".
+_FUNCTION_MISSING = "PGRST202"
+# After finding an RPC missing, don't probe it again for this long.
+_MISSING_RPC_RETRY_SECONDS = 300.0
+_missing_rpcs: Dict[str, float] = {}
+
+
+def _rpc_missing(response: httpx.Response) -> bool:
+    if response.status_code != 404:
+        return False
+    try:
+        return response.json().get("code") == _FUNCTION_MISSING
+    except ValueError:
+        return False
+
+
+async def call_rpc(
+    base_url: str,
+    headers: Dict[str, str],
+    name: str,
+    payload: Dict[str, Any],
+) -> Optional[Any]:
+    """
+    POST {base_url}/rpc/<name> and return the parsed body.
+
+    Returns None when the function is not deployed. Any other error is raised
+    as an HTTPException carrying PostgREST's status and body, like the
+    repositories' other queries.
+    """
+    missing_since = _missing_rpcs.get(name)
+    if missing_since is not None and time.monotonic() - missing_since < _MISSING_RPC_RETRY_SECONDS:
+        return None
+
+    async with postgrest_client() as client:
+        response = await client.post(f"{base_url}/rpc/{name}", json=payload, headers=headers)
+    if _rpc_missing(response):
+        logger.warning("RPC %s is not deployed; using the fallback queries", name)
+        _missing_rpcs[name] = time.monotonic()
+        return None
+    _missing_rpcs.pop(name, None)
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as exc:
+        detail = response.json() if response.text else str(exc)
+        logger.error("Error calling %s: %s", name, detail)
+        raise HTTPException(status_code=response.status_code, detail=detail)
+    return response.json()
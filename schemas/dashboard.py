@@ -1,7 +1,7 @@
 """Pydantic schemas for the dashboard metrics endpoint."""
 
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -38,3 +38,56 @@ class DashboardMetricsOut(BaseModel):
         "America/Panama", description="Timezone used for the date boundaries"
     )
     generated_at: datetime = Field(..., description="When the metrics were computed")
+
+
+class StatusBoardColumnOut(BaseModel):
+    """One order status (board column) and how many orders are in it."""
+
+    code: str = Field(..., description="order_statuses.code")
+    label: str = Field(..., description="Human-readable label")
+    status_type: str = Field(..., description="'workshop' or 'followup'")
+    sort_order: int = Field(..., description="Display order within its status_type")
+    is_terminal: bool = Field(False, description="Whether this is a final status")
+    count: int = Field(..., description="Orders currently in this status")
+
+
+class StatusBoardOut(BaseModel):
+    """Current order count for every status of an organization."""
+
+    columns: List[StatusBoardColumnOut] = Field(
+        ..., description="Every order status, ordered by status_type then sort_order"
+    )
+    total: int = Field(..., description="Sum of all column counts")
+    generated_at: datetime = Field(..., description="When the counts were computed")
+
+
+TimeseriesBucket = Literal["day", "week", "month"]
+
+
+class TimeseriesPointOut(BaseModel):
+    """Order counts for one day, week or month."""
+
+    bucket_start: date = Field(..., description="First America/Panama day of the bucket")
+    starts_at: datetime = Field(..., description="bucket_start's local midnight, in UTC")
+    created: int = Field(..., description="Orders received in the bucket (received_at)")
+    completed: int = Field(
+        ..., description="Orders that reached 'pagado' (distinct per day, summed)"
+    )
+    cancelled: int = Field(
+        ..., description="Orders that reached 'cancelado' (distinct per day, summed)"
+    )
+
+
+class TimeseriesOut(BaseModel):
+    """Per-bucket dashboard counts over a date range, oldest bucket first."""
+
+    bucket: TimeseriesBucket
+    start: date = Field(..., description="First day included")
+    end: date = Field(..., description="Last day included")
+    points: List[TimeseriesPointOut] = Field(
+        ..., description="Every bucket in the range, including empty ones"
+    )
+    timezone: str = Field(
+        "America/Panama", description="Timezone used for the date boundaries"
+    )
+    generated_at: datetime = Field(..., description="When the series was read")
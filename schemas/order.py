@@ -3,7 +3,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Any, Dict, List, Literal, Optional
 from fastapi import File, Form, Path, UploadFile
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 from schemas.customer import CustomerCreate
 from schemas.vehicle import VehicleCreate
@@ -91,3 +91,46 @@ class OrderFullUpdate(BaseModel):
     order: Optional[OrderUpdate] = None
     customer: Optional[Dict[str, Any]] = None
     vehicle: Optional[Dict[str, Any]] = None
+
+
+# Named projections of the order listings (repositories.orders.ORDER_SELECT_PRESETS).
+OrderSelectPreset = Literal["detail", "kanban", "export"]
+
+
+class OrderDetailsPageOut(BaseModel):
+    """One keyset page of the full order details listing."""
+
+    orders: List[Dict[str, Any]]
+    # Pass back as `cursor` for the next page; null on the last page.
+    next_cursor: Optional[str] = None
+
+
+class OrderBulkStatusUpdate(BaseModel):
+    """Move several orders to one status (the kanban board's bulk move)."""
+
+    order_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=200)
+    # Validated against the order_statuses catalog, not the OrderStatus literal.
+    order_status: str
+    # When given, ids of other organizations' orders come back as not_found.
+    organization_id: Optional[uuid.UUID] = None
+    changed_by: Optional[uuid.UUID] = None  # app_users.id, stored in the history
+
+
+# updated: moved to the status; unchanged: already in it; not_found: no such
+# order (in the organization); conflict: its status changed while the batch
+# was being applied, left as is.
+BulkStatusOutcome = Literal["updated", "unchanged", "not_found", "conflict"]
+
+
+class OrderBulkStatusResult(BaseModel):
+    order_id: uuid.UUID
+    outcome: BulkStatusOutcome
+    from_status: Optional[str] = None
+
+
+class OrderBulkStatusOut(BaseModel):
+    """Per-order outcomes of a bulk status update, in request order."""
+
+    order_status: str
+    updated: int
+    results: List[OrderBulkStatusResult]
@@ -22,6 +22,7 @@ class OrderFileOut(BaseModel):
     label: Optional[str] = None
     uploaded_at: datetime
     signed_url: Optional[str] = None  # generated on read, not stored
+    upload_ms: Optional[float] = None  # set on the upload response only
 
     model_config = ConfigDict(from_attributes=True)
 
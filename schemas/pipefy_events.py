@@ -144,6 +144,9 @@ class SyncCardsResponse(BaseModel):
     cards_synced: List[str] = Field(default_factory=list, description="List of card IDs that were synced")
     has_more_pages: bool = Field(default=False, description="Whether there are more cards to fetch")
     next_cursor: Optional[str] = Field(None, description="Cursor for fetching next page of cards")
+    sync_id: Optional[str] = Field(None, description="ID of this run in GET /api/pipefy/sync-progress")
+    cards_failed: List[str] = Field(default_factory=list, description="Card IDs that could not be processed")
+    duration_seconds: Optional[float] = Field(None, description="Wall time spent processing cards")
     error: Optional[str] = Field(None, description="Error message if sync failed")
 
     class Config:
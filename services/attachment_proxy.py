@@ -0,0 +1,181 @@
+"""
+Streaming proxy for Pipefy attachment downloads.
+
+The upstream body is piped to the client chunk by chunk instead of being read
+into memory first, so the first bytes reach the browser as soon as Pipefy
+sends them. Range / If-Range are forwarded and 206 / 416 answers are passed
+through, which lets browsers and download managers resume.
+
+Every chunk the proxy holds counts against a per-worker ByteBudget: a stream
+reserves one chunk before reading it and gives it back once the chunk has
+been handed to the ASGI server. A new download that cannot get its first
+chunk within ATTACHMENT_PROXY_WAIT_SECONDS is refused with a 503.
+
+The reservation and the upstream connection are released when the body ends
+and, failing that, by ProxiedDownload.aclose, which the endpoint runs as the
+response's background task: a client that disconnects before the body starts
+would otherwise keep both.
+"""
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Mapping, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from core.byte_budget import ByteBudget
+from core.config import settings
+from core.http_pool import attachments_client
+
+logger = logging.getLogger(__name__)
+
+# Client request headers forwarded upstream, and upstream response headers
+# passed back. Content-Length / Content-Range describe the exact bytes we
+# relay, so the upstream is asked for an unencoded body.
+FORWARDED_REQUEST_HEADERS = ("range", "if-range")
+PASSTHROUGH_RESPONSE_HEADERS = (
+    "content-type",
+    "content-length",
+    "content-range",
+    "accept-ranges",
+    "etag",
+    "last-modified",
+)
+
+_budget: Optional[ByteBudget] = None
+
+
+def get_budget() -> ByteBudget:
+    global _budget
+    if _budget is None:
+        _budget = ByteBudget(settings.ATTACHMENT_PROXY_MAX_BUFFERED_BYTES)
+    return _budget
+
+
+def proxy_stats() -> Dict[str, int]:
+    return get_budget().stats()
+
+
+@dataclass
+class ProxiedDownload:
+    status_code: int
+    headers: Dict[str, str]
+    body: AsyncIterator[bytes]
+    aclose: Callable[[], Awaitable[None]]
+
+
+class _Relay:
+    """The body of one download and the budget / connection it holds."""
+
+    def __init__(
+        self,
+        response: httpx.Response,
+        stack: AsyncExitStack,
+        budget: ByteBudget,
+        chunk_size: int,
+    ):
+        self._response = response
+        self._stack = stack
+        self._budget = budget
+        self._chunk_size = chunk_size
+        self._held = chunk_size  # reserved by open_download before the upstream call
+        self._closed = False
+
+    async def body(self) -> AsyncIterator[bytes]:
+        if self._closed:
+            return
+        try:
+            async for chunk in self._response.aiter_bytes(self._chunk_size):
+                yield chunk
+                self._release()
+                held = await self._budget.acquire(self._chunk_size)
+                if self._closed:
+                    self._budget.release(held)
+                    return
+                self._held = held
+        finally:
+            await self.aclose()
+
+    def _release(self) -> None:
+        if self._held:
+            self._budget.release(self._held)
+            self._held = 0
+
+    async def aclose(self) -> None:
+        """Give back the held chunk and close upstream; later calls do nothing."""
+        self._release()
+        if not self._closed:
+            self._closed = True
+            await self._stack.aclose()
+
+
+async def open_download(url: str, request_headers: Mapping[str, str]) -> ProxiedDownload:
+    """
+    Open a streamed GET to ``url`` and return its status, headers and body.
+
+    The caller must arrange for ``aclose`` to run even if ``body`` is never
+    iterated (StreamingResponse(background=BackgroundTask(download.aclose))).
+
+    Raises:
+        HTTPException 503: the worker's byte budget stayed exhausted.
+        HTTPException 502: Pipefy could not be reached or answered an error.
+    """
+    budget = get_budget()
+    chunk_size = budget.clamp(settings.ATTACHMENT_PROXY_CHUNK_SIZE)
+    try:
+        await budget.acquire(chunk_size, timeout=settings.ATTACHMENT_PROXY_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning("Attachment proxy byte budget exhausted, refusing download")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many downloads in progress. Please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+    upstream_headers = {"Accept-Encoding": "identity"}
+    for name in FORWARDED_REQUEST_HEADERS:
+        if name in request_headers:
+            upstream_headers[name] = request_headers[name]
+
+    stack = AsyncExitStack()
+    try:
+        client = await stack.enter_async_context(attachments_client())
+        request = client.build_request("GET", url, headers=upstream_headers)
+        response = await client.send(request, stream=True, follow_redirects=True)
+        stack.push_async_callback(response.aclose)
+    except httpx.HTTPError as e:
+        budget.release(chunk_size)
+        await stack.aclose()
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to download file from Pipefy: {str(e)}",
+        )
+    except BaseException:
+        budget.release(chunk_size)
+        await stack.aclose()
+        raise
+
+    headers = {
+        name: response.headers[name]
+        for name in PASSTHROUGH_RESPONSE_HEADERS
+        if name in response.headers
+    }
+
+    if response.status_code not in (200, 206, 416):
+        budget.release(chunk_size)
+        await stack.aclose()
+        logger.error(f"Pipefy download failed with status {response.status_code}")
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to download file from Pipefy: HTTP {response.status_code}",
+        )
+
+    relay = _Relay(response, stack, budget, chunk_size)
+    return ProxiedDownload(
+        status_code=response.status_code,
+        headers=headers,
+        body=relay.body(),
+        aclose=relay.aclose,
+    )
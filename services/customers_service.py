@@ -4,7 +4,12 @@ from typing import Any, Dict, List, Optional
 
 from fastapi import HTTPException
 
-from repositories.orders import CustomerRepository
+from core.etag import versioned_etag
+from repositories.orders import (
+    CUSTOMER_DETAIL_VERSIONS_SELECT,
+    CUSTOMER_LIST_VERSIONS_SELECT,
+    CustomerRepository,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +54,62 @@ async def list_customers(
     return customers
 
 
+async def customers_etag(
+    organization_id: str,
+    search: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> Optional[str]:
+    """
+    ETag of the list_customers response for the same arguments, from the
+    listed customers' versions and visit counts.
+
+    Returns:
+        The strong ETag, or None while migration 011 is not applied.
+    """
+    repo = CustomerRepository()
+
+    async def versions() -> List[Dict[str, Any]]:
+        return await repo.list_with_order_counts(
+            organization_id,
+            search=search,
+            limit=limit,
+            offset=offset,
+            select=CUSTOMER_LIST_VERSIONS_SELECT,
+        )
+
+    return await versioned_etag(
+        versions, "customers.list", organization_id, search, limit, offset
+    )
+
+
+async def customer_detail_etag(customer_id: str) -> Optional[str]:
+    """
+    ETag of the get_customer_detail response, from the versions of the
+    customer, its orders and their vehicles. Technician names are not
+    versioned: renaming a user doesn't change the tag.
+
+    Returns:
+        The strong ETag, or None while migration 011 is not applied.
+
+    Raises:
+        HTTPException: 404 if no customer matches the given id.
+    """
+    repo = CustomerRepository()
+
+    async def versions() -> Dict[str, Any]:
+        row = await repo.get_detail_with_orders(
+            customer_id, select=CUSTOMER_DETAIL_VERSIONS_SELECT
+        )
+        if not row:
+            raise HTTPException(status_code=404, detail="Customer not found")
+        # Embedded rows come in no guaranteed order; the tag must not move.
+        row["orders"] = sorted(row.get("orders") or [], key=lambda order: order["id"])
+        return row
+
+    return await versioned_etag(versions, "customers.detail")
+
+
 async def get_customer_detail(customer_id: str) -> Dict[str, Any]:
     """
     Return a customer's full profile: identity, visit stats and order
@@ -0,0 +1,84 @@
+"""
+Backfill / repair of the daily_rollups table.
+
+The triggers from migrations/008_daily_rollups.sql keep the counters current
+from the moment the migration is applied; earlier days (and any range that
+needs repairing) are recomputed with:
+
+    python -m services.daily_rollups --from 2024-01-01 [--to 2026-10-17] [--org <uuid>]
+
+The range is rebuilt in windows of --chunk-days so each SQL call stays well
+inside the statement timeout and holds the rollup table lock only briefly.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Iterator, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from core.http_pool import close_pools
+from repositories.daily_rollups import DailyRollupRepository
+
+logger = logging.getLogger(__name__)
+
+PANAMA_TZ = ZoneInfo("America/Panama")
+
+DEFAULT_CHUNK_DAYS = 31
+
+
+def _windows(start: date, end: date, chunk_days: int) -> Iterator[Tuple[date, date]]:
+    """Split [start, end] into consecutive inclusive windows of chunk_days."""
+    step = timedelta(days=max(1, chunk_days))
+    while start <= end:
+        window_end = min(end, start + step - timedelta(days=1))
+        yield start, window_end
+        start = window_end + timedelta(days=1)
+
+
+async def backfill(
+    start: date,
+    end: date,
+    organization_id: Optional[str] = None,
+    chunk_days: int = DEFAULT_CHUNK_DAYS,
+    repo: Optional[DailyRollupRepository] = None,
+) -> int:
+    """Rebuild [start, end] window by window. Returns the rollup rows written."""
+    repo = repo or DailyRollupRepository()
+    total = 0
+    for window_start, window_end in _windows(start, end, chunk_days):
+        written = await repo.rebuild(window_start, window_end, organization_id)
+        total += written
+        logger.info(f"Rebuilt daily rollups {window_start}..{window_end}: {written} rows")
+    return total
+
+
+def main(argv=None) -> None:
+    today = datetime.now(PANAMA_TZ).date()
+    parser = argparse.ArgumentParser(description="Rebuild daily_rollups from raw rows.")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, required=True,
+                        help="First day to rebuild (YYYY-MM-DD, America/Panama)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=today,
+                        help="Last day to rebuild, inclusive (default: today)")
+    parser.add_argument("--org", dest="organization_id", default=None,
+                        help="Only this organization (default: all)")
+    parser.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK_DAYS,
+                        help=f"Days per SQL call (default: {DEFAULT_CHUNK_DAYS})")
+    args = parser.parse_args(argv)
+    if args.end < args.start:
+        parser.error("--to is before --from")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    async def run() -> int:
+        try:
+            return await backfill(args.start, args.end, args.organization_id, args.chunk_days)
+        finally:
+            await close_pools()
+
+    total = asyncio.run(run())
+    logger.info(f"Done: {total} rollup rows written for {args.start}..{args.end}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,24 @@ through the workshop and follow-up pipelines.
 
 import asyncio
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import Tuple
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
+from fastapi import HTTPException
+
+from core.config import settings
+from core.swr_cache import SWRCache
+from repositories.daily_rollups import DailyRollupRepository
 from repositories.dashboard import DashboardRepository
-from schemas.dashboard import DashboardMetricsOut
+from repositories.order_statuses import OrderStatusRepository
+from schemas.dashboard import (
+    DashboardMetricsOut,
+    StatusBoardColumnOut,
+    StatusBoardOut,
+    TimeseriesOut,
+    TimeseriesPointOut,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +42,23 @@ ACTIVE_ORDER_STATUSES = [
 
 PANAMA_TZ = ZoneInfo("America/Panama")
 
+# Column order returned by the dashboard_kpis SQL function (and by the fan-out).
+_KPI_FIELDS = (
+    "created_today",
+    "created_this_week",
+    "created_this_month",
+    "active_orders",
+    "completed_today",
+    "cancelled_today",
+)
+
+# Every open dashboard tab polls /metrics; see core/swr_cache.py.
+_metrics_cache: SWRCache[DashboardMetricsOut] = SWRCache(
+    fresh_for=settings.METRICS_CACHE_FRESH_SECONDS,
+    stale_for=settings.METRICS_CACHE_STALE_SECONDS,
+    name="dashboard_metrics",
+)
+
 
 def _period_boundaries() -> Tuple[str, str, str]:
     """
@@ -50,9 +79,53 @@ def _period_boundaries() -> Tuple[str, str, str]:
     return to_utc_iso(day_start), to_utc_iso(week_start), to_utc_iso(month_start)
 
 
+async def _count_active_orders(repo: DashboardRepository, organization_id: str) -> int:
+    """Active orders from the grouped status counts, else one in.(...) count."""
+    grouped = await repo.get_status_counts(organization_id)
+    if grouped is not None:
+        return sum(grouped.get(status, 0) for status in ACTIVE_ORDER_STATUSES)
+    return await repo.count_orders(organization_id, statuses=ACTIVE_ORDER_STATUSES)
+
+
+async def _fan_out_metrics(
+    repo: DashboardRepository, organization_id: str
+) -> List[int]:
+    """The six KPIs as separate PostgREST queries (pre-004 fallback)."""
+    today_start, week_start, month_start = _period_boundaries()
+    return await asyncio.gather(
+        repo.count_orders(organization_id, received_after=today_start),
+        repo.count_orders(organization_id, received_after=week_start),
+        repo.count_orders(organization_id, received_after=month_start),
+        _count_active_orders(repo, organization_id),
+        repo.count_orders_reached_status(organization_id, "pagado", today_start),
+        repo.count_orders_reached_status(organization_id, "cancelado", today_start),
+    )
+
+
 async def get_dashboard_metrics(organization_id: str) -> DashboardMetricsOut:
     """
-    Compute the dashboard KPI metrics for an organization.
+    Dashboard KPI metrics for an organization, cached per organization.
+
+    A result up to METRICS_CACHE_FRESH_SECONDS old is returned as-is; a
+    staler one is returned while it is recomputed in the background.
+    `generated_at` tells the client when the numbers were computed.
+    """
+    return await _metrics_cache.get(
+        organization_id, lambda: _compute_dashboard_metrics(organization_id)
+    )
+
+
+def invalidate_metrics(organization_id: str) -> None:
+    """Drop the cached metrics for an organization (e.g. after a status change)."""
+    _metrics_cache.invalidate(organization_id)
+
+
+async def _compute_dashboard_metrics(organization_id: str) -> DashboardMetricsOut:
+    """
+    Compute the dashboard KPI metrics for an organization (uncached).
+
+    One round trip through the dashboard_kpis SQL function when it is
+    deployed; otherwise six PostgREST queries run concurrently.
 
     Args:
         organization_id: The organization UUID to compute metrics for
@@ -60,9 +133,12 @@ async def get_dashboard_metrics(organization_id: str) -> DashboardMetricsOut:
     Returns:
         DashboardMetricsOut with created/active/completed/cancelled counts.
     """
-    today_start, week_start, month_start = _period_boundaries()
     repo = DashboardRepository()
-
+    kpis = await repo.get_kpis(organization_id, ACTIVE_ORDER_STATUSES)
+    if kpis is not None:
+        values = [int(kpis.get(name) or 0) for name in _KPI_FIELDS]
+    else:
+        values = await _fan_out_metrics(repo, organization_id)
     (
         created_today,
         created_this_week,
@@ -70,14 +146,7 @@ async def get_dashboard_metrics(organization_id: str) -> DashboardMetricsOut:
         active_orders,
         completed_today,
         cancelled_today,
-    ) = await asyncio.gather(
-        repo.count_orders(organization_id, received_after=today_start),
-        repo.count_orders(organization_id, received_after=week_start),
-        repo.count_orders(organization_id, received_after=month_start),
-        repo.count_orders(organization_id, statuses=ACTIVE_ORDER_STATUSES),
-        repo.count_orders_reached_status(organization_id, "pagado", today_start),
-        repo.count_orders_reached_status(organization_id, "cancelado", today_start),
-    )
+    ) = values
 
     ratio = round(created_today / cancelled_today, 2) if cancelled_today else None
 
@@ -99,3 +168,120 @@ async def get_dashboard_metrics(organization_id: str) -> DashboardMetricsOut:
         new_vs_cancelled_ratio=ratio,
         generated_at=datetime.now(timezone.utc),
     )
+
+
+async def get_status_board(organization_id: str) -> StatusBoardOut:
+    """
+    Every order status with the organization's current order count.
+
+    The status catalogue and the grouped counts are fetched concurrently;
+    statuses with no orders are reported with count 0.
+    """
+    repo = DashboardRepository()
+    status_repo = OrderStatusRepository(
+        base_url=settings.SUPABASE_URL,
+        api_key=settings.SUPABASE_SERVICE_ROLE_KEY,
+    )
+    statuses, counts = await asyncio.gather(
+        status_repo.list_statuses(limit=1000),
+        repo.get_status_counts(organization_id),
+    )
+    if counts is None:
+        counts = await repo.count_orders_by_status(
+            organization_id, [status["code"] for status in statuses]
+        )
+
+    columns = [
+        StatusBoardColumnOut(
+            code=status["code"],
+            label=status["label"],
+            status_type=status["status_type"],
+            sort_order=status["sort_order"],
+            is_terminal=status.get("is_terminal") or False,
+            count=counts.get(status["code"], 0),
+        )
+        for status in statuses
+    ]
+    return StatusBoardOut(
+        columns=columns,
+        total=sum(column.count for column in columns),
+        generated_at=datetime.now(timezone.utc),
+    )
+
+
+# Default chart span per bucket size when `start` is omitted, and the
+# largest range served (about 400 buckets).
+_TIMESERIES_DEFAULT_BUCKETS = {"day": 30, "week": 12, "month": 12}
+_TIMESERIES_MAX_DAYS = {"day": 400, "week": 400 * 7, "month": 400 * 31}
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())  # Monday
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _default_start(end: date, bucket: str) -> date:
+    """First day of the bucket that makes the default span end at `end`."""
+    count = _TIMESERIES_DEFAULT_BUCKETS[bucket]
+    if bucket == "day":
+        return end - timedelta(days=count - 1)
+    if bucket == "week":
+        return _bucket_start(end, "week") - timedelta(weeks=count - 1)
+    month_index = end.year * 12 + end.month - 1 - (count - 1)
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _local_midnight_utc(day: date) -> datetime:
+    """America/Panama midnight of `day` in UTC (as in _period_boundaries)."""
+    return datetime(day.year, day.month, day.day, tzinfo=PANAMA_TZ).astimezone(timezone.utc)
+
+
+async def get_timeseries(
+    organization_id: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: str = "day",
+) -> TimeseriesOut:
+    """
+    Created / completed / cancelled counts per day, week or month.
+
+    Read in one query from the trigger-maintained daily_rollups (migrations
+    008 and 009); gaps are filled in SQL. `end` defaults to today and
+    `start` to a bucket-dependent span (30 days, 12 weeks, 12 months).
+
+    Raises:
+        HTTPException 400 for an inverted or too long range.
+    """
+    end = end or datetime.now(PANAMA_TZ).date()
+    start = start or _default_start(end, bucket)
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (end - start).days > _TIMESERIES_MAX_DAYS[bucket]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range too long for bucket={bucket} (max {_TIMESERIES_MAX_DAYS[bucket]} days)",
+        )
+
+    rows = await DailyRollupRepository().get_timeseries(organization_id, start, end, bucket)
+    points = []
+    for row in rows:
+        bucket_start = date.fromisoformat(row["bucket_start"])
+        points.append(
+            TimeseriesPointOut(
+                bucket_start=bucket_start,
+                starts_at=_local_midnight_utc(bucket_start),
+                created=int(row.get("created") or 0),
+                completed=int(row.get("completed") or 0),
+                cancelled=int(row.get("cancelled") or 0),
+            )
+        )
+    return TimeseriesOut(
+        bucket=bucket,
+        start=start,
+        end=end,
+        points=points,
+        generated_at=datetime.now(timezone.utc),
+    )
@@ -11,6 +11,8 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple
 from zoneinfo import ZoneInfo
 
+from core.config import settings
+from core.swr_cache import SWRCache
 from repositories.dashboard import DashboardRepository
 from repositories.marketing import MarketingRepository
 from schemas.marketing import FunnelOut, MarketingMetricsOut
@@ -19,6 +21,16 @@ logger = logging.getLogger(__name__)
 
 PANAMA_TZ = ZoneInfo("America/Panama")
 
+# Follow-up pipeline, in funnel order (schemas/order.OrderStatus).
+FOLLOWUP_STATUSES = ["requiere_de_contacto", "contactado", "agendado", "finalizada"]
+
+# Shared by every tab polling the Resumen page; see core/swr_cache.py.
+_metrics_cache: SWRCache[MarketingMetricsOut] = SWRCache(
+    fresh_for=settings.METRICS_CACHE_FRESH_SECONDS,
+    stale_for=settings.METRICS_CACHE_STALE_SECONDS,
+    name="marketing_metrics",
+)
+
 
 def _boundaries() -> Tuple[str, str, str]:
     """Return (today_start, yesterday_start, seven_days_ago) as UTC ISO strings.
@@ -58,38 +70,52 @@ async def get_marketing_metrics(
     Compute the marketing KPIs and follow-up funnel for an organization.
 
     Repositories are injectable for testing; by default the real Supabase-backed
-    repositories are used.
+    repositories are used and the result is cached per organization (injected
+    repositories always compute).
     """
-    marketing_repo = marketing_repo or MarketingRepository()
-    dashboard_repo = dashboard_repo or DashboardRepository()
+    if marketing_repo is None and dashboard_repo is None:
+        return await _metrics_cache.get(
+            organization_id,
+            lambda: _compute_marketing_metrics(
+                organization_id, MarketingRepository(), DashboardRepository()
+            ),
+        )
+    return await _compute_marketing_metrics(
+        organization_id,
+        marketing_repo or MarketingRepository(),
+        dashboard_repo or DashboardRepository(),
+    )
+
+
+def invalidate_metrics(organization_id: str) -> None:
+    """Drop the cached metrics for an organization (e.g. after a status change)."""
+    _metrics_cache.invalidate(organization_id)
+
 
+async def _compute_marketing_metrics(
+    organization_id: str,
+    marketing_repo: MarketingRepository,
+    dashboard_repo: DashboardRepository,
+) -> MarketingMetricsOut:
     today_start, yesterday_start, seven_days_ago = _boundaries()
 
     (
-        n_requiere,
-        n_contactado,
-        n_agendado,
-        n_finalizada,
+        funnel_counts,
         messages_today,
         messages_yesterday,
-        messaged_convs,
-        replied_convs,
+        (messaged, replied),
     ) = await asyncio.gather(
-        dashboard_repo.count_orders(organization_id, statuses=["requiere_de_contacto"]),
-        dashboard_repo.count_orders(organization_id, statuses=["contactado"]),
-        dashboard_repo.count_orders(organization_id, statuses=["agendado"]),
-        dashboard_repo.count_orders(organization_id, statuses=["finalizada"]),
+        dashboard_repo.count_orders_by_status(organization_id, FOLLOWUP_STATUSES),
         marketing_repo.count_outbound_messages(organization_id, sent_after=today_start),
         marketing_repo.count_outbound_messages(
             organization_id, sent_after=yesterday_start, sent_before=today_start
         ),
-        marketing_repo.conversation_ids_with_message(
-            organization_id, "outbound", seven_days_ago
-        ),
-        marketing_repo.conversation_ids_with_message(
-            organization_id, "inbound", seven_days_ago
-        ),
+        marketing_repo.response_counts(organization_id, seven_days_ago),
     )
+    n_requiere = funnel_counts["requiere_de_contacto"]
+    n_contactado = funnel_counts["contactado"]
+    n_agendado = funnel_counts["agendado"]
+    n_finalizada = funnel_counts["finalizada"]
 
     funnel = FunnelOut(
         requiere_de_contacto=n_requiere,
@@ -99,9 +125,7 @@ async def get_marketing_metrics(
     )
 
     conversion = _safe_ratio(n_agendado, n_contactado + n_agendado + n_finalizada)
-    response_rate = _safe_ratio(
-        len(messaged_convs & replied_convs), len(messaged_convs)
-    )
+    response_rate = _safe_ratio(replied, messaged)
 
     logger.info(
         "Marketing metrics for org %s: msgs_today=%d agendado=%d conversion=%s response_rate=%s",
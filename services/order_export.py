@@ -0,0 +1,175 @@
+"""
+Bulk export of an organization's orders as NDJSON or CSV.
+
+Orders are read with the same keyset pagination as the
+/fullOrderDetails/page listing (repositories.orders.list_full_details with
+`after=`), one page at a time, and each page is encoded and handed to the
+response before the next one is fetched. The worker holds at most one page
+of rows whatever the size of the export. Customer and vehicle are flattened
+into `customer_*` / `vehicle_*` columns so every order is one line.
+
+CSV cells that Excel would read as a formula (text starting with =, +, -,
+@, tab or carriage return; customer names and comments are free text) are
+prefixed with an apostrophe so they open as plain text.
+
+gzip_stream() compresses the encoded chunks as they are produced, for
+clients whose Accept-Encoding allows gzip (accepts_gzip).
+"""
+import csv
+import io
+import json
+import logging
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
+
+from repositories.orders import ORDER_COLUMNS, OrderRepository, order_select
+
+logger = logging.getLogger(__name__)
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES: Dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Orders fetched per PostgREST request.
+_PAGE_SIZE = 500
+
+# Embedded columns kept by the "export" projection, flattened as <embed>_<column>.
+_EMBED_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "customer": ("name", "phone", "national_id"),
+    "vehicle": ("make", "model", "year", "plate"),
+}
+
+# Leading characters that make a spreadsheet evaluate a cell as a formula.
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+EXPORT_COLUMNS: List[str] = [
+    *ORDER_COLUMNS,
+    *(f"{embed}_{column}" for embed, columns in _EMBED_COLUMNS.items() for column in columns),
+]
+
+
+def flatten(order: Dict[str, Any]) -> Dict[str, Any]:
+    """One export row: the order's columns plus customer_* / vehicle_*."""
+    row = {column: order.get(column) for column in ORDER_COLUMNS}
+    for embed, columns in _EMBED_COLUMNS.items():
+        related = order.get(embed) or {}
+        for column in columns:
+            row[f"{embed}_{column}"] = related.get(column)
+    return row
+
+
+def _csv_safe(row: Dict[str, Any]) -> Dict[str, Any]:
+    """`row` with text cells that would start a formula prefixed with '."""
+    return {
+        column: f"'{value}" if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES) else value
+        for column, value in row.items()
+    }
+
+
+async def export_orders(
+    organization_id: str,
+    status: Optional[List[str]] = None,
+    export_format: ExportFormat = "ndjson",
+) -> AsyncIterator[bytes]:
+    """
+    Encoded chunks of every order of the organization, newest first.
+
+    The first page is fetched before this returns, so an upstream error is
+    raised here (and becomes a normal error response) instead of cutting a
+    response that has already started.
+
+    Args:
+        organization_id: The organization to export
+        status: Optional list of statuses to filter by
+        export_format: "ndjson" (one JSON object per line) or "csv"
+
+    Returns:
+        An async iterator of bytes, one chunk per page of orders.
+    """
+    repo = OrderRepository()
+    select = order_select("export")
+
+    async def fetch(after: Optional[Tuple[Optional[str], str]]) -> List[Dict[str, Any]]:
+        return await repo.list_full_details(
+            organization_id=organization_id,
+            status=status,
+            limit=_PAGE_SIZE,
+            after=after,
+            select=select,
+        )
+
+    first = await fetch(None)
+
+    async def pages() -> AsyncIterator[List[Dict[str, Any]]]:
+        page, exported = first, 0
+        while page:
+            exported += len(page)
+            yield page
+            if len(page) < _PAGE_SIZE:
+                break
+            last = page[-1]
+            page = await fetch((last.get("date_order"), str(last["id"])))
+        logger.info("Exported %d order(s) of org %s as %s", exported, organization_id, export_format)
+
+    encode = _csv_chunks if export_format == "csv" else _ndjson_chunks
+    return encode(pages())
+
+
+async def _ndjson_chunks(pages: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    async for page in pages:
+        yield "".join(
+            json.dumps(flatten(order), ensure_ascii=False, default=str) + "\n"
+            for order in page
+        ).encode("utf-8")
+
+
+async def _csv_chunks(pages: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    # The BOM makes Excel read the file as UTF-8 (names carry accents).
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    async for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_csv_safe(flatten(order)) for order in page)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip: listed as gzip / x-gzip,
+    or covered by `*`, with a q-value above 0 (`gzip;q=0` refuses it).
+    """
+    qualities: Dict[str, float] = {}
+    for item in (accept_encoding or "").lower().split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """gzip-encode a byte stream on the fly (one gzip member, any length)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -1,11 +1,16 @@
 import asyncio
 import logging
 import re
+import time
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
+import httpx
 from fastapi import HTTPException, UploadFile
 
+from core.config import settings
+from core.http_pool import postgrest_client
+from core.ttl_cache import TTLCache
 from repositories.order_files import OrderFileRepository
 from schemas.order_file import OrderFileOut, OrderFileUpdate
 from services.supabase_client import supabase_client
@@ -15,7 +20,13 @@ logger = logging.getLogger(__name__)
 # Private bucket: files are organized as `<order_id>/<uuid>-<filename>`.
 BUCKET = "order-files"
 SIGNED_URL_EXPIRY_SECONDS = 3600  # 1 hour
+# A cached signed URL is handed out only while it still has at least this
+# long to live, so the browser never receives a link about to expire.
+SIGNED_URL_SAFETY_MARGIN_SECONDS = 300
+_SIGN_BATCH_SIZE = 500
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB — mirrors the bucket's file_size_limit
+_UPLOAD_CHUNK_SIZE = 256 * 1024
+_UPLOAD_TIMEOUT_SECONDS = 60.0
 ALLOWED_CONTENT_TYPES = {
     "image/jpeg",
     "image/png",
@@ -28,6 +39,21 @@ ALLOWED_CONTENT_TYPES = {
 
 _UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
 
+_STORAGE_URL = f"{settings.SUPABASE_URL}/storage/v1"
+_STORAGE_HEADERS = {
+    "apikey": settings.SUPABASE_SERVICE_ROLE_KEY,
+    "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}",
+    "Content-Type": "application/json",
+}
+
+# path -> signed URL. Keyed by path only: every URL is signed with the same
+# expiry, so a cached one is interchangeable with a fresh one until the margin.
+_signed_url_cache: TTLCache[str] = TTLCache(
+    ttl=SIGNED_URL_EXPIRY_SECONDS - SIGNED_URL_SAFETY_MARGIN_SECONDS,
+    max_entries=20000,
+    name="signed_urls",
+)
+
 
 def _safe_filename(name: Optional[str]) -> str:
     """Sanitize a client-supplied filename for use in a storage path."""
@@ -36,54 +62,131 @@ def _safe_filename(name: Optional[str]) -> str:
     return cleaned or "file"
 
 
-def _sign(path: str) -> Optional[str]:
-    """Create a short-lived signed URL for a private object (blocking)."""
-    try:
-        result = supabase_client.storage.from_(BUCKET).create_signed_url(
-            path, SIGNED_URL_EXPIRY_SECONDS
+def _chunks(items: List[str], size: int) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def _sign_batch(paths: List[str]) -> Dict[str, Optional[str]]:
+    """Sign many objects with ONE Storage request (POST /object/sign/<bucket>).
+
+    Goes through the shared async Supabase pool instead of the blocking
+    storage client, so no thread hop per path. Paths Storage could not sign
+    (e.g. the object is gone) map to None.
+    """
+    async with postgrest_client() as client:
+        response = await client.post(
+            f"{_STORAGE_URL}/object/sign/{BUCKET}",
+            json={"paths": paths, "expiresIn": SIGNED_URL_EXPIRY_SECONDS},
+            headers=_STORAGE_HEADERS,
         )
-        return result.get("signedURL") or result.get("signedUrl")
-    except Exception as exc:  # signing failure shouldn't break the read path
-        logger.warning("Could not sign URL for %s: %s", path, exc)
-        return None
+    response.raise_for_status()
+
+    signed: Dict[str, Optional[str]] = {}
+    for item in response.json():
+        relative = item.get("signedURL") or item.get("signedUrl")
+        if item.get("error") or not relative:
+            logger.warning("Could not sign URL for %s: %s", item.get("path"), item.get("error"))
+            signed[item.get("path")] = None
+            continue
+        # Storage answers with a path relative to /storage/v1, same as the
+        # storage client prefixes in create_signed_url(s).
+        signed[item["path"]] = f"{_STORAGE_URL}/{relative.lstrip('/')}"
+    return signed
 
 
 async def _to_out(row: Dict[str, Any]) -> OrderFileOut:
-    """Map a DB row to OrderFileOut, attaching a fresh signed URL."""
-    out = OrderFileOut.model_validate(row)
-    if out.file_url:
-        out.signed_url = await asyncio.to_thread(_sign, out.file_url)
-    return out
+    """Map a DB row to OrderFileOut, attaching a signed URL."""
+    return (await _sign_all([row]))[0]
 
 
 async def _sign_all(rows: List[Dict[str, Any]]) -> List[OrderFileOut]:
-    return list(await asyncio.gather(*[_to_out(row) for row in rows]))
+    outs = [OrderFileOut.model_validate(row) for row in rows]
+    signed = await sign_paths([out.file_url for out in outs if out.file_url])
+    for out in outs:
+        if out.file_url:
+            out.signed_url = signed.get(out.file_url)
+    return outs
 
 
 async def sign_paths(paths: List[str]) -> Dict[str, Optional[str]]:
-    """Sign many object paths concurrently, returning {path: signed_url}.
+    """Sign many object paths, returning {path: signed_url}.
 
     Used by callers that embed order files (e.g. the full order details
-    listing) and need a usable URL per file without N sequential calls.
-    Duplicate paths are signed once.
+    listing) and need a usable URL per file. Duplicate paths are signed once,
+    paths signed recently are served from the in-process cache, and the rest
+    go to Storage in batches of _SIGN_BATCH_SIZE. A signing failure yields
+    None for the affected paths rather than breaking the read path.
+    """
+    unique = list(dict.fromkeys(p for p in paths if p))
+    signed: Dict[str, Optional[str]] = {}
+    to_sign: List[str] = []
+    for path in unique:
+        cached = _signed_url_cache.get(path)
+        if cached:
+            signed[path] = cached
+        else:
+            to_sign.append(path)
+
+    for chunk in _chunks(to_sign, _SIGN_BATCH_SIZE):
+        try:
+            fresh = await _sign_batch(chunk)
+        except Exception as exc:  # signing failure shouldn't break the read path
+            logger.warning("Could not sign %d URL(s): %s", len(chunk), exc)
+            fresh = {}
+        for path in chunk:
+            url = fresh.get(path)
+            signed[path] = url
+            if url:
+                _signed_url_cache.set(path, url)
+    return signed
+
+
+async def _stream_file(file: UploadFile, filename: str) -> AsyncIterator[bytes]:
+    """Yield the upload in chunks, enforcing MAX_FILE_SIZE as bytes arrive.
+
+    Starlette has already spooled the multipart body (to disk past 1 MB), so
+    this only ever holds one chunk per file in memory. The size check matters
+    when the client sent no per-part size and ``file.size`` was unknown.
     """
-    unique = list({p for p in paths if p})
-    if not unique:
-        return {}
-    signed = await asyncio.gather(*[asyncio.to_thread(_sign, p) for p in unique])
-    return dict(zip(unique, signed))
-
-
-async def _upload_bytes(path: str, content: bytes, content_type: str) -> None:
-    """Upload raw bytes to the private bucket (supabase client is sync)."""
-    def _do_upload() -> Any:
-        return supabase_client.storage.from_(BUCKET).upload(
-            path=path,
-            file=content,
-            file_options={"content-type": content_type},
+    total = 0
+    while True:
+        chunk = await file.read(_UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File '{filename}' exceeds the 10MB limit",
+            )
+        yield chunk
+    if total == 0:
+        raise HTTPException(status_code=400, detail=f"File '{filename}' is empty")
+
+
+async def _upload_stream(
+    path: str,
+    body: AsyncIterator[bytes],
+    content_type: str,
+    size: Optional[int],
+) -> None:
+    """Stream an object into the private bucket (POST /object/<bucket>/<path>)."""
+    headers = {
+        "apikey": settings.SUPABASE_SERVICE_ROLE_KEY,
+        "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}",
+        "Content-Type": content_type,
+        "x-upsert": "false",
+    }
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    async with postgrest_client() as client:
+        response = await client.post(
+            f"{_STORAGE_URL}/object/{BUCKET}/{path}",
+            content=body,
+            headers=headers,
+            timeout=httpx.Timeout(_UPLOAD_TIMEOUT_SECONDS, connect=10.0),
         )
-
-    await asyncio.to_thread(_do_upload)
+    response.raise_for_status()
 
 
 async def remove_paths(paths: List[str]) -> None:
@@ -100,6 +203,8 @@ async def _remove_paths(paths: List[str]) -> None:
     """Best-effort removal of objects from Storage (used for cleanup)."""
     if not paths:
         return
+    for path in paths:
+        _signed_url_cache.invalidate(path)
 
     def _do_remove() -> Any:
         return supabase_client.storage.from_(BUCKET).remove(paths)
@@ -110,6 +215,54 @@ async def _remove_paths(paths: List[str]) -> None:
         logger.warning("Failed to remove storage objects %s: %s", paths, exc)
 
 
+def _validate_upload(file: UploadFile) -> str:
+    """Reject a file on what is known before reading it; return its type."""
+    if file.size == 0:
+        raise HTTPException(
+            status_code=400, detail=f"File '{file.filename}' is empty"
+        )
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File '{file.filename}' exceeds the 10MB limit",
+        )
+
+    content_type = file.content_type or "application/octet-stream"
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=(
+                f"Unsupported file type '{content_type}' for "
+                f"'{file.filename}'. Allowed: images and PDF."
+            ),
+        )
+    return content_type
+
+
+async def _upload_one(
+    file: UploadFile,
+    path: str,
+    content_type: str,
+    semaphore: asyncio.Semaphore,
+) -> float:
+    """Stream one file to Storage and return how long it took, in ms."""
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            await _upload_stream(
+                path, _stream_file(file, file.filename), content_type, file.size
+            )
+        except HTTPException:
+            raise
+        except Exception as exc:
+            logger.error("Storage upload failed for %s: %s", path, exc)
+            raise HTTPException(
+                status_code=502,
+                detail=f"Failed to upload '{file.filename}' to storage: {exc}",
+            )
+        return round((time.perf_counter() - started) * 1000, 1)
+
+
 async def upload_files_for_order(
     order_id: str,
     files: List[UploadFile],
@@ -118,55 +271,41 @@ async def upload_files_for_order(
 ) -> List[OrderFileOut]:
     """Upload one or more files into the order's folder and record them.
 
-    The bytes are validated (type/size), uploaded to `order-files/<order_id>/`,
-    and a metadata row is inserted per file. If the DB insert fails, the
-    just-uploaded objects are cleaned up so Storage doesn't drift from the DB.
+    Every file's type (and size, when the client declared it) is checked up
+    front, then the files are streamed to `order-files/<order_id>/` with at
+    most ORDER_FILE_UPLOAD_CONCURRENCY uploads in flight; size is enforced
+    again while streaming. A metadata row is inserted per file. It is all or
+    nothing: if any upload or the DB insert fails, every object this call
+    wrote is removed so Storage doesn't drift from the DB.
+
+    Each returned file carries `upload_ms`, the time its upload took.
     """
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
 
-    uploaded_paths: List[str] = []
-    records: List[Dict[str, Any]] = []
-
-    for file in files:
-        content = await file.read()
-        size = len(content)
-
-        if size == 0:
-            await _remove_paths(uploaded_paths)
-            raise HTTPException(
-                status_code=400, detail=f"File '{file.filename}' is empty"
-            )
-        if size > MAX_FILE_SIZE:
-            await _remove_paths(uploaded_paths)
-            raise HTTPException(
-                status_code=413,
-                detail=f"File '{file.filename}' exceeds the 10MB limit",
-            )
-
-        content_type = file.content_type or "application/octet-stream"
-        if content_type not in ALLOWED_CONTENT_TYPES:
-            await _remove_paths(uploaded_paths)
-            raise HTTPException(
-                status_code=415,
-                detail=(
-                    f"Unsupported file type '{content_type}' for "
-                    f"'{file.filename}'. Allowed: images and PDF."
-                ),
-            )
-
-        path = f"{order_id}/{uuid.uuid4().hex}-{_safe_filename(file.filename)}"
-        try:
-            await _upload_bytes(path, content, content_type)
-        except Exception as exc:
-            await _remove_paths(uploaded_paths)
-            logger.error("Storage upload failed for %s: %s", path, exc)
-            raise HTTPException(
-                status_code=502,
-                detail=f"Failed to upload '{file.filename}' to storage: {exc}",
-            )
-        uploaded_paths.append(path)
+    content_types = [_validate_upload(file) for file in files]
+    paths = [
+        f"{order_id}/{uuid.uuid4().hex}-{_safe_filename(file.filename)}"
+        for file in files
+    ]
+
+    semaphore = asyncio.Semaphore(max(1, settings.ORDER_FILE_UPLOAD_CONCURRENCY))
+    tasks = [
+        asyncio.create_task(_upload_one(file, path, content_type, semaphore))
+        for file, path, content_type in zip(files, paths, content_types)
+    ]
+    try:
+        timings = await asyncio.gather(*tasks)
+    except BaseException:
+        # First failure wins; stop the others, then clear whatever they wrote.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await _remove_paths(paths)
+        raise
 
+    records: List[Dict[str, Any]] = []
+    for path, content_type in zip(paths, content_types):
         record: Dict[str, Any] = {
             "order_id": str(order_id),
             "file_url": path,
@@ -183,11 +322,18 @@ async def upload_files_for_order(
         created = await repo.create_many(records)
     except HTTPException:
         # DB insert failed (e.g. unknown order_id) — undo the storage uploads.
-        await _remove_paths(uploaded_paths)
+        await _remove_paths(paths)
         raise
 
-    logger.info("Uploaded %d file(s) for order %s", len(created), order_id)
-    return await _sign_all(created)
+    logger.info(
+        "Uploaded %d file(s) for order %s in %s ms",
+        len(created), order_id, timings,
+    )
+    outs = await _sign_all(created)
+    upload_ms = dict(zip(paths, timings))
+    for out in outs:
+        out.upload_ms = upload_ms.get(out.file_url)
+    return outs
 
 
 async def list_files_for_order(order_id: str) -> List[OrderFileOut]:
@@ -1,29 +1,57 @@
+import base64
+import json
 import logging
-from typing import Any, Dict, List, Optional
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
 
+from core.etag import versioned_etag
 from repositories.orders import (
+    ORDER_VERSIONS_SELECT,
     CustomerRepository,
     VehicleRepository,
     OrderRepository,
+    order_select,
 )
 from repositories.order_files import OrderFileRepository
 from schemas.customer import CustomerCreate, CustomerOut, CustomerUpdate
 from schemas.vehicle import VehicleCreate, VehicleOut, VehicleUpdate
-from schemas.order import OrderCreate, OrderOut, OrderUpdate, OrderFullUpdate
-from services import order_files_service
+from schemas.order import (
+    OrderBulkStatusOut,
+    OrderBulkStatusUpdate,
+    OrderCreate,
+    OrderFullUpdate,
+    OrderOut,
+    OrderUpdate,
+)
+from schemas.order_status import OrderStatusOut
+from services import (
+    dashboard_service,
+    marketing_service,
+    order_files_service,
+    order_statuses_service,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _invalidate_metrics(organization_id: str) -> None:
+    """A status change moves dashboard and marketing counts; drop their caches."""
+    dashboard_service.invalidate_metrics(organization_id)
+    marketing_service.invalidate_metrics(organization_id)
+
+
 async def find_or_create_customer(
     organization_id: str,
     data: CustomerCreate,
 ) -> CustomerOut:
     """
-    Return an existing customer (matched by national_id within the
-    organization) or create a new one.
+    Return an existing customer (matched exactly by national_id within the
+    organization) or create a new one, in one race-free round trip (see
+    CustomerRepository.find_or_create).
 
     Args:
         organization_id: The organization the customer belongs to
@@ -32,27 +60,14 @@ async def find_or_create_customer(
     Returns:
         CustomerOut for the existing or newly created customer
     """
-    repo = CustomerRepository()
+    payload = data.model_dump(mode="json")
+    # A blank national_id identifies nobody; never match on it.
+    payload["national_id"] = (payload.get("national_id") or "").strip() or None
 
-    # 1. Try to find an existing customer by national_id within the org
-    if data.national_id:
-        matches = await repo.search_customers(
-            organization_id,
-            national_id=data.national_id,
-        )
-        if matches:
-            logger.info(
-                "Customer matched by national_id in org %s", organization_id
-            )
-            return CustomerOut.model_validate(matches[0])
-
-    # 2. Not found (or no national_id) -> create a new customer
-    created = await repo.create_customer(
-        organization_id,
-        data.model_dump(mode="json"),
-    )
-    logger.info("Customer created in org %s", organization_id)
-    return CustomerOut.model_validate(created)
+    repo = CustomerRepository()
+    customer = await repo.find_or_create(organization_id, payload)
+    logger.info("Customer %s found or created in org %s", customer["id"], organization_id)
+    return CustomerOut.model_validate(customer)
 
 
 async def update_customer(
@@ -84,7 +99,8 @@ async def find_or_create_vehicle(
 ) -> VehicleOut:
     """
     Return an existing vehicle (matched by plate within the organization)
-    or create a new one.
+    or create a new one, in one race-free round trip (see
+    VehicleRepository.find_or_create).
 
     If the vehicle already exists, the DB record is returned as-is — its
     make/model/year are treated as the source of truth even if they differ
@@ -98,20 +114,14 @@ async def find_or_create_vehicle(
         VehicleOut for the existing or newly created vehicle
     """
     repo = VehicleRepository()
-
-    # 1. Try to find an existing vehicle by plate within the org
-    existing = await repo.get_vehicle_by_plate(data.plate, organization_id)
-    if existing:
-        logger.info(
-            "Vehicle matched by plate %s in org %s", data.plate, organization_id
-        )
-        # 2. Return DB truth (make/model/year may differ from user input)
-        return VehicleOut.model_validate(existing)
-
-    # 3. Not found -> create a new vehicle
-    created = await repo.create_vehicle(data.model_dump(mode="json"))
-    logger.info("Vehicle created with plate %s in org %s", data.plate, organization_id)
-    return VehicleOut.model_validate(created)
+    vehicle = await repo.find_or_create(organization_id, data.model_dump(mode="json"))
+    logger.info(
+        "Vehicle %s found or created with plate %s in org %s",
+        vehicle["id"],
+        data.plate,
+        organization_id,
+    )
+    return VehicleOut.model_validate(vehicle)
 
 
 async def update_vehicle(
@@ -161,6 +171,9 @@ async def get_full_order_details(
     limit: int = 100,
     offset: int = 0,
     sign_urls: bool = True,
+    preset: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    include: Optional[List[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Return all orders with their customer, vehicle and files nested.
@@ -176,36 +189,216 @@ async def get_full_order_details(
         limit: Max number of orders to return
         offset: Pagination offset
         sign_urls: Whether to attach signed URLs to embedded files
+        preset, fields, include: Projection (see _projection); every column
+            and embed by default.
 
     Returns:
         A list of nested order dicts.
     """
+    select = _projection(preset, fields, include)
     repo = OrderRepository()
     orders = await repo.list_full_details(
         organization_id=organization_id,
         status=status,
         limit=limit,
         offset=offset,
+        select=select,
     )
 
     if sign_urls:
-        # Collect every file path across all orders and sign them in one
-        # concurrent batch, then map the signed URLs back onto each file.
-        paths = [
-            file["file_url"]
-            for order in orders
-            for file in (order.get("order_files") or [])
-            if file.get("file_url")
-        ]
-        signed = await order_files_service.sign_paths(paths)
-        for order in orders:
-            for file in order.get("order_files") or []:
-                file["signed_url"] = signed.get(file.get("file_url"))
+        await _attach_signed_urls(orders)
 
     logger.info("Returned full details for %d order(s)", len(orders))
     return orders
 
 
+async def get_full_order_details_page(
+    organization_id: Optional[str] = None,
+    status: Optional[List[str]] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sign_urls: bool = True,
+    preset: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    include: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    One page of get_full_order_details, paginated by keyset instead of offset.
+
+    Args:
+        organization_id: Optional org filter
+        status: Optional list of statuses to filter by (matches any in the list)
+        limit: Max number of orders in the page
+        cursor: `next_cursor` from the previous page; None for the first page
+        sign_urls: Whether to attach signed URLs to embedded files
+        preset, fields, include: Projection (see _projection)
+
+    Returns:
+        {"orders": [...], "next_cursor": str or None}; next_cursor is None on
+        the last page.
+
+    Raises:
+        HTTPException 400: the cursor is not one this endpoint issued, or the
+            projection names an unknown preset, field or include.
+    """
+    select = _projection(preset, fields, include)
+    repo = OrderRepository()
+    # One extra row tells whether another page exists without a count query.
+    orders = await repo.list_full_details(
+        organization_id=organization_id,
+        status=status,
+        limit=limit + 1,
+        after=_decode_cursor(cursor) if cursor else None,
+        select=select,
+    )
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = _encode_cursor(orders[-1])
+
+    if sign_urls:
+        await _attach_signed_urls(orders)
+
+    logger.info("Returned a page of full details for %d order(s)", len(orders))
+    return {"orders": orders, "next_cursor": next_cursor}
+
+
+async def full_order_details_etag(
+    organization_id: Optional[str] = None,
+    status: Optional[List[str]] = None,
+    limit: int = 100,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    paged: bool = False,
+    sign_urls: bool = True,
+    preset: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    include: Optional[List[str]] = None,
+) -> Optional[str]:
+    """
+    ETag of the get_full_order_details (or, with `paged`,
+    get_full_order_details_page) response for the same arguments, computed
+    from the listed orders' versions only: no embed tree, no signing.
+
+    Returns:
+        The strong ETag, or None while migration 011 is not applied.
+
+    Raises:
+        HTTPException 400: invalid cursor or projection, as the listing would.
+    """
+    select = _projection(preset, fields, include)
+    after = _decode_cursor(cursor) if cursor else None
+    repo = OrderRepository()
+
+    async def versions() -> List[Dict[str, Any]]:
+        return await repo.list_full_details(
+            organization_id=organization_id,
+            status=status,
+            # The page asks for one extra row, which decides next_cursor.
+            limit=limit + 1 if paged else limit,
+            offset=offset,
+            after=after,
+            select=ORDER_VERSIONS_SELECT,
+        )
+
+    return await versioned_etag(
+        versions,
+        "orders.page" if paged else "orders.list",
+        organization_id, status, limit, offset, cursor, select,
+        _signing_epoch(sign_urls),
+    )
+
+
+async def full_order_detail_etag(order_id: str, sign_urls: bool = True) -> Optional[str]:
+    """
+    ETag of the get_full_order_detail_by_id response, from the versions of
+    the order, its customer and its vehicle. The embedded users' names are
+    not versioned: renaming a user doesn't change the tag.
+
+    Returns:
+        The strong ETag, or None while migration 011 is not applied.
+
+    Raises:
+        HTTPException 404: the order doesn't exist.
+    """
+    repo = OrderRepository()
+
+    async def versions() -> Dict[str, Any]:
+        row = await repo.get_full_detail_by_id(order_id, select=ORDER_VERSIONS_SELECT)
+        if not row:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return row
+
+    return await versioned_etag(versions, "orders.detail", _signing_epoch(sign_urls))
+
+
+def _signing_epoch(sign_urls: bool) -> Optional[int]:
+    """
+    Part of the ETag of responses that carry signed URLs.
+
+    A 304 lets the client keep the URLs it already has, so the tag has to
+    change before they expire. A response's URLs have at least
+    SIGNED_URL_SAFETY_MARGIN_SECONDS left when it is built, and the tag
+    turns over every half of that margin.
+    """
+    if not sign_urls:
+        return None
+    window = order_files_service.SIGNED_URL_SAFETY_MARGIN_SECONDS // 2
+    return int(time.time() // window)
+
+
+def _projection(
+    preset: Optional[str],
+    fields: Optional[List[str]],
+    include: Optional[List[str]],
+) -> str:
+    """
+    Validated select for the listings: a named preset (detail, kanban,
+    export) optionally overridden by explicit order `fields` and embeds to
+    `include` (see repositories.orders.order_select).
+
+    Raises:
+        HTTPException 400: unknown preset, field or include.
+    """
+    try:
+        return order_select(preset, fields, include)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _encode_cursor(order: Dict[str, Any]) -> str:
+    """Opaque cursor for the page after `order`: its (date_order, id)."""
+    raw = json.dumps([order.get("date_order"), str(order["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[Optional[str], str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date_order, order_id = json.loads(raw)
+        uuid.UUID(order_id)
+        if date_order is not None:
+            datetime.fromisoformat(date_order)
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return date_order, order_id
+
+
+async def _attach_signed_urls(orders: List[Dict[str, Any]]) -> None:
+    # Collect every file path across all orders and sign them in one
+    # concurrent batch, then map the signed URLs back onto each file.
+    paths = [
+        file["file_url"]
+        for order in orders
+        for file in (order.get("order_files") or [])
+        if file.get("file_url")
+    ]
+    signed = await order_files_service.sign_paths(paths)
+    for order in orders:
+        for file in order.get("order_files") or []:
+            file["signed_url"] = signed.get(file.get("file_url"))
+
+
 async def get_full_order_detail_by_id(
     order_id: str,
     sign_urls: bool = True,
@@ -233,38 +426,23 @@ async def update_full_order_detail(
     data: OrderFullUpdate,
 ) -> Dict[str, Any]:
     repo = OrderRepository()
-    current_order: Optional[Dict[str, Any]] = None
 
     if data.order:
         payload = data.order.model_dump(mode="json", exclude_unset=True)
-        if payload:
-            new_status = payload.get("order_status")
-            if new_status:
-                current_order = await repo.get_full_detail_by_id(order_id)
-                if not current_order:
-                    raise HTTPException(status_code=404, detail="Order not found")
-
+        if payload.get("order_status"):
+            await _transition(repo, order_id, payload)
+        elif payload:
             updated = await repo.update_order(order_id, payload)
             if not updated:
                 raise HTTPException(status_code=404, detail="Order not found")
 
-            if new_status and current_order:
-                print("hey time to change your history:", current_order)
-                from_status = current_order.get("order_status")
-                if from_status != new_status:
-                    await repo.create_status_history({
-                        "order_id": str(order_id),
-                        "organization_id": str(current_order["organization_id"]),
-                        "status_type": "workshop",
-                        "from_status": from_status,
-                        "to_status": new_status,
-                    })
-
     if data.customer or data.vehicle:
-        if current_order is None:
-            current_order = await repo.get_full_detail_by_id(order_id)
-            if not current_order:
-                raise HTTPException(status_code=404, detail="Order not found")
+        # Only the related ids are needed, not the whole embed tree.
+        current_order = await repo.get_full_detail_by_id(
+            order_id, select="id,customer:customers(id),vehicle:vehicles(id)"
+        )
+        if not current_order:
+            raise HTTPException(status_code=404, detail="Order not found")
 
         if data.customer:
             customer_id = (current_order.get("customer") or {}).get("id")
@@ -281,13 +459,71 @@ async def update_full_order_detail(
     return await get_full_order_detail_by_id(order_id)
 
 
-async def update_order(order_id: str, data: OrderUpdate) -> OrderOut:
+async def get_order_status(order_id: str) -> str:
+    """
+    The current order_status of an order, read without its embeds.
+
+    Raises:
+        HTTPException 404: the order doesn't exist.
+    """
+    current = await OrderRepository().get_status(str(order_id))
+    if not current:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return current["order_status"]
+
+
+async def _catalog_status(code: str) -> OrderStatusOut:
+    """
+    The order_statuses catalog entry for `code`.
+
+    Raises:
+        HTTPException 422: `code` is not in the catalog.
+    """
+    try:
+        return await order_statuses_service.get_status_by_code(code)
+    except HTTPException as exc:
+        if exc.status_code != 404:
+            raise
+        raise HTTPException(status_code=422, detail=f"Unknown order status '{code}'")
+
+
+async def _transition(
+    repo: OrderRepository,
+    order_id: str,
+    payload: Dict[str, Any],
+    expected_status: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Apply `payload` and record the status change atomically (see
+    OrderRepository.transition_status); returns the updated order.
+
+    Raises:
+        HTTPException 404: the order doesn't exist.
+        HTTPException 409: the order is not in `expected_status`.
+        HTTPException 422: the target status is not in the catalog.
+    """
+    result = await repo.transition_status(str(order_id), payload, expected_status=expected_status)
+    if not result:
+        raise HTTPException(status_code=404, detail="Order not found")
+    order = result["order"]
+    if order.get("order_status") != result.get("from_status"):
+        _invalidate_metrics(str(order["organization_id"]))
+    return order
+
+
+async def update_order(
+    order_id: str,
+    data: OrderUpdate,
+    expected_status: Optional[str] = None,
+) -> OrderOut:
     """
     Apply a partial update to an order and return the updated record.
 
     Only the fields explicitly sent are written (so omitted fields keep
     their current value). Raises 404 if the order doesn't exist.
-    When `status` is included, a row is inserted into order_status_history.
+    When `order_status` changes, a row is inserted into order_status_history
+    in the same transaction. With `expected_status`, nothing is written and
+    409 is raised unless the order is currently in that status.
     """
     payload = data.model_dump(mode="json", exclude_unset=True)
     if not payload:
@@ -295,32 +531,58 @@ async def update_order(order_id: str, data: OrderUpdate) -> OrderOut:
 
     repo = OrderRepository()
 
-    new_status = payload.get("status")
-    current_order = None
-    if new_status:
-        current_order = await repo.get_full_detail_by_id(str(order_id))
-        if not current_order:
+    if payload.get("order_status") or expected_status is not None:
+        updated = await _transition(repo, str(order_id), payload, expected_status)
+    else:
+        updated = await repo.update_order(str(order_id), payload)
+        if not updated:
             raise HTTPException(status_code=404, detail="Order not found")
 
-    updated = await repo.update_order(str(order_id), payload)
-    if not updated:
-        raise HTTPException(status_code=404, detail="Order not found")
-
-    if new_status and current_order:
-        from_status = current_order.get("order_status")
-        if from_status != new_status:
-            await repo.create_status_history({
-                "order_id": str(order_id),
-                "organization_id": str(current_order["organization_id"]),
-                "status_type": "workshop",
-                "from_status": from_status,
-                "to_status": new_status,
-            })
-
     logger.info("Order %s updated (%s)", order_id, ", ".join(payload.keys()))
     return OrderOut.model_validate(updated)
 
 
+async def bulk_update_status(data: OrderBulkStatusUpdate) -> OrderBulkStatusOut:
+    """
+    Move many orders to one status with their history rows (see
+    OrderRepository.bulk_transition_status) and report each order's outcome.
+
+    Raises:
+        HTTPException 422: the target status is not in the order_statuses
+            catalog.
+    """
+    status = await _catalog_status(data.order_status)
+
+    order_ids = [str(order_id) for order_id in dict.fromkeys(data.order_ids)]
+    repo = OrderRepository()
+    rows = await repo.bulk_transition_status(
+        order_ids,
+        data.order_status,
+        organization_id=str(data.organization_id) if data.organization_id else None,
+        changed_by=str(data.changed_by) if data.changed_by else None,
+        status_type=status.status_type,
+    )
+
+    by_id = {row["order_id"]: row for row in rows}
+    results = [
+        by_id.get(order_id, {"order_id": order_id, "outcome": "not_found"})
+        for order_id in order_ids
+    ]
+    updated = [row for row in rows if row["outcome"] == "updated"]
+    for organization_id in {row["organization_id"] for row in updated}:
+        _invalidate_metrics(organization_id)
+
+    logger.info(
+        "Bulk status %s: %d of %d order(s) updated",
+        data.order_status,
+        len(updated),
+        len(order_ids),
+    )
+    return OrderBulkStatusOut(
+        order_status=data.order_status, updated=len(updated), results=results
+    )
+
+
 async def delete_order(order_id: str) -> None:
     """
     Delete an order and clean up its Storage files.
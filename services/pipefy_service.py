@@ -13,7 +13,7 @@ from schemas.webhook import (
     FieldData
 )
 from core.config import settings
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import json
 import asyncio
 from services.attachment_service import fetch_and_store_attachment
@@ -193,11 +193,48 @@ async def update_event_actions_by_card_id(
     # Update the actions
     return await update_event_actions(event_id, actions_taken)
 
-async def process_card_details(card_id: str):
+async def fetch_connected_cards(
+    pipefy_repo: PipeFyDataRepository,
+    field_to_value: Dict[str, Any],
+) -> Tuple[Optional[dict], Optional[dict]]:
+    """
+    Fetch the customer (`nombre`) and vehicle (`auto_a_recibit`) cards a
+    card points to. Both are served from the connected-card cache when
+    possible; the misses are started together so the repository's batcher
+    sends them as one GraphQL query. A failed lookup yields None.
+    """
+    lookups = {
+        key: str(field_to_value[key])
+        for key in ("nombre", "auto_a_recibit")
+        if key in field_to_value
+    }
+    results = await asyncio.gather(
+        *(pipefy_repo.get_card_details(card_id, use_cache=True) for card_id in lookups.values()),
+        return_exceptions=True,
+    )
+    connected: Dict[str, Optional[dict]] = {}
+    for key, result in zip(lookups, results):
+        if isinstance(result, Exception):
+            print(f"Warning: Could not fetch {key} card: {str(result)}")
+            result = None
+        connected[key] = result
+    return connected.get("nombre"), connected.get("auto_a_recibit")
+
+
+async def _card_attachments(card_id: str, card_data: dict) -> List[str]:
+    pipefy_urls, filenames = extract_attachment_urls(card_data.get("fields", []))
+    if not pipefy_urls:
+        return []
+    print(f"Found {len(pipefy_urls)} attachments for card {card_id}")
+    return await process_card_attachments(card_id, pipefy_urls, filenames)
+
+
+async def process_card_details(card_id: str, pipefy_repo: Optional[PipeFyDataRepository] = None):
      # Placeholder for processing card details
 
-    # Initialize repository
-    pipefy_repo = PipeFyDataRepository(settings.PIPEFY_API_TOKEN)
+    # Initialize repository (callers syncing many cards pass a shared one so
+    # lookups from concurrent cards are batched together)
+    pipefy_repo = pipefy_repo or PipeFyDataRepository(settings.PIPEFY_API_TOKEN)
 
     # Get card details
     card_data = await pipefy_repo.get_card_details(card_id)
@@ -210,29 +247,11 @@ async def process_card_details(card_id: str):
 
     print("Field to Value Mapping:", field_to_value)  # Debugging output
 
-    # Extract and process attachments
-    pipefy_urls, filenames = extract_attachment_urls(card_data.get("fields", []))
-    attachment_urls = []
-    if pipefy_urls:
-        print(f"Found {len(pipefy_urls)} attachments for card {card_id}")
-        attachment_urls = await process_card_attachments(card_id, pipefy_urls, filenames)
-
-    # Fetch nested cards with error handling
-    user_data = None
-    user_car_information = None
-
-    if "nombre" in field_to_value:
-        try:
-            user_data = await pipefy_repo.get_card_details(str(field_to_value.get("nombre")))
-            print(f"Fetched user_data: {user_data}")  # Debugging output
-        except Exception as e:
-            print(f"Warning: Could not fetch user_data card: {str(e)}")
-
-    if "auto_a_recibit" in field_to_value:
-        try:
-            user_car_information = await pipefy_repo.get_card_details(str(field_to_value.get("auto_a_recibit")))
-        except Exception as e:
-            print(f"Warning: Could not fetch user_car_information card: {str(e)}")
+    # Process attachments and fetch the nested cards concurrently
+    attachment_urls, (user_data, user_car_information) = await asyncio.gather(
+        _card_attachments(card_id, card_data),
+        fetch_connected_cards(pipefy_repo, field_to_value),
+    )
 
 
     # Create CardData instance with proper typing
@@ -269,14 +288,14 @@ async def process_card_details(card_id: str):
     return {"card_id": card_id, "details": card_to_save.model_dump(), "event": data}
 
 
-async def process_card_details_backup(card_id: str):
+async def process_card_details_backup(card_id: str, pipefy_repo: Optional[PipeFyDataRepository] = None):
     """
     Process card details and save to pipefy_events_backup table
     Similar to process_card_details but saves to backup table without any filtering
     """
 
     # Initialize repository
-    pipefy_repo = PipeFyDataRepository(settings.PIPEFY_API_TOKEN)
+    pipefy_repo = pipefy_repo or PipeFyDataRepository(settings.PIPEFY_API_TOKEN)
 
     # Get card details
     card_data = await pipefy_repo.get_card_details(card_id)
@@ -289,29 +308,11 @@ async def process_card_details_backup(card_id: str):
 
     print("Field to Value Mapping (backup):", field_to_value)  # Debugging output
 
-    # Extract and process attachments
-    pipefy_urls, filenames = extract_attachment_urls(card_data.get("fields", []))
-    attachment_urls = []
-    if pipefy_urls:
-        print(f"Found {len(pipefy_urls)} attachments for backup card {card_id}")
-        attachment_urls = await process_card_attachments(card_id, pipefy_urls, filenames)
-
-    # Fetch nested cards with error handling
-    user_data = None
-    user_car_information = None
-
-    if "nombre" in field_to_value:
-        try:
-            user_data = await pipefy_repo.get_card_details(str(field_to_value.get("nombre")))
-            print(f"Fetched user_data for backup: {user_data}")  # Debugging output
-        except Exception as e:
-            print(f"Warning: Could not fetch user_data card for backup: {str(e)}")
-
-    if "auto_a_recibit" in field_to_value:
-        try:
-            user_car_information = await pipefy_repo.get_card_details(str(field_to_value.get("auto_a_recibit")))
-        except Exception as e:
-            print(f"Warning: Could not fetch user_car_information card for backup: {str(e)}")
+    # Process attachments and fetch the nested cards concurrently
+    attachment_urls, (user_data, user_car_information) = await asyncio.gather(
+        _card_attachments(card_id, card_data),
+        fetch_connected_cards(pipefy_repo, field_to_value),
+    )
 
 
     # Create CardData instance with proper typing
@@ -0,0 +1,170 @@
+"""
+Worker pool for Pipefy phase sync and backup.
+
+Each card costs several GraphQL calls plus attachment downloads, so syncing a
+phase one card at a time is dominated by round-trip latency. CardSyncPool
+runs a fixed number of workers over a queue of card IDs; Pipefy's request
+rate is enforced separately by the shared limiter in repositories/pipefy_data,
+so adding workers raises throughput without risking 429s.
+
+Progress for every run is kept in memory (per worker process) and exposed by
+GET /api/pipefy/sync-progress.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MAX_TRACKED_RUNS = 50
+
+
+@dataclass
+class SyncProgress:
+    """Live counters for one sync/backup run."""
+
+    sync_id: str
+    kind: str
+    phase_id: str
+    workers: int
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    last_card_id: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    card_ms: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        end = self.finished_at or time.time()
+        data["elapsed_seconds"] = round(end - self.started_at, 3)
+        return data
+
+
+_runs: "OrderedDict[str, SyncProgress]" = OrderedDict()
+
+
+def _track(progress: SyncProgress) -> None:
+    _runs[progress.sync_id] = progress
+    while len(_runs) > _MAX_TRACKED_RUNS:
+        _runs.popitem(last=False)
+
+
+def list_progress() -> List[Dict[str, Any]]:
+    """Recent runs on this worker, newest first."""
+    return [run.as_dict() for run in reversed(_runs.values())]
+
+
+def get_progress(sync_id: str) -> Optional[Dict[str, Any]]:
+    run = _runs.get(sync_id)
+    return run.as_dict() if run else None
+
+
+class CardSyncPool:
+    """
+    Process card IDs with at most ``workers`` in flight.
+
+    Usage:
+        async with CardSyncPool(process_card_details, kind="sync", phase_id=pid) as pool:
+            for card in cards:
+                pool.submit(card["id"])
+        pool.progress.done, pool.progress.errors  # after the block
+
+    Cards may be submitted while earlier ones are processing (the backup
+    endpoint feeds each page as it arrives). Leaving the block waits for the
+    queue to drain. A failing card is logged and recorded; it never stops
+    the other workers.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[str], Awaitable[Any]],
+        kind: str,
+        phase_id: str,
+        workers: Optional[int] = None,
+    ):
+        self._process = process
+        self._workers = max(1, workers or settings.PIPEFY_SYNC_WORKERS)
+        self._queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self.progress = SyncProgress(
+            sync_id=uuid.uuid4().hex,
+            kind=kind,
+            phase_id=phase_id,
+            workers=self._workers,
+        )
+
+    async def __aenter__(self) -> "CardSyncPool":
+        _track(self.progress)
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self._workers)
+        ]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            for task in self._tasks:
+                task.cancel()
+        else:
+            for _ in self._tasks:
+                self._queue.put_nowait(None)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.progress.finished_at = time.time()
+        progress = self.progress
+        logger.info(
+            f"Pipefy {progress.kind} {progress.sync_id} for phase {progress.phase_id}: "
+            f"{progress.done}/{progress.total} cards ok, {progress.failed} failed "
+            f"in {progress.finished_at - progress.started_at:.1f}s "
+            f"with {progress.workers} workers"
+        )
+
+    def submit(self, card_id: str) -> None:
+        self.progress.total += 1
+        self._queue.put_nowait(card_id)
+
+    async def _worker(self) -> None:
+        progress = self.progress
+        while True:
+            card_id = await self._queue.get()
+            if card_id is None:
+                return
+            progress.in_flight += 1
+            started = time.perf_counter()
+            try:
+                await self._process(card_id)
+                progress.done += 1
+                logger.info(
+                    f"Processed card {card_id} "
+                    f"({progress.done + progress.failed}/{progress.total})"
+                )
+            except Exception as e:
+                progress.failed += 1
+                progress.errors[card_id] = str(e)
+                logger.error(f"Error processing card {card_id}: {str(e)}", exc_info=True)
+            finally:
+                progress.in_flight -= 1
+                progress.last_card_id = card_id
+                progress.card_ms[card_id] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def run_card_sync(
+    card_ids: List[str],
+    process: Callable[[str], Awaitable[Any]],
+    kind: str,
+    phase_id: str,
+    workers: Optional[int] = None,
+) -> SyncProgress:
+    """Process a fixed list of card IDs through a CardSyncPool."""
+    async with CardSyncPool(process, kind=kind, phase_id=phase_id, workers=workers) as pool:
+        for card_id in card_ids:
+            pool.submit(card_id)
+    return pool.progress
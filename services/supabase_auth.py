@@ -1,7 +1,14 @@
-from typing import Optional
-import httpx
+import copy
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
 from fastapi import HTTPException
 from core.config import settings
+from core.http_pool import postgrest_client
+from core.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
 
 SUPABASE_HEADERS = {
@@ -14,7 +21,7 @@ SUPABASE_HEADERS = {
 async def supabase_password_login(email: str, password: str) -> dict:
     """Authenticate user with email/password via Supabase Auth."""
     try:
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             resp = await client.post(
                 f"{settings.SUPABASE_URL}/auth/v1/token?grant_type=password",
                 headers={
@@ -49,7 +56,7 @@ async def supabase_register_user(
     insert a row into app_users with the metadata provided here.
     """
     try:
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             resp = await client.post(
                 f"{settings.SUPABASE_URL}/auth/v1/admin/users",
                 headers=SUPABASE_HEADERS,
@@ -93,7 +100,7 @@ async def supabase_get_user_from_token(token: str) -> dict:
     Validates a Supabase JWT and returns the auth user payload.
     """
     try:
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             resp = await client.get(
                 f"{settings.SUPABASE_URL}/auth/v1/user",
                 headers={
@@ -113,13 +120,117 @@ async def supabase_get_user_from_token(token: str) -> dict:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ---------------------------------------------------------------------------
+# Local token verification
+# ---------------------------------------------------------------------------
+# Supabase signs access tokens either with the project's shared JWT secret
+# (HS256) or with an asymmetric key published at the project's JWKS endpoint.
+# Verifying here saves the GET /auth/v1/user round trip on every request. The
+# trade-off: a session revoked server-side stays usable until the token's
+# `exp` (Supabase's default is one hour), exactly like any stateless JWT.
+_ASYMMETRIC_ALGORITHMS = {"RS256", "ES256", "EdDSA"}
+_JWKS_TTL_SECONDS = 600
+_JWKS_RETRY_SECONDS = 60
+
+_jwks_cache: TTLCache[Dict[str, dict]] = TTLCache(
+    ttl=_JWKS_TTL_SECONDS, max_entries=1, name="jwks"
+)
+
+
+async def _jwks_keys() -> Dict[str, dict]:
+    """The project's published signing keys by `kid` (cached, {} on failure)."""
+    keys = _jwks_cache.get("jwks")
+    if keys is not None:
+        return keys
+    try:
+        async with postgrest_client() as client:
+            resp = await client.get(
+                f"{settings.SUPABASE_URL}/auth/v1/.well-known/jwks.json",
+                headers={"apikey": settings.SUPABASE_SERVICE_ROLE_KEY},
+            )
+        resp.raise_for_status()
+        keys = {k["kid"]: k for k in resp.json().get("keys", []) if k.get("kid")}
+        _jwks_cache.set("jwks", keys)
+    except Exception as exc:
+        # Remember the miss briefly so an Auth outage doesn't add a JWKS
+        # request to every authenticated call.
+        logger.warning("Could not fetch Supabase JWKS: %s", exc)
+        keys = {}
+        _jwks_cache.set("jwks", keys, ttl=_JWKS_RETRY_SECONDS)
+    return keys
+
+
+async def _verification_key(token: str) -> Optional[Tuple[Any, str]]:
+    """(key, algorithm) able to verify `token`, or None when we have none."""
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+    if algorithm == "HS256":
+        if not settings.SUPABASE_JWT_SECRET:
+            return None
+        return settings.SUPABASE_JWT_SECRET, algorithm
+    if algorithm in _ASYMMETRIC_ALGORITHMS and header.get("kid"):
+        jwk = (await _jwks_keys()).get(header["kid"])
+        if jwk is None:
+            return None
+        try:
+            return jwt.PyJWK(jwk, algorithm=algorithm).key, algorithm
+        except jwt.PyJWTError as exc:  # e.g. `cryptography` is not installed
+            logger.warning("Cannot use JWKS key %s locally: %s", header["kid"], exc)
+            return None
+    return None
+
+
+async def verify_token_locally(token: str) -> Optional[dict]:
+    """
+    Verify a Supabase access token's signature, expiry and audience in-process.
+
+    Returns:
+        The token's claims when verified, or None when no local key can check
+        it (no JWT secret configured, unknown `kid`, unsupported algorithm) --
+        the caller should then fall back to supabase_get_user_from_token.
+
+    Raises:
+        HTTPException: 401 when the token is malformed, expired or forged.
+    """
+    try:
+        resolved = await _verification_key(token)
+    except jwt.PyJWTError as exc:
+        raise HTTPException(status_code=401, detail=f"Invalid token: {exc}")
+    if resolved is None:
+        return None
+
+    key, algorithm = resolved
+    try:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=settings.SUPABASE_JWT_AUDIENCE,
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except jwt.PyJWTError as exc:
+        raise HTTPException(status_code=401, detail=f"Invalid token: {exc}")
+
+
+# ---------------------------------------------------------------------------
+# app_users lookup (+ per-worker cache)
+# ---------------------------------------------------------------------------
+_app_user_cache: TTLCache[dict] = TTLCache(
+    ttl=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    name="app_users",
+)
+
+
 async def get_app_user_with_org(user_id: str) -> Optional[dict]:
     """
     Fetch the app_users record joined with organization data.
     Uses the service role key so RLS doesn't block the query.
     """
     try:
-        async with httpx.AsyncClient() as client:
+        async with postgrest_client() as client:
             resp = await client.get(
                 f"{settings.SUPABASE_URL}/rest/v1/app_users",
                 headers=SUPABASE_HEADERS,
@@ -136,4 +247,34 @@ async def get_app_user_with_org(user_id: str) -> Optional[dict]:
         return data[0] if data else None
 
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+
+async def get_cached_app_user_with_org(user_id: str) -> Optional[dict]:
+    """
+    get_app_user_with_org behind a short per-worker TTL cache.
+
+    Misses (no app_users row yet, or a failed lookup) are not cached, so a row
+    created by the signup trigger is picked up on the next request. Callers
+    get a copy and may mutate it freely.
+    """
+    cached = _app_user_cache.get(user_id)
+    if cached is None:
+        cached = await get_app_user_with_org(user_id)
+        if not cached:
+            return None
+        _app_user_cache.set(user_id, cached)
+    return copy.deepcopy(cached)
+
+
+def invalidate_app_user(user_id: Optional[str] = None) -> None:
+    """Drop one user's cached profile, or every cached profile when None.
+
+    Call after anything that changes an app_users row or its organization
+    (role, org membership, name) so the change is visible immediately rather
+    than after AUTH_USER_CACHE_TTL_SECONDS.
+    """
+    if user_id is None:
+        _app_user_cache.clear()
+    else:
+        _app_user_cache.invalidate(user_id)
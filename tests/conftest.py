@@ -0,0 +1,30 @@
+"""Shared test fixtures."""
+
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+
+@pytest.fixture
+def mock_http(monkeypatch):
+    """
+    Route the pooled HTTP client of one or more modules to a handler.
+
+    ``mock_http(handler, module, ...)`` replaces each module's
+    ``postgrest_client`` (or ``attribute``) with a context manager yielding an
+    ``httpx.AsyncClient`` over ``httpx.MockTransport(handler)``, so every
+    request the code under test makes is answered by ``handler``.
+    """
+
+    def install(handler, *modules, attribute="postgrest_client"):
+        @asynccontextmanager
+        async def fake_client():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                yield client
+
+        for module in modules:
+            monkeypatch.setattr(module, attribute, fake_client)
+        return fake_client
+
+    return install
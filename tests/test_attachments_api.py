@@ -0,0 +1,148 @@
+"""API tests for GET /api/attachments/download (the streaming proxy).
+
+Pipefy storage is an httpx.MockTransport behind a real HttpPool, and the
+worker's byte budget is replaced per test so the cap can be asserted.
+"""
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import api.v1.endpoints.attachments as attachments_endpoint
+import services.attachment_proxy as attachment_proxy
+from api.deps import get_current_user
+from core.byte_budget import ByteBudget
+from core.http_pool import HttpPool, PoolConfig
+
+FILE_URL = "https://app.pipefy.com/storage/v1/signed/uploads/abc/factura.pdf?sig=1"
+BODY = bytes(range(256)) * 40  # 10 KiB
+
+app = FastAPI()
+app.include_router(attachments_endpoint.router, prefix="/api/attachments")
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def _auth_override():
+    app.dependency_overrides[get_current_user] = lambda: {"id": "user-1"}
+    yield
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    budget = ByteBudget(4096)
+    monkeypatch.setattr(attachment_proxy, "_budget", budget)
+    monkeypatch.setattr(attachment_proxy.settings, "ATTACHMENT_PROXY_CHUNK_SIZE", 1024)
+    monkeypatch.setattr(attachment_proxy.settings, "ATTACHMENT_PROXY_WAIT_SECONDS", 0.05)
+    return budget
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Serve BODY from a fake Pipefy storage; records what it was asked."""
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        headers = {"content-type": "application/pdf", "accept-ranges": "bytes", "etag": '"v1"'}
+        range_header = request.headers.get("range")
+        if range_header:
+            start, end = (int(x) for x in range_header.removeprefix("bytes=").split("-"))
+            if start >= len(BODY):
+                return httpx.Response(416, headers={"content-range": f"bytes */{len(BODY)}"})
+            part = BODY[start : end + 1]
+            headers["content-range"] = f"bytes {start}-{start + len(part) - 1}/{len(BODY)}"
+            return httpx.Response(206, headers=headers, content=part)
+        if "missing" in str(request.url):
+            return httpx.Response(404)
+        return httpx.Response(200, headers=headers, content=BODY)
+
+    pool = HttpPool("attachments-test", PoolConfig(), transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(attachment_proxy, "attachments_client", pool.session)
+    return seen
+
+
+def test_streams_the_full_file_with_upstream_headers(budget, upstream):
+    response = client.get("/api/attachments/download", params={"url": FILE_URL})
+
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["content-length"] == str(len(BODY))
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"] == '"v1"'
+    assert 'filename="factura.pdf"' in response.headers["content-disposition"]
+    assert upstream[0].headers["accept-encoding"] == "identity"
+    assert budget.stats()["in_use"] == 0
+    assert budget.stats()["peak_in_use"] <= 1024
+
+
+def test_range_is_forwarded_and_partial_content_passed_through(budget, upstream):
+    response = client.get(
+        "/api/attachments/download",
+        params={"url": FILE_URL},
+        headers={"Range": "bytes=100-199", "If-Range": '"v1"'},
+    )
+
+    assert response.status_code == 206
+    assert response.content == BODY[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(BODY)}"
+    assert upstream[0].headers["range"] == "bytes=100-199"
+    assert upstream[0].headers["if-range"] == '"v1"'
+
+
+def test_unsatisfiable_range_is_passed_through(budget, upstream):
+    response = client.get(
+        "/api/attachments/download",
+        params={"url": FILE_URL},
+        headers={"Range": f"bytes={len(BODY)}-{len(BODY) + 10}"},
+    )
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(BODY)}"
+
+
+def test_upstream_error_is_a_502_and_releases_budget(budget, upstream):
+    response = client.get(
+        "/api/attachments/download",
+        params={"url": "https://app.pipefy.com/storage/v1/signed/uploads/abc/missing.pdf"},
+    )
+
+    assert response.status_code == 502
+    assert budget.stats()["in_use"] == 0
+
+
+def test_exhausted_budget_refuses_with_503(budget, upstream):
+    budget._take(budget.capacity)  # every byte held by other downloads
+
+    response = client.get("/api/attachments/download", params={"url": FILE_URL})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert upstream == []
+    assert budget.stats()["rejected"] == 1
+
+
+def test_non_pipefy_url_is_rejected(budget, upstream):
+    response = client.get("/api/attachments/download", params={"url": "https://evil.test/x"})
+
+    assert response.status_code == 400
+    assert upstream == []
+
+
+async def test_unsent_body_is_released_by_the_background_task(budget, upstream):
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+
+    response = await attachments_endpoint.download_attachment(
+        request, url=FILE_URL, current_user={"id": "user-1"}
+    )
+    assert budget.stats()["in_use"] == 1024
+
+    await response.background()
+    await response.background()
+
+    assert budget.stats()["in_use"] == 0
+    assert [chunk async for chunk in response.body_iterator] == []
+    assert budget.stats()["in_use"] == 0
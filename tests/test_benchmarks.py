@@ -0,0 +1,51 @@
+"""Tests for the offline benchmark harness (benchmarks/).
+
+A tiny run against the fakes doubles as an end-to-end check that every hot
+endpoint still works when its upstreams answer like the real ones.
+"""
+
+from benchmarks.run import Options, Result, SCENARIOS, percentile, regressions, run_benchmark
+
+
+def _result(name, p95, upstream):
+    return Result(name, 10, 0, 1.0, p95, p95, 1.0, p95, upstream)
+
+
+def test_percentile_is_nearest_rank():
+    samples = [float(n) for n in range(1, 101)]
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 95) == 95.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_regressions_flags_latency_and_upstream_growth_past_threshold():
+    baseline = {"results": [
+        {"name": "orders", "p95_ms": 100.0, "upstream_per_request": 2.0},
+        {"name": "dashboard", "p95_ms": 50.0, "upstream_per_request": 1.0},
+    ]}
+    results = [
+        _result("orders", 115.0, 3.0),     # calls +50%
+        _result("dashboard", 70.0, 1.0),   # p95 +40%
+        _result("citas", 999.0, 9.0),      # not in the baseline
+    ]
+
+    assert regressions(results, baseline, max_regression=0.2) == [
+        "orders: upstream_per_request 2.0 -> 3.0",
+        "dashboard: p95_ms 50.0 -> 70.0",
+    ]
+
+
+async def test_every_scenario_succeeds_against_the_fakes():
+    results = await run_benchmark(Options(
+        requests=2, concurrency=2, warmup=0, latency_ms=0, jitter_ms=0, orders=10, cards=4,
+    ))
+
+    assert [r.name for r in results] == SCENARIOS
+    assert all(r.errors == 0 for r in results), results
+    by_name = {r.name: r for r in results}
+    # Per request: the ETag versions query, then the listing.
+    assert by_name["orders"].upstream_calls["postgrest GET orders"] == 2 * 2
+    assert by_name["send_ws_message"].upstream_calls["whapi POST messages/text"] == 2
+    assert by_name["pipefy_sync"].upstream_calls["postgrest POST pipefy_events"] == 2 * 4
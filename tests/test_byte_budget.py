@@ -0,0 +1,65 @@
+"""Tests for the per-worker byte budget (core/byte_budget.py)."""
+
+import asyncio
+
+import pytest
+
+from core.byte_budget import ByteBudget
+
+
+async def test_acquire_and_release_track_usage():
+    budget = ByteBudget(100)
+
+    assert await budget.acquire(60) == 60
+    assert budget.stats()["in_use"] == 60
+    budget.release(60)
+
+    stats = budget.stats()
+    assert stats["in_use"] == 0
+    assert stats["peak_in_use"] == 60
+
+
+async def test_oversized_request_is_clamped_to_capacity():
+    budget = ByteBudget(100)
+
+    assert await budget.acquire(10_000) == 100
+
+
+async def test_waiters_are_served_in_fifo_order():
+    budget = ByteBudget(100)
+    await budget.acquire(100)
+    order = []
+
+    async def take(name, nbytes):
+        await budget.acquire(nbytes)
+        order.append(name)
+
+    big = asyncio.create_task(take("big", 80))
+    await asyncio.sleep(0)
+    small = asyncio.create_task(take("small", 10))
+    await asyncio.sleep(0)
+
+    budget.release(100)
+    await asyncio.gather(big, small)
+
+    assert order == ["big", "small"]
+    assert budget.stats()["in_use"] == 90
+
+
+async def test_timeout_leaves_nothing_held_and_counts_rejection():
+    budget = ByteBudget(100)
+    await budget.acquire(100)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await budget.acquire(10, timeout=0.01)
+
+    budget.release(100)
+    stats = budget.stats()
+    assert stats["in_use"] == 0
+    assert stats["waiting"] == 0
+    assert stats["rejected"] == 1
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        ByteBudget(0)
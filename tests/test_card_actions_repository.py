@@ -0,0 +1,100 @@
+"""Tests for the card_actions membership checks (repositories/card_actions.py).
+
+PostgREST is an httpx.MockTransport behind a patched postgrest_client, so the
+tests assert the filters that get sent and how many rows are read.
+"""
+
+
+import httpx
+import pytest
+
+import repositories.card_actions as card_actions
+from repositories.card_actions import CardActionsRepository, KnownCardIndex, known_card_ids
+
+ORG = "11111111-1111-1111-1111-111111111111"
+
+
+@pytest.fixture
+def postgrest(monkeypatch, mock_http):
+    """A fake card_actions table: rows of {id, pipefy_card_id}."""
+    state = {"rows": [], "requests": []}
+
+    def handler(request):
+        params = request.url.params
+        state["requests"].append(params)
+        assert params["organization_id"] == f"eq.{ORG}"
+        rows = state["rows"]
+        if "pipefy_card_id" in params:
+            wanted = params["pipefy_card_id"].removeprefix("in.(").removesuffix(")")
+            wanted = {card_id.strip('"') for card_id in wanted.split(",")}
+            return httpx.Response(200, json=[
+                {"pipefy_card_id": r["pipefy_card_id"]} for r in rows if r["pipefy_card_id"] in wanted
+            ])
+        after = int(params["id"].removeprefix("gt."))
+        page = [r for r in rows if r["id"] > after][: int(params["limit"])]
+        return httpx.Response(200, json=page)
+
+    mock_http(handler, card_actions)
+    monkeypatch.setattr(card_actions, "_indexes", {})
+    return state
+
+
+def add_rows(state, *card_ids):
+    for card_id in card_ids:
+        state["rows"].append({"id": len(state["rows"]) + 1, "pipefy_card_id": card_id})
+
+
+async def test_probe_asks_only_about_the_given_cards(postgrest):
+    add_rows(postgrest, "1", "2", "3")
+
+    existing = await CardActionsRepository().get_existing_card_ids(ORG, ["2", "3", "9", "2"])
+
+    assert existing == {"2", "3"}
+    assert len(postgrest["requests"]) == 1
+    assert postgrest["requests"][0]["pipefy_card_id"] == 'in.("2","3","9")'
+
+
+async def test_probe_is_chunked(postgrest, monkeypatch):
+    monkeypatch.setattr(card_actions, "_PROBE_CHUNK", 2)
+
+    await CardActionsRepository().get_existing_card_ids(ORG, ["1", "2", "3"])
+
+    assert len(postgrest["requests"]) == 2
+
+
+async def test_index_warms_by_pages_then_reads_only_new_rows(postgrest, monkeypatch):
+    monkeypatch.setattr(card_actions, "_PAGE_SIZE", 2)
+    add_rows(postgrest, "a", "b", "c")
+    index = KnownCardIndex(ORG)
+
+    assert await index.existing(["a", "c", "z"]) == {"a", "c"}
+    warm_requests = len(postgrest["requests"])
+    assert warm_requests == 2  # a full page of 2, then a short page of 1
+
+    add_rows(postgrest, "z")
+    assert await index.existing(["z"]) == {"z"}
+    assert postgrest["requests"][-1]["id"] == "gt.3"
+    assert index.stats() == (4, 4)
+
+
+async def test_index_rewarms_after_the_interval(postgrest, monkeypatch):
+    add_rows(postgrest, "a")
+    index = KnownCardIndex(ORG)
+    await index.existing(["a"])
+
+    postgrest["rows"].clear()  # the action was deleted
+    monkeypatch.setattr(card_actions.settings, "CARD_ACTIONS_INDEX_REWARM_SECONDS", -1)
+
+    assert await index.existing(["a"]) == set()
+
+
+async def test_known_card_ids_uses_the_index_only_when_enabled(postgrest, monkeypatch):
+    add_rows(postgrest, "a")
+
+    monkeypatch.setattr(card_actions.settings, "CARD_ACTIONS_INDEX_ENABLED", False)
+    assert await known_card_ids(ORG, ["a", "b"]) == {"a"}
+    assert card_actions._indexes == {}
+
+    monkeypatch.setattr(card_actions.settings, "CARD_ACTIONS_INDEX_ENABLED", True)
+    assert await known_card_ids(ORG, ["a", "b"]) == {"a"}
+    assert ORG in card_actions._indexes
@@ -1,6 +1,6 @@
 """Tests for CitaRepository (repositories/citas.py).
 
-The HTTP layer is replaced with a fake httpx.AsyncClient (same approach as
+The pooled HTTP client is replaced with a fake (same approach as
 tests/test_marketing_repository.py) so the tests assert the PostgREST request
 that gets built and how the response is parsed, with no network access.
 """
@@ -83,9 +83,9 @@ class FakeAsyncClient:
 def _patch_client(monkeypatch, *responses):
     FakeAsyncClient.calls = []
     monkeypatch.setattr(
-        citas_repo_module.httpx,
-        "AsyncClient",
-        lambda *a, **k: FakeAsyncClient(responses),
+        citas_repo_module,
+        "postgrest_client",
+        lambda: FakeAsyncClient(responses),
     )
 
 
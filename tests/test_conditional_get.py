@@ -0,0 +1,179 @@
+"""Tests for ETag / If-None-Match on the order and customer GETs (core.etag
+and the *_etag functions of orders_service and customers_service).
+
+PostgREST is an httpx.MockTransport serving one order and one customer; it
+records each request's `select`, so a test can tell the cheap versions query
+from the full one.
+"""
+
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import repositories.orders as orders_repo_module
+from api.v1.endpoints import customers as customers_endpoint
+from api.v1.endpoints import orders as orders_endpoint
+from core import etag
+from repositories.orders import (
+    CUSTOMER_DETAIL_VERSIONS_SELECT,
+    CUSTOMER_LIST_VERSIONS_SELECT,
+    ORDER_VERSIONS_SELECT,
+)
+from services import orders_service
+
+app = FastAPI()
+app.include_router(orders_endpoint.router, prefix="/api/orders")
+app.include_router(customers_endpoint.router, prefix="/api/customers")
+client = TestClient(app)
+
+ORG = "11111111-1111-1111-1111-111111111111"
+ORDER_ID = "00000000-0000-0000-0000-000000000001"
+CUSTOMER_ID = "00000000-0000-0000-0000-0000000000c1"
+VERSIONS = {ORDER_VERSIONS_SELECT, CUSTOMER_LIST_VERSIONS_SELECT, CUSTOMER_DETAIL_VERSIONS_SELECT}
+
+
+@pytest.fixture
+def postgrest(monkeypatch, mock_http):
+    monkeypatch.setattr(etag, "_missing_since", None)
+    state = {
+        "selects": [],
+        "updated_at": "2024-05-01T10:00:00+00:00",
+        "missing_column": False,
+    }
+
+    def handler(request):
+        select = request.url.params["select"]
+        state["selects"].append(select)
+        if state["missing_column"] and select in VERSIONS:
+            return httpx.Response(
+                400, json={"code": "42703", "message": "column orders.updated_at does not exist"}
+            )
+        order = {
+            "id": ORDER_ID,
+            "date_order": "2024-05-01T10:00:00+00:00",
+            "updated_at": state["updated_at"],
+            "customer": {"updated_at": "2024-04-01T10:00:00+00:00"},
+            "vehicle": None,
+            "order_files": [],
+        }
+        if request.url.path.endswith("/orders"):
+            found = request.url.params.get("id") in (None, f"eq.{ORDER_ID}")
+            return httpx.Response(200, json=[order] if found else [])
+        customer = {
+            "id": CUSTOMER_ID,
+            "name": "Ana",
+            "phone": "50760000000",
+            "created_at": "2024-04-01T10:00:00+00:00",
+            "updated_at": "2024-04-01T10:00:00+00:00",
+            "orders": [{"count": 1}] if "count" in select else [order],
+        }
+        return httpx.Response(200, json=[customer])
+
+    mock_http(handler, orders_repo_module)
+    return state
+
+
+DETAIL = f"/api/orders/fullOrderDetails/{ORDER_ID}?sign_urls=false"
+
+
+def test_if_none_match_comparison():
+    tag = etag.compute_etag("x")
+
+    assert tag.startswith('"') and not tag.startswith("W/")
+    assert etag.etag_matches(tag, tag)
+    assert etag.etag_matches(f'"other", W/{tag}', tag)
+    assert etag.etag_matches("*", tag)
+    assert not etag.etag_matches('"other"', tag)
+    assert not etag.etag_matches(None, tag)
+    assert not etag.etag_matches("*", None)
+
+
+def test_detail_is_tagged_then_revalidated_from_the_versions_query_alone(postgrest):
+    first = client.get(DETAIL)
+
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+    tag = first.headers["etag"]
+    assert postgrest["selects"][0] == ORDER_VERSIONS_SELECT
+
+    postgrest["selects"].clear()
+    second = client.get(DETAIL, headers={"If-None-Match": tag})
+
+    assert second.status_code == 304
+    assert second.headers["etag"] == tag
+    assert second.content == b""
+    assert postgrest["selects"] == [ORDER_VERSIONS_SELECT]
+
+
+def test_a_write_changes_the_tag(postgrest):
+    tag = client.get(DETAIL).headers["etag"]
+    postgrest["updated_at"] = "2024-05-02T08:00:00+00:00"
+
+    response = client.get(DETAIL, headers={"If-None-Match": tag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != tag
+
+
+def test_signed_url_responses_turn_the_tag_over_before_urls_expire(postgrest, monkeypatch):
+    window = orders_service.order_files_service.SIGNED_URL_SAFETY_MARGIN_SECONDS // 2
+    monkeypatch.setattr(orders_service.time, "time", lambda: 10 * window)
+    tag = client.get("/api/orders/fullOrderDetails", params={"organization_id": ORG}).headers["etag"]
+
+    monkeypatch.setattr(orders_service.time, "time", lambda: 11 * window)
+    response = client.get(
+        "/api/orders/fullOrderDetails",
+        params={"organization_id": ORG},
+        headers={"If-None-Match": tag},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != tag
+
+
+def test_unknown_order_is_still_a_404(postgrest):
+    response = client.get(
+        "/api/orders/fullOrderDetails/00000000-0000-0000-0000-000000000009",
+        headers={"If-None-Match": '"anything"'},
+    )
+
+    assert response.status_code == 404
+
+
+def test_listing_pages_revalidate_per_query(postgrest):
+    url = "/api/orders/fullOrderDetails/page"
+    params = {"organization_id": ORG, "preset": "kanban", "sign_urls": "false"}
+    tag = client.get(url, params=params).headers["etag"]
+
+    same = client.get(url, params=params, headers={"If-None-Match": tag})
+    other = client.get(url, params={**params, "preset": "detail"}, headers={"If-None-Match": tag})
+
+    assert same.status_code == 304
+    assert other.status_code == 200
+
+
+def test_customers_list_and_detail_revalidate(postgrest):
+    list_tag = client.get("/api/customers", params={"organization_id": ORG}).headers["etag"]
+    detail_tag = client.get(f"/api/customers/{CUSTOMER_ID}").headers["etag"]
+
+    postgrest["selects"].clear()
+    listing = client.get(
+        "/api/customers", params={"organization_id": ORG}, headers={"If-None-Match": list_tag}
+    )
+    detail = client.get(f"/api/customers/{CUSTOMER_ID}", headers={"If-None-Match": detail_tag})
+
+    assert listing.status_code == 304 and detail.status_code == 304
+    assert postgrest["selects"] == [CUSTOMER_LIST_VERSIONS_SELECT, CUSTOMER_DETAIL_VERSIONS_SELECT]
+
+
+def test_without_migration_011_responses_are_untagged_and_not_reprobed(postgrest):
+    postgrest["missing_column"] = True
+
+    first = client.get(DETAIL, headers={"If-None-Match": '"stale"'})
+    second = client.get(DETAIL)
+
+    assert first.status_code == 200 and second.status_code == 200
+    assert "etag" not in first.headers
+    assert postgrest["selects"].count(ORDER_VERSIONS_SELECT) == 1
@@ -0,0 +1,79 @@
+"""Tests for the daily_rollups backfill (services/daily_rollups.py and
+repositories/daily_rollups.py).
+
+The backfill is checked against a fake repository; the repository's RPC call
+goes through an httpx.MockTransport behind a patched postgrest_client.
+"""
+
+import json
+from datetime import date
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import repositories.rpc as rpc
+from repositories.daily_rollups import DailyRollupRepository
+from services import daily_rollups
+
+
+class FakeRepo:
+    def __init__(self):
+        self.calls = []
+
+    async def rebuild(self, start, end, organization_id=None):
+        self.calls.append((start, end, organization_id))
+        return 3
+
+
+async def test_backfill_rebuilds_the_range_in_inclusive_windows():
+    repo = FakeRepo()
+
+    total = await daily_rollups.backfill(
+        date(2026, 1, 1), date(2026, 2, 5), organization_id="org-1", chunk_days=15, repo=repo
+    )
+
+    assert repo.calls == [
+        (date(2026, 1, 1), date(2026, 1, 15), "org-1"),
+        (date(2026, 1, 16), date(2026, 1, 30), "org-1"),
+        (date(2026, 1, 31), date(2026, 2, 5), "org-1"),
+    ]
+    assert total == 9
+
+
+async def test_single_day_is_one_window():
+    repo = FakeRepo()
+    await daily_rollups.backfill(date(2026, 3, 1), date(2026, 3, 1), repo=repo)
+    assert repo.calls == [(date(2026, 3, 1), date(2026, 3, 1), None)]
+
+
+@pytest.fixture
+def rpc_response(monkeypatch, mock_http):
+    state = {"response": httpx.Response(200, json=42), "payloads": []}
+
+    def handler(request):
+        assert request.url.path.endswith("/rpc/rebuild_daily_rollups")
+        state["payloads"].append(json.loads(request.content))
+        return state["response"]
+
+    mock_http(handler, rpc)
+    monkeypatch.setattr(rpc, "_missing_rpcs", {})
+    return state
+
+
+async def test_repository_rebuild_posts_the_window(rpc_response):
+    written = await DailyRollupRepository().rebuild(date(2026, 1, 1), date(2026, 1, 31))
+
+    assert written == 42
+    assert rpc_response["payloads"] == [
+        {"p_from": "2026-01-01", "p_to": "2026-01-31", "p_organization_id": None}
+    ]
+
+
+async def test_repository_rebuild_reports_a_missing_migration(rpc_response):
+    rpc_response["response"] = httpx.Response(404, json={"code": "PGRST202"})
+
+    with pytest.raises(HTTPException) as exc:
+        await DailyRollupRepository().rebuild(date(2026, 1, 1), date(2026, 1, 31))
+
+    assert exc.value.status_code == 503
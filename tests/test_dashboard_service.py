@@ -0,0 +1,213 @@
+"""Tests for the dashboard KPIs (services/dashboard_service.py and the
+dashboard_kpis / count_orders_reached_status RPCs in repositories/dashboard.py).
+
+PostgREST is an httpx.MockTransport behind a patched postgrest_client, so the
+tests see exactly which requests a dashboard load makes.
+"""
+
+import asyncio
+from datetime import date
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import repositories.dashboard as dashboard_repo
+import repositories.order_statuses as order_statuses_repo
+import repositories.rpc as rpc
+from services import dashboard_service
+
+ORG = "11111111-1111-1111-1111-111111111111"
+
+KPI_ROW = {
+    "today_start": "2026-10-17T05:00:00+00:00",
+    "week_start": "2026-10-12T05:00:00+00:00",
+    "month_start": "2026-10-01T05:00:00+00:00",
+    "created_today": 4,
+    "created_this_week": 20,
+    "created_this_month": 75,
+    "active_orders": 31,
+    "completed_today": 3,
+    "cancelled_today": 2,
+}
+
+STATUS_ROWS = [
+    {"order_status": "recibido", "order_count": 2},
+    {"order_status": "en_proceso", "order_count": 3},
+    {"order_status": "contactado", "order_count": 1},
+]
+
+CATALOGUE = [
+    {"code": "recibido", "label": "Recibido", "status_type": "workshop", "sort_order": 1, "is_terminal": False},
+    {"code": "en_proceso", "label": "En proceso", "status_type": "workshop", "sort_order": 2, "is_terminal": False},
+    {"code": "pagado", "label": "Pagado", "status_type": "workshop", "sort_order": 9, "is_terminal": True},
+    {"code": "contactado", "label": "Contactado", "status_type": "followup", "sort_order": 2, "is_terminal": False},
+]
+
+
+@pytest.fixture
+def postgrest(monkeypatch, mock_http):
+    state = {
+        "requests": [],
+        "rpc": lambda: httpx.Response(200, json=[KPI_ROW]),
+        "count_rpc": lambda: httpx.Response(200, json=5),
+        "status_rpc": lambda: httpx.Response(200, json=STATUS_ROWS),
+    }
+
+    def handler(request):
+        state["requests"].append(request)
+        path = request.url.path
+        if path.endswith("/rpc/dashboard_kpis"):
+            return state["rpc"]()
+        if path.endswith("/rpc/count_orders_reached_status"):
+            return state["count_rpc"]()
+        if path.endswith("/rpc/order_status_counts"):
+            return state["status_rpc"]()
+        if path.endswith("/order_statuses"):
+            return httpx.Response(200, json=CATALOGUE)
+        if path.endswith("/orders"):
+            return httpx.Response(200, json=[], headers={"Content-Range": "0-0/7"})
+        if path.endswith("/order_status_history"):
+            return httpx.Response(200, json=[{"order_id": "a"}, {"order_id": "a"}, {"order_id": "b"}])
+        raise AssertionError(f"unexpected {path}")
+
+    mock_http(handler, dashboard_repo, rpc, order_statuses_repo)
+    monkeypatch.setattr(rpc, "_missing_rpcs", {})
+    dashboard_service._metrics_cache.clear()
+    return state
+
+
+async def test_metrics_come_from_one_rpc_call(postgrest):
+    metrics = await dashboard_service.get_dashboard_metrics(ORG)
+
+    assert len(postgrest["requests"]) == 1
+    body = postgrest["requests"][0].content
+    assert ORG.encode() in body and b"pendiente_aprobacion" in body
+    assert metrics.created_today == 4
+    assert metrics.created_this_month == 75
+    assert metrics.active_orders == 31
+    assert metrics.completed_today == 3
+    assert metrics.new_vs_cancelled_ratio == 2.0
+
+
+def missing_function():
+    return httpx.Response(404, json={"code": "PGRST202", "message": "Could not find the function"})
+
+
+def paths(state):
+    return [request.url.path.rsplit("/", 1)[-1] for request in state["requests"]]
+
+
+async def test_missing_kpi_function_falls_back_to_the_fan_out(postgrest):
+    postgrest["rpc"] = missing_function
+
+    metrics = await dashboard_service.get_dashboard_metrics(ORG)
+
+    assert paths(postgrest).count("dashboard_kpis") == 1
+    assert paths(postgrest).count("orders") == 3
+    assert paths(postgrest).count("order_status_counts") == 1
+    assert paths(postgrest).count("count_orders_reached_status") == 2
+    assert "order_status_history" not in paths(postgrest)
+    assert metrics.created_today == 7
+    assert metrics.active_orders == 5  # recibido + en_proceso from the grouped counts
+    assert metrics.completed_today == 5  # counted in Postgres
+
+
+async def test_missing_functions_fall_back_to_rows_and_are_remembered(postgrest):
+    postgrest["rpc"] = missing_function
+    postgrest["count_rpc"] = missing_function
+
+    metrics = await dashboard_service.get_dashboard_metrics(ORG)
+    assert metrics.completed_today == 2  # distinct orders, deduped in Python
+
+    postgrest["requests"].clear()
+    dashboard_service.invalidate_metrics(ORG)
+    await dashboard_service.get_dashboard_metrics(ORG)
+
+    assert "dashboard_kpis" not in paths(postgrest)
+    assert "count_orders_reached_status" not in paths(postgrest)
+    assert paths(postgrest).count("order_status_history") == 2
+
+
+async def test_concurrent_polls_share_one_computation(postgrest):
+    results = await asyncio.gather(
+        *(dashboard_service.get_dashboard_metrics(ORG) for _ in range(5))
+    )
+
+    assert len(postgrest["requests"]) == 1
+    assert all(result is results[0] for result in results)
+
+    await dashboard_service.get_dashboard_metrics(ORG)
+    assert len(postgrest["requests"]) == 1  # still fresh
+
+    dashboard_service.invalidate_metrics(ORG)
+    await dashboard_service.get_dashboard_metrics(ORG)
+    assert len(postgrest["requests"]) == 2
+
+
+async def test_status_board_reports_every_status_in_two_requests(postgrest):
+    board = await dashboard_service.get_status_board(ORG)
+
+    assert sorted(paths(postgrest)) == ["order_status_counts", "order_statuses"]
+    assert [(c.code, c.count) for c in board.columns] == [
+        ("recibido", 2), ("en_proceso", 3), ("pagado", 0), ("contactado", 1),
+    ]
+    assert board.total == 6
+
+
+async def test_status_board_falls_back_to_one_count_per_status(postgrest):
+    postgrest["status_rpc"] = missing_function
+
+    board = await dashboard_service.get_status_board(ORG)
+
+    assert paths(postgrest).count("orders") == len(CATALOGUE)
+    assert all(column.count == 7 for column in board.columns)
+
+
+async def test_other_rpc_errors_are_raised(postgrest):
+    postgrest["rpc"] = lambda: httpx.Response(500, json={"message": "boom"})
+
+    with pytest.raises(Exception) as exc:
+        await dashboard_service.get_dashboard_metrics(ORG)
+
+    assert getattr(exc.value, "status_code", None) == 500
+
+
+async def test_timeseries_reads_one_rpc_and_maps_buckets(monkeypatch):
+    seen = {}
+
+    async def fake_get_timeseries(self, organization_id, start, end, bucket):
+        seen.update(organization_id=organization_id, start=start, end=end, bucket=bucket)
+        return [
+            {"bucket_start": "2026-09-28", "created": 4, "completed": 1, "cancelled": 0},
+            {"bucket_start": "2026-10-05", "created": 0, "completed": 0, "cancelled": 0},
+        ]
+
+    monkeypatch.setattr(
+        dashboard_service.DailyRollupRepository, "get_timeseries", fake_get_timeseries
+    )
+
+    series = await dashboard_service.get_timeseries(
+        ORG, date(2026, 10, 1), date(2026, 10, 7), "week"
+    )
+
+    assert seen == {"organization_id": ORG, "start": date(2026, 10, 1), "end": date(2026, 10, 7), "bucket": "week"}
+    assert [p.created for p in series.points] == [4, 0]
+    # Panama is UTC-5 all year.
+    assert series.points[0].starts_at.isoformat() == "2026-09-28T05:00:00+00:00"
+
+
+def test_timeseries_default_spans():
+    end = date(2026, 10, 17)  # a Saturday
+    assert dashboard_service._default_start(end, "day") == date(2026, 9, 18)
+    assert dashboard_service._default_start(end, "week") == date(2026, 7, 27)
+    assert dashboard_service._default_start(end, "month") == date(2025, 11, 1)
+
+
+async def test_timeseries_rejects_bad_ranges():
+    with pytest.raises(HTTPException) as exc:
+        await dashboard_service.get_timeseries(ORG, date(2026, 10, 2), date(2026, 10, 1))
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException):
+        await dashboard_service.get_timeseries(ORG, date(2020, 1, 1), date(2026, 1, 1), "day")
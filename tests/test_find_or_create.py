@@ -0,0 +1,142 @@
+"""Tests for the single-round-trip find-or-create of customers and vehicles
+(CustomerRepository.find_or_create / VehicleRepository.find_or_create via
+orders_service).
+
+PostgREST is an httpx.MockTransport that records every request; the
+find_or_create_* RPCs are either answered or reported missing (PGRST202),
+which exercises the PostgREST fallbacks.
+"""
+
+import json
+
+import httpx
+import pytest
+
+import repositories.orders as orders_repo_module
+import repositories.rpc as rpc_module
+from schemas.customer import CustomerCreate
+from schemas.vehicle import VehicleCreate
+from services import orders_service
+
+ORG = "11111111-1111-1111-1111-111111111111"
+
+CUSTOMER = {
+    "id": "00000000-0000-0000-0000-0000000000c1",
+    "organization_id": ORG,
+    "name": "Ana",
+    "phone": "60000000",
+    "national_id": "8-123-456",
+    "created_at": "2024-01-01T00:00:00+00:00",
+}
+VEHICLE = {
+    "id": "00000000-0000-0000-0000-0000000000e1",
+    "organization_id": ORG,
+    "plate": "AB1234",
+    "make": "Toyota",
+    "model": "Hilux",
+    "year": 2019,
+    "updated_at": "2024-01-01T00:00:00+00:00",
+}
+
+
+@pytest.fixture
+def postgrest(monkeypatch, mock_http):
+    monkeypatch.setattr(rpc_module, "_missing_rpcs", {})
+    state = {"requests": [], "rpc": True, "existing": True}
+
+    def handler(request):
+        body = json.loads(request.content) if request.content else None
+        name = request.url.path.rsplit("/", 1)[-1]
+        state["requests"].append((request, name, body))
+        if name.startswith("find_or_create_"):
+            if not state["rpc"]:
+                return httpx.Response(404, json={"code": "PGRST202", "message": "not found"})
+            return httpx.Response(200, json=CUSTOMER if name.endswith("customer") else VEHICLE)
+        if request.method == "GET":
+            row = CUSTOMER if name == "customers" else VEHICLE
+            return httpx.Response(200, json=[row] if state["existing"] else [])
+        if request.method == "POST":
+            created = {**(CUSTOMER if name == "customers" else VEHICLE), **body}
+            # ignore-duplicates: a conflicting insert returns no row.
+            return httpx.Response(201, json=[] if state["existing"] else [created])
+        raise AssertionError(f"unexpected {request.method} {request.url}")
+
+    mock_http(handler, orders_repo_module, rpc_module)
+    return state
+
+
+def _calls(state):
+    return [(request.method, name) for request, name, _ in state["requests"]]
+
+
+async def test_customer_is_one_rpc_round_trip(postgrest):
+    customer = await orders_service.find_or_create_customer(
+        ORG, CustomerCreate(name="Ana", phone="60000000", national_id=" 8-123-456 ")
+    )
+
+    assert str(customer.id) == CUSTOMER["id"]
+    assert _calls(postgrest) == [("POST", "find_or_create_customer")]
+    payload = postgrest["requests"][0][2]
+    assert payload["p_organization_id"] == ORG
+    assert payload["p_customer"]["national_id"] == "8-123-456"
+
+
+async def test_blank_national_id_is_sent_as_null(postgrest):
+    await orders_service.find_or_create_customer(
+        ORG, CustomerCreate(name="Ana", phone="60000000", national_id="  ")
+    )
+
+    assert postgrest["requests"][0][2]["p_customer"]["national_id"] is None
+
+
+async def test_customer_fallback_matches_national_id_exactly(postgrest):
+    postgrest["rpc"] = False
+
+    customer = await orders_service.find_or_create_customer(
+        ORG, CustomerCreate(name="Ana", phone="60000000", national_id="8-123-456")
+    )
+
+    assert str(customer.id) == CUSTOMER["id"]
+    assert _calls(postgrest) == [("POST", "find_or_create_customer"), ("GET", "customers")]
+    params = postgrest["requests"][1][0].url.params
+    assert params["national_id"] == "eq.8-123-456"
+
+
+async def test_vehicle_is_one_rpc_round_trip(postgrest):
+    vehicle = await orders_service.find_or_create_vehicle(
+        ORG, VehicleCreate(organization_id=ORG, plate="AB1234", make="Kia", model="Rio", year=2020)
+    )
+
+    # The stored vehicle wins over what was typed.
+    assert vehicle.make == "Toyota"
+    assert _calls(postgrest) == [("POST", "find_or_create_vehicle")]
+
+
+async def test_vehicle_fallback_inserts_ignoring_the_duplicate_then_reads_it(postgrest):
+    postgrest["rpc"] = False
+
+    vehicle = await orders_service.find_or_create_vehicle(
+        ORG, VehicleCreate(organization_id=ORG, plate="AB1234", make="Kia", model="Rio", year=2020)
+    )
+
+    assert vehicle.make == "Toyota"
+    assert _calls(postgrest) == [
+        ("POST", "find_or_create_vehicle"),
+        ("POST", "vehicles"),
+        ("GET", "vehicles"),
+    ]
+    insert = postgrest["requests"][1][0]
+    assert insert.url.params["on_conflict"] == "plate,organization_id"
+    assert insert.headers["prefer"] == "resolution=ignore-duplicates,return=representation"
+
+
+async def test_vehicle_fallback_new_plate_is_one_insert(postgrest):
+    postgrest["rpc"] = False
+    postgrest["existing"] = False
+
+    vehicle = await orders_service.find_or_create_vehicle(
+        ORG, VehicleCreate(organization_id=ORG, plate="ZZ9999", make="Kia", model="Rio", year=2020)
+    )
+
+    assert vehicle.plate == "ZZ9999"
+    assert _calls(postgrest) == [("POST", "find_or_create_vehicle"), ("POST", "vehicles")]
@@ -0,0 +1,101 @@
+"""Tests for the shared upstream HTTP pools (core/http_pool.py).
+
+Pools are built with an httpx.MockTransport so the tests exercise the real
+client lifecycle and counters without touching the network.
+"""
+
+import httpx
+import pytest
+
+from core import http_pool
+from core.http_pool import HttpPool, PoolConfig
+
+
+def make_pool(handler, **config) -> HttpPool:
+    return HttpPool("test", PoolConfig(**config), transport=httpx.MockTransport(handler))
+
+
+async def test_session_reuses_one_client_and_does_not_close_it():
+    pool = make_pool(lambda request: httpx.Response(200, json=[]))
+
+    async with pool.session() as first:
+        await first.get("https://db.test/rest/v1/orders")
+    async with pool.session() as second:
+        await second.get("https://db.test/rest/v1/orders")
+
+    assert first is second
+    assert not first.is_closed
+    assert pool.stats()["clients_built"] == 1
+    await pool.aclose()
+
+
+async def test_client_is_rebuilt_after_close():
+    pool = make_pool(lambda request: httpx.Response(200))
+    old = pool.client
+
+    await pool.aclose()
+
+    assert old.is_closed
+    assert pool.client is not old
+    assert pool.stats()["clients_built"] == 2
+    await pool.aclose()
+
+
+async def test_stats_count_requests_5xx_and_in_flight():
+    statuses = iter([200, 503])
+    pool = make_pool(lambda request: httpx.Response(next(statuses)))
+
+    async with pool.session() as client:
+        async with pool.session():
+            assert pool.stats()["in_flight"] == 2
+        await client.get("https://db.test/a")
+        await client.get("https://db.test/b")
+
+    stats = pool.stats()
+    assert stats["requests"] == 2
+    assert stats["responses"] == 2
+    assert stats["server_errors"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["peak_in_flight"] == 2
+    await pool.aclose()
+
+
+async def test_transport_errors_are_counted_and_reraised():
+    def boom(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    pool = make_pool(boom)
+
+    with pytest.raises(httpx.ConnectError):
+        async with pool.session() as client:
+            await client.get("https://db.test/a")
+
+    assert pool.stats()["transport_errors"] == 1
+    assert pool.stats()["in_flight"] == 0
+    await pool.aclose()
+
+
+def test_limits_and_timeouts_come_from_config():
+    pool = make_pool(
+        lambda request: httpx.Response(200),
+        timeout=12.0,
+        connect_timeout=3.0,
+        max_connections=7,
+    )
+
+    client = pool.client
+
+    assert client.timeout.read == 12.0
+    assert client.timeout.connect == 3.0
+    assert pool.stats()["max_connections"] == 7
+
+
+def test_unknown_pool_name_raises():
+    with pytest.raises(ValueError) as exc:
+        http_pool.get_pool("nope")
+
+    assert "postgrest" in str(exc.value)
+
+
+def test_postgrest_pool_is_a_process_wide_singleton():
+    assert http_pool.get_pool("postgrest") is http_pool.get_pool("postgrest")
@@ -1,13 +1,14 @@
 """Tests for MarketingRepository (repositories/marketing.py).
 
-The repository's HTTP layer is replaced with a fake httpx.AsyncClient so the
+The repository's pooled HTTP client is replaced with a fake so the
 tests assert the PostgREST request it builds and how it parses the response,
 without touching the network.
 """
 
-import logging
+import httpx
 
 import repositories.marketing as marketing_repo_module
+import repositories.rpc as rpc
 from repositories.marketing import MarketingRepository
 
 
@@ -45,9 +46,9 @@ class FakeAsyncClient:
 
 def _patch_client(monkeypatch, response: FakeResponse):
     monkeypatch.setattr(
-        marketing_repo_module.httpx,
-        "AsyncClient",
-        lambda *a, **k: FakeAsyncClient(response),
+        marketing_repo_module,
+        "postgrest_client",
+        lambda: FakeAsyncClient(response),
     )
 
 
@@ -84,17 +85,35 @@ async def test_count_outbound_messages_adds_upper_bound(monkeypatch):
     ]
 
 
+class PagedAsyncClient(FakeAsyncClient):
+    """Serves the next canned page per GET and records every call's params."""
+
+    calls: list = []
+
+    def __init__(self, pages):
+        self._pages = pages  # shared, so successive clients continue the sequence
+
+    async def get(self, url, params=None, headers=None):
+        PagedAsyncClient.calls.append({"url": url, "params": dict(params), "headers": headers})
+        return FakeResponse(json_data=self._pages.pop(0) if self._pages else [])
+
+
+def _patch_pages(monkeypatch, pages):
+    PagedAsyncClient.calls = []
+    monkeypatch.setattr(
+        marketing_repo_module, "postgrest_client", lambda: PagedAsyncClient(pages)
+    )
+
+
 async def test_conversation_ids_dedupe_into_set(monkeypatch):
-    _patch_client(
+    _patch_pages(
         monkeypatch,
-        FakeResponse(
-            json_data=[
-                {"conversation_id": "c1"},
-                {"conversation_id": "c2"},
-                {"conversation_id": "c1"},
-                {"conversation_id": None},
-            ]
-        ),
+        [[
+            {"id": "m1", "conversation_id": "c1"},
+            {"id": "m2", "conversation_id": "c2"},
+            {"id": "m3", "conversation_id": "c1"},
+            {"id": "m4", "conversation_id": None},
+        ]],
     )
     repo = MarketingRepository()
 
@@ -103,36 +122,82 @@ async def test_conversation_ids_dedupe_into_set(monkeypatch):
     )
 
     assert ids == {"c1", "c2"}
-    assert FakeAsyncClient.last_call["params"]["direction"] == "eq.inbound"
+    assert PagedAsyncClient.calls[0]["params"]["direction"] == "eq.inbound"
 
 
-async def test_conversation_ids_sends_row_cap_limit(monkeypatch):
-    _patch_client(monkeypatch, FakeResponse(json_data=[{"conversation_id": "c1"}]))
+async def test_conversation_ids_follow_keyset_pages_until_empty(monkeypatch):
+    monkeypatch.setattr(marketing_repo_module, "_PAGE_SIZE", 2)
+    _patch_pages(
+        monkeypatch,
+        [
+            [{"id": "m1", "conversation_id": "c1"}, {"id": "m2", "conversation_id": "c2"}],
+            [{"id": "m5", "conversation_id": "c3"}],
+        ],
+    )
     repo = MarketingRepository()
 
-    await repo.conversation_ids_with_message(
-        "org-1", "inbound", "2026-08-03T05:00:00+00:00"
+    ids = await repo.conversation_ids_with_message(
+        "org-1", "outbound", "2026-08-03T05:00:00+00:00"
     )
 
-    assert FakeAsyncClient.last_call["params"]["limit"] == str(
-        marketing_repo_module._MAX_CONVERSATION_ROWS
-    )
+    assert ids == {"c1", "c2", "c3"}
+    params = [call["params"] for call in PagedAsyncClient.calls]
+    assert len(params) == 3  # two pages and the empty one that ends the scan
+    assert all(p["order"] == "id.asc" and p["limit"] == "2" for p in params)
+    assert "id" not in params[0]
+    assert params[1]["id"] == "gt.m2"
+    assert params[2]["id"] == "gt.m5"
 
 
-async def test_conversation_ids_warns_when_row_cap_is_hit(monkeypatch, caplog):
-    max_rows = marketing_repo_module._MAX_CONVERSATION_ROWS
-    rows = [{"conversation_id": f"c{i}"} for i in range(max_rows)]
-    _patch_client(monkeypatch, FakeResponse(json_data=rows))
-    repo = MarketingRepository()
+class RpcClient:
+    def __init__(self, response):
+        self._response = response
+        self.posted = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def post(self, url, json=None, headers=None):
+        self.posted.append({"url": url, "json": json})
+        self._response.request = httpx.Request("POST", url)
+        return self._response
+
+
+async def test_response_counts_come_from_the_rpc(monkeypatch):
+    client = RpcClient(httpx.Response(200, json=[{"messaged": 40, "replied": 29}]))
+    monkeypatch.setattr(rpc, "postgrest_client", lambda: client)
+    monkeypatch.setattr(rpc, "_missing_rpcs", {})
+    _patch_pages(monkeypatch, [])
+
+    counts = await MarketingRepository().response_counts("org-1", "2026-08-03T05:00:00+00:00")
+
+    assert counts == (40, 29)
+    assert client.posted[0]["url"].endswith("/rpc/marketing_response_counts")
+    assert client.posted[0]["json"]["p_organization_id"] == "org-1"
+    assert PagedAsyncClient.calls == []
+
+
+async def test_response_counts_fall_back_to_streamed_intersection(monkeypatch):
+    client = RpcClient(httpx.Response(404, json={"code": "PGRST202"}))
+    monkeypatch.setattr(rpc, "postgrest_client", lambda: client)
+    monkeypatch.setattr(rpc, "_missing_rpcs", {})
+    _patch_pages(
+        monkeypatch,
+        [
+            # outbound
+            [{"id": "m1", "conversation_id": "c1"}, {"id": "m2", "conversation_id": "c2"},
+             {"id": "m3", "conversation_id": "c3"}],
+            [],
+            # inbound: c5 was never messaged, c1 replied twice
+            [{"id": "m4", "conversation_id": "c1"}, {"id": "m6", "conversation_id": "c5"},
+             {"id": "m7", "conversation_id": "c1"}],
+            [],
+        ],
+    )
+
+    counts = await MarketingRepository().response_counts("org-1", "2026-08-03T05:00:00+00:00")
 
-    with caplog.at_level(logging.WARNING, logger="repositories.marketing"):
-        ids = await repo.conversation_ids_with_message(
-            "org-1", "outbound", "2026-08-03T05:00:00+00:00"
-        )
-
-    assert len(ids) == max_rows
-    assert FakeAsyncClient.last_call["params"]["limit"] == str(max_rows)
-    warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
-    assert len(warnings) == 1
-    assert "org-1" in warnings[0].message
-    assert "truncated" in warnings[0].message.lower()
+    assert counts == (3, 1)
@@ -13,8 +13,8 @@ class FakeDashboardRepo:
     def __init__(self, counts):
         self._counts = counts  # status code -> int
 
-    async def count_orders(self, organization_id, statuses=None, received_after=None):
-        return self._counts.get(statuses[0], 0)
+    async def count_orders_by_status(self, organization_id, statuses):
+        return {status: self._counts.get(status, 0) for status in statuses}
 
 
 class FakeMarketingRepo:
@@ -27,8 +27,8 @@ class FakeMarketingRepo:
     async def count_outbound_messages(self, organization_id, sent_after, sent_before=None):
         return self._yesterday if sent_before else self._today
 
-    async def conversation_ids_with_message(self, organization_id, direction, sent_after):
-        return self._outbound if direction == "outbound" else self._inbound
+    async def response_counts(self, organization_id, sent_after):
+        return len(self._outbound), len(self._outbound & self._inbound)
 
 
 async def test_conversion_and_response_rate_computed():
@@ -0,0 +1,175 @@
+"""Tests for PATCH /api/orders/bulk-status
+(orders_service.bulk_update_status and OrderRepository.bulk_transition_status).
+
+PostgREST is an httpx.MockTransport over a small in-memory orders table; the
+bulk_transition_order_status RPC is either answered or reported missing
+(PGRST202), which exercises the PostgREST fallback.
+"""
+
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import repositories.order_statuses as statuses_repo_module
+import repositories.orders as orders_repo_module
+import repositories.rpc as rpc_module
+from api.v1.endpoints import orders as orders_endpoint
+
+app = FastAPI()
+app.include_router(orders_endpoint.router, prefix="/api/orders")
+client = TestClient(app)
+
+ORG = "11111111-1111-1111-1111-111111111111"
+A, B, C = (f"00000000-0000-0000-0000-00000000000{n}" for n in (1, 2, 3))
+MISSING = "00000000-0000-0000-0000-000000000009"
+
+CATALOG = {
+    "en_proceso": {
+        "id": "00000000-0000-0000-0000-0000000000a1",
+        "status_type": "workshop",
+        "code": "en_proceso",
+        "label": "En proceso",
+        "sort_order": 2,
+        "is_terminal": False,
+        "created_at": "2024-01-01T00:00:00+00:00",
+    }
+}
+
+
+def _ids(expression):
+    return expression[len("in.("):-1].split(",")
+
+
+@pytest.fixture
+def postgrest(monkeypatch, mock_http):
+    monkeypatch.setattr(rpc_module, "_missing_rpcs", {})
+    state = {
+        "requests": [],
+        "rpc": True,
+        "orders": {A: "recibido", B: "en_proceso", C: "recibido"},
+        # Orders whose status "changes concurrently" before the fallback PATCH.
+        "raced": set(),
+    }
+
+    def handler(request):
+        path = request.url.path
+        params = request.url.params
+        body = json.loads(request.content) if request.content else None
+        name = path.rsplit("/", 1)[-1]
+        state["requests"].append((request.method, name, params, body))
+        if name == "order_statuses":
+            row = CATALOG.get(params["code"][len("eq."):])
+            return httpx.Response(200, json=[row] if row else [])
+        if name == "bulk_transition_order_status":
+            if not state["rpc"]:
+                return httpx.Response(404, json={"code": "PGRST202", "message": "not found"})
+            rows = []
+            for order_id in body["p_order_ids"]:
+                if order_id in state["orders"]:
+                    from_status = state["orders"][order_id]
+                    state["orders"][order_id] = body["p_to_status"]
+                    rows.append({
+                        "order_id": order_id,
+                        "organization_id": ORG,
+                        "from_status": from_status,
+                        "changed": from_status != body["p_to_status"],
+                    })
+            return httpx.Response(200, json=rows)
+        if name == "order_status_history":
+            return httpx.Response(201, json=body)
+        if request.method == "GET":
+            rows = [
+                {"id": order_id, "organization_id": ORG, "order_status": state["orders"][order_id]}
+                for order_id in _ids(params["id"])
+                if order_id in state["orders"]
+            ]
+            return httpx.Response(200, json=rows)
+        if request.method == "PATCH":
+            from_status = params["order_status"][len("eq."):]
+            rows = []
+            for order_id in _ids(params["id"]):
+                if order_id not in state["raced"] and state["orders"].get(order_id) == from_status:
+                    state["orders"][order_id] = body["order_status"]
+                    rows.append({"id": order_id, "organization_id": ORG})
+            return httpx.Response(200, json=rows)
+        raise AssertionError(f"unexpected {request.method} {path}")
+
+    mock_http(handler, orders_repo_module, rpc_module, statuses_repo_module)
+    return state
+
+
+def _bulk(order_ids, order_status="en_proceso"):
+    return client.patch(
+        "/api/orders/bulk-status",
+        json={"order_ids": order_ids, "order_status": order_status, "organization_id": ORG},
+    )
+
+
+def _outcomes(response):
+    return {row["order_id"]: row["outcome"] for row in response.json()["results"]}
+
+
+def test_one_rpc_moves_the_batch_and_reports_each_order(postgrest):
+    response = _bulk([A, B, MISSING])
+
+    assert response.status_code == 200
+    assert response.json()["updated"] == 1
+    assert _outcomes(response) == {A: "updated", B: "unchanged", MISSING: "not_found"}
+    assert response.json()["results"][0]["from_status"] == "recibido"
+    calls = [(method, name) for method, name, _, _ in postgrest["requests"]]
+    assert calls == [("GET", "order_statuses"), ("POST", "bulk_transition_order_status")]
+    rpc_payload = postgrest["requests"][1][3]
+    assert rpc_payload["p_status_type"] == "workshop"
+    assert rpc_payload["p_organization_id"] == ORG
+
+
+def test_fallback_uses_one_patch_per_current_status_and_one_history_insert(postgrest):
+    postgrest["rpc"] = False
+
+    response = _bulk([A, B, C])
+
+    assert _outcomes(response) == {A: "updated", B: "unchanged", C: "updated"}
+    calls = [(method, name) for method, name, _, _ in postgrest["requests"]]
+    assert calls == [
+        ("GET", "order_statuses"),
+        ("POST", "bulk_transition_order_status"),
+        ("GET", "orders"),
+        ("PATCH", "orders"),
+        ("POST", "order_status_history"),
+    ]
+    patch_params = postgrest["requests"][3][2]
+    assert sorted(_ids(patch_params["id"])) == [A, C]
+    assert patch_params["order_status"] == "eq.recibido"
+    history = postgrest["requests"][4][3]
+    assert [(row["order_id"], row["from_status"], row["to_status"]) for row in history] == [
+        (A, "recibido", "en_proceso"),
+        (C, "recibido", "en_proceso"),
+    ]
+
+
+def test_fallback_reports_orders_changed_meanwhile_as_conflicts(postgrest):
+    postgrest["rpc"] = False
+    postgrest["raced"] = {C}
+
+    response = _bulk([A, C])
+
+    assert _outcomes(response) == {A: "updated", C: "conflict"}
+    history = postgrest["requests"][-1][3]
+    assert [row["order_id"] for row in history] == [A]
+
+
+def test_status_outside_the_catalog_is_a_422(postgrest):
+    response = _bulk([A], order_status="volando")
+
+    assert response.status_code == 422
+    assert [name for _, name, _, _ in postgrest["requests"]] == ["order_statuses"]
+
+
+def test_empty_and_oversized_batches_are_rejected(postgrest):
+    assert _bulk([]).status_code == 422
+    many = [f"00000000-0000-0000-0000-{n:012d}" for n in range(201)]
+    assert _bulk(many).status_code == 422
+    assert postgrest["requests"] == []
@@ -0,0 +1,167 @@
+"""Tests for the streaming order export (services/order_export.py and
+GET /api/orders/export).
+
+PostgREST is an httpx.MockTransport that pages through ORDERS by keyset, and
+the page size is shrunk so a handful of rows spans several pages.
+"""
+
+import csv
+import gzip
+import io
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import repositories.orders as orders_repo_module
+from api.v1.endpoints import orders as orders_endpoint
+from services import order_export
+
+app = FastAPI()
+app.include_router(orders_endpoint.router, prefix="/api/orders")
+client = TestClient(app)
+
+ORG = "11111111-1111-1111-1111-111111111111"
+
+ORDERS = [
+    {
+        "id": f"00000000-0000-0000-0000-{n:012d}",
+        "organization_id": ORG,
+        "order_status": "recibido",
+        "total_amount": 10.5 * n,
+        "date_order": f"2024-05-{n:02d}T10:00:00+00:00",
+        "customer": {"id": "c", "name": f"José {n}", "phone": "5076000000", "national_id": "8-1-1"},
+        "vehicle": {"id": "v", "make": "Toyota", "model": "Hilux", "year": 2020, "plate": f"AB{n}"},
+    }
+    for n in range(5, 0, -1)
+]
+
+
+@pytest.fixture
+def postgrest(monkeypatch, mock_http):
+    monkeypatch.setattr(order_export, "_PAGE_SIZE", 2)
+    state = {"requests": [], "status": 200, "orders": ORDERS}
+
+    def handler(request):
+        params = request.url.params
+        state["requests"].append(params)
+        if state["status"] != 200:
+            return httpx.Response(state["status"], json={"message": "boom"})
+        rows = state["orders"]
+        if params.get("or"):
+            last = next(i for i, row in enumerate(rows) if row["id"] in params["or"])
+            rows = rows[last + 1:]
+        return httpx.Response(200, json=rows[: int(params["limit"])])
+
+    mock_http(handler, orders_repo_module)
+    return state
+
+
+def test_ndjson_streams_every_page_with_embeds_flattened(postgrest):
+    response = client.get("/api/orders/export", params={"organization_id": ORG})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"].startswith('attachment; filename="orders-')
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [order["id"] for order in ORDERS]
+    assert rows[0]["customer_name"] == "José 5"
+    assert rows[0]["vehicle_plate"] == "AB5"
+    assert "customer" not in rows[0] and "vehicle" not in rows[0]
+    # 5 rows in pages of 2: the third page is short, so no fourth request.
+    assert len(postgrest["requests"]) == 3
+    assert postgrest["requests"][0]["select"] == orders_repo_module.order_select("export")
+
+
+def test_csv_has_a_header_row_and_a_bom_for_excel(postgrest):
+    response = client.get(
+        "/api/orders/export",
+        params={"organization_id": ORG, "format": "csv", "status": ["recibido", "pagado"]},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.content.startswith("\ufeff".encode("utf-8"))
+    rows = list(csv.DictReader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert list(rows[0]) == order_export.EXPORT_COLUMNS
+    assert [row["vehicle_plate"] for row in rows] == ["AB5", "AB4", "AB3", "AB2", "AB1"]
+    assert postgrest["requests"][0]["order_status"] == 'in.("recibido","pagado")'
+
+
+def test_gzip_is_applied_when_the_client_accepts_it(postgrest):
+    with client.stream(
+        "GET",
+        "/api/orders/export",
+        params={"organization_id": ORG},
+        headers={"Accept-Encoding": "gzip"},
+    ) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(gzip.decompress(raw).decode().splitlines()) == len(ORDERS)
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip;q=0, identity", "br", "*;q=0", "x-gzip;q=0"])
+def test_gzip_is_not_applied_when_the_client_refuses_it(postgrest, accept_encoding):
+    response = client.get(
+        "/api/orders/export",
+        params={"organization_id": ORG},
+        headers={"Accept-Encoding": accept_encoding},
+    )
+
+    assert "content-encoding" not in response.headers
+    assert len(response.text.splitlines()) == len(ORDERS)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip", True),
+        ("deflate, gzip;q=0.5", True),
+        ("GZIP; Q=1.0", True),
+        ("*", True),
+        ("gzip;q=0, *", False),
+        ("gzip;q=0.0", False),
+        ("identity", False),
+        ("", False),
+        (None, False),
+    ],
+)
+def test_accepts_gzip_reads_the_q_value(accept_encoding, expected):
+    assert order_export.accepts_gzip(accept_encoding) is expected
+
+
+def test_csv_cells_that_would_be_formulas_are_quoted(postgrest):
+    postgrest["orders"] = [{
+        **ORDERS[0],
+        "order_comments": "=HYPERLINK(\"http://x\")",
+        "order_reason": "-2+3",
+        "customer": {**ORDERS[0]["customer"], "name": "@SUM(A1)", "phone": "+5076000000"},
+    }]
+
+    response = client.get("/api/orders/export", params={"organization_id": ORG, "format": "csv"})
+
+    row = next(csv.DictReader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert row["order_comments"] == "'=HYPERLINK(\"http://x\")"
+    assert row["order_reason"] == "'-2+3"
+    assert row["customer_name"] == "'@SUM(A1)"
+    assert row["customer_phone"] == "'+5076000000"
+    assert row["vehicle_plate"] == "AB5"
+    assert row["total_amount"] == "52.5"
+
+
+def test_an_upstream_error_on_the_first_page_is_a_normal_error_response(postgrest):
+    postgrest["status"] = 503
+
+    response = client.get("/api/orders/export", params={"organization_id": ORG})
+
+    assert response.status_code == 503
+
+
+def test_unknown_format_is_rejected(postgrest):
+    response = client.get("/api/orders/export", params={"organization_id": ORG, "format": "xlsx"})
+
+    assert response.status_code == 422
+    assert postgrest["requests"] == []
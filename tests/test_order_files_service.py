@@ -0,0 +1,226 @@
+"""Tests for services/order_files_service.py: signed-URL batching and caching,
+and the concurrent streaming upload pipeline.
+
+The Storage batch call is replaced with a fake that records each batch, and the
+signed-URL cache is swapped for one on a fake clock, so no request leaves the
+process and expiry is deterministic. Uploads go to an httpx.MockTransport.
+"""
+
+import asyncio
+import io
+import json
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+import services.order_files_service as service_module
+from core.ttl_cache import TTLCache
+from services.order_files_service import sign_paths
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    cache = TTLCache(
+        ttl=service_module.SIGNED_URL_EXPIRY_SECONDS
+        - service_module.SIGNED_URL_SAFETY_MARGIN_SECONDS,
+        clock=clock,
+    )
+    monkeypatch.setattr(service_module, "_signed_url_cache", cache)
+    return clock
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    calls = []
+
+    async def fake_sign_batch(paths):
+        calls.append(list(paths))
+        return {p: f"https://signed.test/{p}?token=t{len(calls)}" for p in paths}
+
+    monkeypatch.setattr(service_module, "_sign_batch", fake_sign_batch)
+    return calls
+
+
+async def test_many_paths_are_signed_in_one_batch_and_deduped(clock, batches):
+    signed = await sign_paths(["o1/a.jpg", "o1/b.jpg", "o1/a.jpg", ""])
+
+    assert batches == [["o1/a.jpg", "o1/b.jpg"]]
+    assert set(signed) == {"o1/a.jpg", "o1/b.jpg"}
+
+
+async def test_recently_signed_paths_come_from_the_cache(clock, batches):
+    first = await sign_paths(["o1/a.jpg"])
+    second = await sign_paths(["o1/a.jpg", "o1/c.jpg"])
+
+    assert batches == [["o1/a.jpg"], ["o1/c.jpg"]]
+    assert second["o1/a.jpg"] == first["o1/a.jpg"]
+    assert service_module._signed_url_cache.stats()["hits"] == 1
+
+
+async def test_cached_urls_are_resigned_inside_the_safety_margin(clock, batches):
+    await sign_paths(["o1/a.jpg"])
+
+    clock.now = (
+        service_module.SIGNED_URL_EXPIRY_SECONDS
+        - service_module.SIGNED_URL_SAFETY_MARGIN_SECONDS
+    )
+    await sign_paths(["o1/a.jpg"])
+
+    assert len(batches) == 2
+
+
+async def test_batches_are_capped(clock, batches, monkeypatch):
+    monkeypatch.setattr(service_module, "_SIGN_BATCH_SIZE", 2)
+
+    await sign_paths(["a", "b", "c", "d", "e"])
+
+    assert [len(b) for b in batches] == [2, 2, 1]
+
+
+async def test_signing_failure_yields_none_and_is_not_cached(clock, monkeypatch):
+    async def failing(paths):
+        raise RuntimeError("storage down")
+
+    monkeypatch.setattr(service_module, "_sign_batch", failing)
+
+    assert await sign_paths(["o1/a.jpg"]) == {"o1/a.jpg": None}
+    assert len(service_module._signed_url_cache) == 0
+
+
+async def test_sign_batch_posts_all_paths_and_absolutizes_urls(mock_http):
+    seen = {}
+
+    def handler(request):
+        seen["url"] = str(request.url)
+        seen["body"] = json.loads(request.content)
+        return httpx.Response(
+            200,
+            json=[
+                {"path": "o1/a.jpg", "signedURL": "/object/sign/order-files/o1/a.jpg?token=x", "error": None},
+                {"path": "o1/gone.jpg", "signedURL": None, "error": "Either the object does not exist"},
+            ],
+        )
+
+    mock_http(handler, service_module)
+
+    signed = await service_module._sign_batch(["o1/a.jpg", "o1/gone.jpg"])
+
+    assert seen["url"].endswith("/storage/v1/object/sign/order-files")
+    assert seen["body"]["paths"] == ["o1/a.jpg", "o1/gone.jpg"]
+    assert signed["o1/a.jpg"] == (
+        f"{service_module._STORAGE_URL}/object/sign/order-files/o1/a.jpg?token=x"
+    )
+    assert signed["o1/gone.jpg"] is None
+
+
+ORDER_ID = "44444444-4444-4444-4444-444444444444"
+
+
+def make_upload(name, data, content_type="image/jpeg", declare_size=True):
+    return UploadFile(
+        file=io.BytesIO(data),
+        filename=name,
+        size=len(data) if declare_size else None,
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+class FakeOrderFileRepository:
+    created = []
+
+    async def create_many(self, records):
+        rows = [
+            {**r, "id": f"00000000-0000-0000-0000-00000000000{i}",
+             "uploaded_at": datetime.now(timezone.utc).isoformat()}
+            for i, r in enumerate(records)
+        ]
+        FakeOrderFileRepository.created = rows
+        return rows
+
+
+@pytest.fixture
+def storage(monkeypatch, mock_http, clock, batches):
+    """Fake Storage upload endpoint; records bodies and peak concurrency."""
+    state = {"bodies": {}, "in_flight": 0, "peak": 0, "fail": set(), "removed": []}
+
+    async def handler(request):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            body = await request.aread()
+            await asyncio.sleep(0.01)
+            path = request.url.path.split(f"/object/{service_module.BUCKET}/", 1)[1]
+            if any(name in path for name in state["fail"]):
+                return httpx.Response(500, json={"error": "boom"})
+            state["bodies"][path] = body
+            return httpx.Response(200, json={"Key": path})
+        finally:
+            state["in_flight"] -= 1
+
+    async def fake_remove(paths):
+        state["removed"].extend(paths)
+
+    mock_http(handler, service_module)
+    monkeypatch.setattr(service_module, "_remove_paths", fake_remove)
+    monkeypatch.setattr(service_module, "OrderFileRepository", FakeOrderFileRepository)
+    monkeypatch.setattr(service_module, "_UPLOAD_CHUNK_SIZE", 1024)
+    return state
+
+
+async def test_uploads_stream_concurrently_with_a_bound(storage, monkeypatch):
+    monkeypatch.setattr(service_module.settings, "ORDER_FILE_UPLOAD_CONCURRENCY", 2)
+    files = [make_upload(f"p{i}.jpg", bytes([i]) * 5000) for i in range(5)]
+
+    outs = await service_module.upload_files_for_order(ORDER_ID, files)
+
+    assert storage["peak"] == 2
+    assert len(outs) == 5
+    assert sorted(storage["bodies"].values()) == sorted(bytes([i]) * 5000 for i in range(5))
+    assert all(out.upload_ms is not None and out.upload_ms >= 0 for out in outs)
+    assert all(out.signed_url for out in outs)
+    assert storage["removed"] == []
+
+
+async def test_one_failed_upload_removes_every_path(storage):
+    storage["fail"].add("bad")
+    files = [make_upload("ok.jpg", b"x" * 10), make_upload("bad.jpg", b"y" * 10)]
+
+    with pytest.raises(HTTPException) as exc:
+        await service_module.upload_files_for_order(ORDER_ID, files)
+
+    assert exc.value.status_code == 502
+    assert len(storage["removed"]) == 2
+    assert all(p.startswith(f"{ORDER_ID}/") for p in storage["removed"])
+
+
+async def test_declared_type_and_size_are_rejected_before_any_upload(storage):
+    files = [make_upload("a.jpg", b"x"), make_upload("notes.txt", b"x", "text/plain")]
+
+    with pytest.raises(HTTPException) as exc:
+        await service_module.upload_files_for_order(ORDER_ID, files)
+
+    assert exc.value.status_code == 415
+    assert storage["bodies"] == {}
+
+
+async def test_size_is_enforced_while_streaming_when_undeclared(storage, monkeypatch):
+    monkeypatch.setattr(service_module, "MAX_FILE_SIZE", 3000)
+    files = [make_upload("big.jpg", b"z" * 5000, declare_size=False)]
+
+    with pytest.raises(HTTPException) as exc:
+        await service_module.upload_files_for_order(ORDER_ID, files)
+
+    assert exc.value.status_code == 413
+    assert len(storage["removed"]) == 1
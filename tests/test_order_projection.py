@@ -0,0 +1,102 @@
+"""Tests for the order listing projections: repositories.orders.order_select
+and the preset/fields/include query params of the /api/orders listings.
+"""
+
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import repositories.orders as orders_repo_module
+from api.v1.endpoints import orders as orders_endpoint
+from repositories.orders import order_select
+
+app = FastAPI()
+app.include_router(orders_endpoint.router, prefix="/api/orders")
+client = TestClient(app)
+
+ORG = "11111111-1111-1111-1111-111111111111"
+
+
+def test_default_is_the_historical_full_projection():
+    assert order_select() == (
+        "*,customer:customers(*),vehicle:vehicles(*),order_files(*),"
+        "order_field_values(*,field_definition:field_definitions(*))"
+    )
+
+
+def test_kanban_preset_selects_board_columns_and_slim_embeds():
+    assert order_select("kanban") == (
+        "id,order_status,priority,service_type,received_at,date_order,assigned_to,"
+        "customer:customers(id,name,phone),vehicle:vehicles(id,make,model,plate)"
+    )
+
+
+def test_fields_replace_the_columns_and_always_keep_the_cursor_keys():
+    assert order_select("kanban", fields=["order_status"]) == (
+        "id,date_order,order_status,"
+        "customer:customers(id,name,phone),vehicle:vehicles(id,make,model,plate)"
+    )
+
+
+def test_include_replaces_the_embeds_keeping_a_presets_narrowing():
+    assert order_select("kanban", include=["vehicle", "order_files"]) == (
+        "id,order_status,priority,service_type,received_at,date_order,assigned_to,"
+        "vehicle:vehicles(id,make,model,plate),order_files(*)"
+    )
+    assert order_select(fields=["id"], include=[]) == "id,date_order"
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"preset": "everything"},
+        {"fields": ["order_status", "password"]},
+        {"fields": ["*"]},
+        {"include": ["customer(*),secrets(*)"]},
+    ],
+)
+def test_unknown_names_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        order_select(**kwargs)
+
+
+@pytest.fixture
+def selects(mock_http):
+    seen = []
+
+    def handler(request):
+        if request.url.params["select"] != orders_repo_module.ORDER_VERSIONS_SELECT:
+            seen.append(request.url.params["select"])
+        return httpx.Response(200, json=[])
+
+    mock_http(handler, orders_repo_module)
+    return seen
+
+
+def test_listing_endpoints_pass_the_projection_to_postgrest(selects):
+    listing = client.get(
+        "/api/orders/fullOrderDetails",
+        params={"organization_id": ORG, "fields": "order_status, total_amount", "include": "customer"},
+    )
+    page = client.get(
+        "/api/orders/fullOrderDetails/page",
+        params={"organization_id": ORG, "preset": "kanban"},
+    )
+
+    assert listing.status_code == 200 and page.status_code == 200
+    assert selects == [
+        "id,date_order,order_status,total_amount,customer:customers(*)",
+        order_select("kanban"),
+    ]
+
+
+def test_listing_endpoints_answer_400_for_unknown_fields(selects):
+    response = client.get(
+        "/api/orders/fullOrderDetails", params={"organization_id": ORG, "fields": "nope"}
+    )
+
+    assert response.status_code == 400
+    assert "nope" in response.json()["detail"]
+    assert selects == []
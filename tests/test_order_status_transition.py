@@ -0,0 +1,219 @@
+"""Tests for atomic order status transitions
+(OrderRepository.transition_status / get_status and orders_service.update_order).
+
+PostgREST is an httpx.MockTransport that records every request; the
+transition_order_status RPC is either answered or reported missing
+(PGRST202), which exercises the PostgREST fallback. The RPC fake answers
+a target status missing from the catalog like the SQL function: PT422.
+"""
+
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+import repositories.orders as orders_repo_module
+import repositories.rpc as rpc_module
+from api.v1.endpoints import orders as orders_endpoint
+from schemas.order import OrderUpdate
+from services import orders_service
+
+app = FastAPI()
+app.include_router(orders_endpoint.router, prefix="/api/orders")
+client = TestClient(app)
+
+ORG = "11111111-1111-1111-1111-111111111111"
+ORDER_ID = "00000000-0000-0000-0000-000000000001"
+
+CATALOG = {
+    code: {
+        "id": f"00000000-0000-0000-0000-0000000000a{n}",
+        "status_type": status_type,
+        "code": code,
+        "label": code,
+        "sort_order": n,
+        "is_terminal": False,
+        "created_at": "2024-01-01T00:00:00+00:00",
+    }
+    for n, (code, status_type) in enumerate(
+        (("aprobado", "workshop"), ("contactado", "followup")), start=1
+    )
+}
+
+
+def _order(status):
+    return {
+        "id": ORDER_ID,
+        "organization_id": ORG,
+        "customer_id": "00000000-0000-0000-0000-0000000000c1",
+        "service_type": "mecanica",
+        "order_status": status,
+        "total_amount": "0.00",
+        "date_order": "2024-05-01T10:00:00+00:00",
+    }
+
+
+@pytest.fixture
+def postgrest(monkeypatch, mock_http):
+    monkeypatch.setattr(rpc_module, "_missing_rpcs", {})
+    state = {
+        "requests": [],
+        "rpc": True,
+        "status": "recibido",
+        "patch_matches": True,
+        "catalog": dict(CATALOG),
+    }
+
+    def handler(request):
+        path = request.url.path
+        body = json.loads(request.content) if request.content else None
+        state["requests"].append((request.method, path.rsplit("/", 1)[-1], request.url.params, body))
+        if path.endswith("/order_statuses"):
+            row = state["catalog"].get(request.url.params["code"][len("eq."):])
+            return httpx.Response(200, json=[row] if row else [])
+        if path.endswith("/rpc/transition_order_status"):
+            if not state["rpc"]:
+                return httpx.Response(404, json={"code": "PGRST202", "message": "not found"})
+            if body["p_order_id"] != ORDER_ID:
+                return httpx.Response(200, json={"order": None, "from_status": None})
+            to_status = body["p_changes"].get("order_status")
+            if to_status not in (None, state["status"]) and to_status not in state["catalog"]:
+                return httpx.Response(422, json={"code": "PT422", "message": "Unknown order status"})
+            updated = {**_order(state["status"]), **body["p_changes"]}
+            return httpx.Response(200, json={"order": updated, "from_status": state["status"]})
+        if path.endswith("/order_status_history"):
+            return httpx.Response(201, json=[body])
+        if request.method == "GET":
+            return httpx.Response(200, json=[_order(state["status"])])
+        if request.method == "PATCH":
+            rows = [{**_order(state["status"]), **body}] if state["patch_matches"] else []
+            return httpx.Response(200, json=rows)
+        raise AssertionError(f"unexpected {request.method} {path}")
+
+    mock_http(handler, orders_repo_module, rpc_module)
+    return state
+
+
+def _calls(state):
+    return [(method, name) for method, name, _, _ in state["requests"]]
+
+
+async def test_status_change_is_one_rpc_round_trip(postgrest):
+    updated = await orders_service.update_order(
+        ORDER_ID, OrderUpdate(order_status="aprobado", order_comments="ok")
+    )
+
+    assert updated.order_status == "aprobado"
+    assert _calls(postgrest) == [("POST", "transition_order_status")]
+    payload = postgrest["requests"][-1][3]
+    assert payload["p_changes"] == {"order_status": "aprobado", "order_comments": "ok"}
+    assert payload["p_expected_status"] is None
+    assert "p_status_type" not in payload
+
+
+async def test_unknown_order_is_a_404(postgrest):
+    with pytest.raises(HTTPException) as exc:
+        await orders_service.update_order(
+            "00000000-0000-0000-0000-000000000009", OrderUpdate(order_status="aprobado")
+        )
+
+    assert exc.value.status_code == 404
+
+
+async def test_other_fields_are_a_plain_patch(postgrest):
+    await orders_service.update_order(ORDER_ID, OrderUpdate(order_comments="ok"))
+
+    assert _calls(postgrest) == [("PATCH", "orders")]
+
+
+async def test_fallback_patches_on_the_status_it_read_and_records_history(postgrest):
+    postgrest["rpc"] = False
+
+    await orders_service.update_order(ORDER_ID, OrderUpdate(order_status="aprobado"))
+
+    assert _calls(postgrest) == [
+        ("POST", "transition_order_status"),
+        ("GET", "orders"),
+        ("GET", "order_statuses"),
+        ("PATCH", "orders"),
+        ("POST", "order_status_history"),
+    ]
+    requests = postgrest["requests"]
+    assert requests[1][2]["select"] == "id,organization_id,order_status"
+    assert requests[3][2]["order_status"] == "eq.recibido"
+    history = requests[4][3]
+    assert (history["from_status"], history["to_status"]) == ("recibido", "aprobado")
+
+
+async def test_fallback_reports_a_concurrent_change_as_a_conflict(postgrest):
+    postgrest["rpc"] = False
+    postgrest["patch_matches"] = False
+
+    with pytest.raises(HTTPException) as exc:
+        await orders_service.update_order(ORDER_ID, OrderUpdate(order_status="aprobado"))
+
+    assert exc.value.status_code == 409
+    assert ("POST", "order_status_history") not in _calls(postgrest)
+
+
+def test_expected_status_mismatch_is_a_409_without_writes(postgrest):
+    postgrest["rpc"] = False
+
+    response = client.patch(
+        f"/api/orders/{ORDER_ID}",
+        params={"expected_status": "en_proceso"},
+        json={"order_status": "aprobado"},
+    )
+
+    assert response.status_code == 409
+    assert _calls(postgrest) == [("POST", "transition_order_status"), ("GET", "orders")]
+
+
+def test_status_endpoint_reads_only_the_status(postgrest):
+    response = client.get(f"/api/orders/{ORDER_ID}/status")
+
+    assert response.status_code == 200
+    assert response.json() == {"order_status": "recibido"}
+    assert postgrest["requests"][0][2]["select"] == "id,organization_id,order_status"
+
+
+async def test_resending_the_current_status_is_one_rpc_round_trip(postgrest):
+    await orders_service.update_order(ORDER_ID, OrderUpdate(order_status="recibido"))
+
+    assert _calls(postgrest) == [("POST", "transition_order_status")]
+
+
+async def test_fallback_history_status_type_comes_from_the_catalog(postgrest):
+    postgrest["rpc"] = False
+
+    await orders_service.update_order(ORDER_ID, OrderUpdate(order_status="contactado"))
+
+    lookup = postgrest["requests"][2]
+    assert lookup[2]["code"] == "eq.contactado"
+    assert postgrest["requests"][-1][3]["status_type"] == "followup"
+
+
+async def test_fallback_skips_the_catalog_when_the_status_is_unchanged(postgrest):
+    postgrest["rpc"] = False
+
+    await orders_service.update_order(ORDER_ID, OrderUpdate(order_status="recibido"))
+
+    assert _calls(postgrest) == [
+        ("POST", "transition_order_status"),
+        ("GET", "orders"),
+        ("PATCH", "orders"),
+    ]
+
+
+@pytest.mark.parametrize("rpc", [True, False])
+def test_status_outside_the_catalog_is_a_422_without_writes(postgrest, rpc):
+    postgrest["rpc"] = rpc
+    del postgrest["catalog"]["aprobado"]
+
+    response = client.patch(f"/api/orders/{ORDER_ID}", json={"order_status": "aprobado"})
+
+    assert response.status_code == 422
+    assert ("PATCH", "orders") not in _calls(postgrest)
+    assert ("POST", "order_status_history") not in _calls(postgrest)
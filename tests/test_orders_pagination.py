@@ -0,0 +1,116 @@
+"""Tests for the keyset pagination of the full order details listing
+(OrderRepository.list_full_details and
+orders_service.get_full_order_details_page).
+
+The pooled HTTP client is replaced with an httpx.MockTransport that records
+the PostgREST query and answers from a canned, already-sorted list.
+"""
+
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import repositories.orders as orders_repo_module
+from services import orders_service
+
+ORG = "11111111-1111-1111-1111-111111111111"
+
+
+def _order(n, date_order):
+    return {
+        "id": f"00000000-0000-0000-0000-{n:012d}",
+        "date_order": date_order,
+        "order_files": [],
+    }
+
+
+ORDERS = [
+    _order(5, "2024-05-03T10:00:00+00:00"),
+    _order(4, "2024-05-02T10:00:00+00:00"),
+    _order(3, "2024-05-02T10:00:00+00:00"),
+    _order(2, "2024-05-01T10:00:00+00:00"),
+    _order(1, "2024-05-01T09:00:00+00:00"),
+]
+
+
+@pytest.fixture
+def requests(mock_http):
+    """Serve ORDERS page by page: a request with `or` starts after the row
+    whose id appears in the filter."""
+    seen = []
+
+    def handler(request):
+        params = request.url.params
+        seen.append(params)
+        rows = ORDERS
+        keyset = params.get("or")
+        if keyset:
+            last = next(i for i, row in enumerate(ORDERS) if row["id"] in keyset)
+            rows = ORDERS[last + 1:]
+        return httpx.Response(200, json=rows[: int(params["limit"])])
+
+    mock_http(handler, orders_repo_module)
+    return seen
+
+
+async def test_pages_follow_the_cursor_to_the_end(requests):
+    first = await orders_service.get_full_order_details_page(ORG, limit=2, sign_urls=False)
+    second = await orders_service.get_full_order_details_page(
+        ORG, limit=2, cursor=first["next_cursor"], sign_urls=False
+    )
+    third = await orders_service.get_full_order_details_page(
+        ORG, limit=2, cursor=second["next_cursor"], sign_urls=False
+    )
+
+    assert [o["id"] for o in first["orders"]] == [ORDERS[0]["id"], ORDERS[1]["id"]]
+    assert [o["id"] for o in second["orders"]] == [ORDERS[2]["id"], ORDERS[3]["id"]]
+    assert [o["id"] for o in third["orders"]] == [ORDERS[4]["id"]]
+    assert third["next_cursor"] is None
+    # One extra row is asked for to detect the last page.
+    assert requests[0]["limit"] == "3"
+    assert "or" not in requests[0]
+
+
+async def test_cursor_becomes_a_date_then_id_keyset_filter(requests):
+    first = await orders_service.get_full_order_details_page(ORG, limit=2, sign_urls=False)
+    await orders_service.get_full_order_details_page(
+        ORG, limit=2, cursor=first["next_cursor"], sign_urls=False
+    )
+
+    params = requests[1]
+    last = ORDERS[1]
+    assert params["order"] == "date_order.desc,id.desc"
+    assert params["organization_id"] == f"eq.{ORG}"
+    assert params["or"] == (
+        f'(date_order.lt."{last["date_order"]}",'
+        f'and(date_order.eq."{last["date_order"]}",id.lt."{last["id"]}"))'
+    )
+
+
+async def test_orders_without_a_date_order_page_before_the_dated_ones(requests):
+    await orders_service.OrderRepository().list_full_details(
+        ORG, after=(None, ORDERS[0]["id"])
+    )
+
+    assert requests[0]["or"] == (
+        f'(and(date_order.is.null,id.lt."{ORDERS[0]["id"]}"),date_order.not.is.null)'
+    )
+
+
+async def test_offset_mode_is_unchanged_apart_from_the_id_tiebreak(requests):
+    await orders_service.get_full_order_details(ORG, limit=2, offset=4, sign_urls=False)
+
+    assert requests[0]["offset"] == "4"
+    assert requests[0]["limit"] == "2"
+    assert requests[0]["order"] == "date_order.desc,id.desc"
+    assert "or" not in requests[0]
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "WzEsMl0", "WyJ4IiwiMSJd"])
+async def test_a_cursor_we_did_not_issue_is_rejected(requests, cursor):
+    with pytest.raises(HTTPException) as exc:
+        await orders_service.get_full_order_details_page(ORG, cursor=cursor, sign_urls=False)
+
+    assert exc.value.status_code == 400
+    assert requests == []
@@ -0,0 +1,127 @@
+"""Tests for the connected-card cache (repositories/pipefy_card_cache.py).
+
+Pipefy is replaced by fake fetchers that count calls, the clock is fake, and
+the disk tier is a SQLite file under pytest's tmp_path.
+"""
+
+import pytest
+
+from core.disk_store import SqliteStore
+from repositories.pipefy_card_cache import PipefyCardCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakePipefy:
+    def __init__(self):
+        self.cards = {"c1": {"id": "c1", "title": "Juan", "updated_at": "v1"}}
+        self.fetches = []
+        self.revalidations = []
+
+    async def fetch(self, card_id):
+        self.fetches.append(card_id)
+        return dict(self.cards[card_id])
+
+    async def fetch_updated_at(self, card_id):
+        self.revalidations.append(card_id)
+        return self.cards[card_id]["updated_at"]
+
+
+@pytest.fixture
+def pipefy():
+    return FakePipefy()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_cache(clock, store=None):
+    return PipefyCardCache(ttl=60, max_age=3600, max_entries=100, store=store, clock=clock)
+
+
+async def get(cache, pipefy, card_id="c1"):
+    return await cache.get(card_id, pipefy.fetch, pipefy.fetch_updated_at)
+
+
+async def test_fresh_entries_are_served_without_asking_pipefy(clock, pipefy):
+    cache = make_cache(clock)
+
+    await get(cache, pipefy)
+    clock.now += 59
+    card = await get(cache, pipefy)
+
+    assert card["title"] == "Juan"
+    assert pipefy.fetches == ["c1"]
+    assert pipefy.revalidations == []
+    assert cache.counters["fresh"] == 1
+
+
+async def test_stale_unchanged_card_is_revalidated_by_updated_at_only(clock, pipefy):
+    cache = make_cache(clock)
+    await get(cache, pipefy)
+
+    clock.now += 61
+    await get(cache, pipefy)
+    clock.now += 30
+    await get(cache, pipefy)
+
+    assert pipefy.fetches == ["c1"]
+    assert pipefy.revalidations == ["c1"]
+    assert cache.counters["revalidated"] == 1
+
+
+async def test_stale_changed_card_is_fetched_again(clock, pipefy):
+    cache = make_cache(clock)
+    await get(cache, pipefy)
+
+    pipefy.cards["c1"] = {"id": "c1", "title": "Juan Pérez", "updated_at": "v2"}
+    clock.now += 61
+    card = await get(cache, pipefy)
+
+    assert card["title"] == "Juan Pérez"
+    assert pipefy.fetches == ["c1", "c1"]
+
+
+async def test_revalidation_failure_falls_back_to_a_full_fetch(clock, pipefy):
+    cache = make_cache(clock)
+    await get(cache, pipefy)
+
+    async def broken(card_id):
+        raise RuntimeError("pipefy down")
+
+    clock.now += 61
+    await cache.get("c1", pipefy.fetch, broken)
+
+    assert pipefy.fetches == ["c1", "c1"]
+
+
+async def test_disk_tier_warms_a_cold_cache(clock, pipefy, tmp_path):
+    path = str(tmp_path / "cards.sqlite")
+    await get(make_cache(clock, SqliteStore(path, table="pipefy_cards")), pipefy)
+
+    cold = make_cache(clock, SqliteStore(path, table="pipefy_cards"))
+    card = await get(cold, pipefy)
+
+    assert card["id"] == "c1"
+    assert pipefy.fetches == ["c1"]
+    assert cold.counters["disk_hits"] == 1
+
+
+def test_disk_store_expires_entries_by_max_age(tmp_path, monkeypatch):
+    store = SqliteStore(str(tmp_path / "kv.sqlite"))
+    store.set("k", {"v": 1})
+
+    assert store.get("k", max_age=60) == {"v": 1}
+
+    real_time = __import__("time").time
+    monkeypatch.setattr("core.disk_store.time.time", lambda: real_time() + 120)
+    assert store.get("k", max_age=60) is None
+    assert store.get("k") is None
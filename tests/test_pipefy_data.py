@@ -0,0 +1,202 @@
+"""Tests for repositories/pipefy_data.py: retry/rate limiting of GraphQL
+calls and the batched (aliased) card loader.
+
+The GraphQL endpoint is an httpx.MockTransport, so no request leaves the
+process.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import repositories.pipefy_data as pipefy_data
+from core.token_bucket import TokenBucket
+from repositories.pipefy_card_cache import PipefyCardCache
+
+
+@pytest.fixture
+def graphql(monkeypatch, mock_http):
+    """Queue of canned responses for the Pipefy endpoint; records attempts."""
+    state = {"responses": [], "attempts": 0, "sleeps": []}
+
+    def handler(request):
+        state["attempts"] += 1
+        outcome = state["responses"].pop(0)
+        if callable(outcome):
+            return outcome(json.loads(request.content))
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def fake_sleep(seconds):
+        state["sleeps"].append(seconds)
+
+    mock_http(handler, pipefy_data, attribute="pipefy_client")
+    monkeypatch.setattr(pipefy_data.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(pipefy_data, "rate_limiter", TokenBucket(1000, 1000))
+    monkeypatch.setattr(pipefy_data.settings, "PIPEFY_MAX_RETRIES", 3)
+    return state
+
+
+async def test_429_and_5xx_are_retried_with_backoff(graphql):
+    graphql["responses"] = [
+        httpx.Response(429, headers={"retry-after": "2"}),
+        httpx.Response(503),
+        httpx.Response(200, json={"data": {"c0": {"id": "1"}}}),
+    ]
+
+    card = await pipefy_data.PipeFyDataRepository("token").get_card_details("1")
+
+    assert card == {"id": "1"}
+    assert graphql["attempts"] == 3
+    assert graphql["sleeps"][0] == 2.0
+    assert 0 < graphql["sleeps"][1] <= pipefy_data.settings.PIPEFY_BACKOFF_BASE_SECONDS * 2
+
+
+async def test_transport_errors_are_retried(graphql):
+    graphql["responses"] = [
+        httpx.ConnectError("reset"),
+        httpx.Response(200, json={"data": {"c0": {"id": "1"}}}),
+    ]
+
+    await pipefy_data.PipeFyDataRepository("token").get_card_details("1")
+
+    assert graphql["attempts"] == 2
+
+
+async def test_client_errors_are_not_retried(graphql):
+    graphql["responses"] = [httpx.Response(401)]
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await pipefy_data.PipeFyDataRepository("token").get_card_details("1")
+
+    assert graphql["attempts"] == 1
+
+
+async def test_retries_give_up_after_the_limit(graphql):
+    graphql["responses"] = [httpx.Response(502) for _ in range(4)]
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await pipefy_data.PipeFyDataRepository("token").get_card_details("1")
+
+    assert graphql["attempts"] == 4
+    assert len(graphql["sleeps"]) == 3
+
+
+def echo_cards(missing=()):
+    """Answer an aliased GetCards query with {"id": <id>} per alias."""
+    def answer(payload):
+        data, errors = {}, []
+        for name, card_id in payload["variables"].items():
+            alias = "c" + name[2:]
+            if card_id in missing:
+                data[alias] = None
+                errors.append({"message": "Card not found", "path": [alias]})
+            else:
+                data[alias] = {"id": card_id}
+        body = {"data": data}
+        if errors:
+            body["errors"] = errors
+        answer.payloads.append(payload)
+        return httpx.Response(200, json=body)
+
+    answer.payloads = []
+    return answer
+
+
+async def test_lookups_in_the_same_tick_share_one_aliased_query(graphql):
+    answer = echo_cards()
+    graphql["responses"] = [answer]
+    repo = pipefy_data.PipeFyDataRepository("token")
+
+    cards = await asyncio.gather(
+        repo.get_card_details("10"),
+        repo.get_card_details("20"),
+        repo.get_card_details("10"),
+    )
+
+    assert [c["id"] for c in cards] == ["10", "20", "10"]
+    assert graphql["attempts"] == 1
+    query = answer.payloads[0]["query"]
+    assert "c0: card(id: $id0)" in query and "c1: card(id: $id1)" in query
+    assert "fragment CardDetails on Card" in query
+    assert answer.payloads[0]["variables"] == {"id0": "10", "id1": "20"}
+
+
+async def test_prefetched_cards_are_served_once_per_repository(graphql):
+    graphql["responses"] = [echo_cards(), echo_cards(), echo_cards()]
+    repo = pipefy_data.PipeFyDataRepository("token")
+
+    await repo.prefetch_cards(["1", "2"])
+    assert (await repo.get_card_details("2"))["id"] == "2"
+    assert graphql["attempts"] == 1
+
+    await pipefy_data.PipeFyDataRepository("token").get_card_details("2")
+    assert graphql["attempts"] == 2
+
+    await repo.get_card_details("2")
+    assert graphql["attempts"] == 3
+
+
+async def test_delivered_cards_are_not_kept(graphql):
+    graphql["responses"] = [echo_cards(), echo_cards()]
+    repo = pipefy_data.PipeFyDataRepository("token")
+    loader = repo._card_loader
+
+    await repo.prefetch_cards(["1", "2"])
+    await asyncio.gather(repo.get_card_details("1"), repo.get_card_details("2"))
+    await repo.get_card_details("3")
+
+    assert loader._futures == {}
+    assert loader._primed == set()
+
+
+async def test_batches_are_capped(graphql, monkeypatch):
+    monkeypatch.setattr(pipefy_data, "CARD_BATCH_SIZE", 2)
+    graphql["responses"] = [echo_cards(), echo_cards()]
+    repo = pipefy_data.PipeFyDataRepository("token")
+
+    await repo.prefetch_cards(["1", "2", "3"])
+
+    assert graphql["attempts"] == 2
+
+
+async def test_a_card_error_fails_only_that_card_and_is_not_memoized(graphql):
+    graphql["responses"] = [echo_cards(missing={"404"}), echo_cards()]
+    repo = pipefy_data.PipeFyDataRepository("token")
+
+    ok, missing = await asyncio.gather(
+        repo.get_card_details("1"),
+        repo.get_card_details("404"),
+        return_exceptions=True,
+    )
+
+    assert ok == {"id": "1"}
+    assert "Card not found" in str(missing)
+    assert (await repo.get_card_details("404"))["id"] == "404"
+    assert graphql["attempts"] == 2
+
+
+async def test_cached_lookup_revalidates_with_an_updated_at_query(graphql, monkeypatch):
+    clock = {"now": 0.0}
+    cache = PipefyCardCache(ttl=60, max_age=3600, max_entries=10, clock=lambda: clock["now"])
+    monkeypatch.setattr(pipefy_data, "get_card_cache", lambda: cache)
+
+    def card_answer(payload):
+        card_answer.queries.append(payload["query"])
+        return httpx.Response(200, json={"data": {"c0": {"id": "7", "updated_at": "v1"}}})
+
+    card_answer.queries = []
+    graphql["responses"] = [card_answer, card_answer]
+
+    await pipefy_data.PipeFyDataRepository("token").get_card_details("7", use_cache=True)
+    clock["now"] = 61
+    card = await pipefy_data.PipeFyDataRepository("token").get_card_details("7", use_cache=True)
+
+    assert card["id"] == "7"
+    assert graphql["attempts"] == 2
+    assert "...CardDetails" in card_answer.queries[0]
+    assert "{ id updated_at }" in card_answer.queries[1]
+    assert "CardDetails" not in card_answer.queries[1]
@@ -0,0 +1,57 @@
+"""Tests for the Pipefy sync worker pool (services/pipefy_sync.py).
+
+Card processing is a fake coroutine, so nothing leaves the process.
+"""
+
+import asyncio
+
+from services import pipefy_sync
+from services.pipefy_sync import CardSyncPool, run_card_sync
+
+
+async def test_pool_bounds_concurrency_and_processes_every_card():
+    state = {"in_flight": 0, "peak": 0, "seen": []}
+
+    async def process(card_id):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["seen"].append(card_id)
+        state["in_flight"] -= 1
+
+    ids = [str(i) for i in range(10)]
+    progress = await run_card_sync(ids, process, kind="sync", phase_id="p1", workers=3)
+
+    assert state["peak"] == 3
+    assert sorted(state["seen"]) == sorted(ids)
+    assert (progress.total, progress.done, progress.failed) == (10, 10, 0)
+    assert set(progress.card_ms) == set(ids)
+    assert progress.finished_at is not None
+
+
+async def test_failing_cards_are_recorded_and_do_not_stop_the_rest():
+    async def process(card_id):
+        if card_id == "bad":
+            raise RuntimeError("pipefy said no")
+
+    progress = await run_card_sync(["a", "bad", "b"], process, kind="backup", phase_id="p1", workers=2)
+
+    assert progress.done == 2
+    assert progress.failed == 1
+    assert progress.errors == {"bad": "pipefy said no"}
+
+
+async def test_cards_can_be_submitted_while_workers_run_and_progress_is_listed():
+    async def process(card_id):
+        await asyncio.sleep(0)
+
+    async with CardSyncPool(process, kind="backup-all", phase_id="p9", workers=2) as pool:
+        pool.submit("1")
+        await asyncio.sleep(0.01)
+        pool.submit("2")
+
+    assert pool.progress.done == 2
+    listed = pipefy_sync.get_progress(pool.progress.sync_id)
+    assert listed["phase_id"] == "p9"
+    assert listed["in_flight"] == 0
+    assert pipefy_sync.list_progress()[0]["sync_id"] == pool.progress.sync_id
@@ -0,0 +1,164 @@
+"""Tests for the customer / vehicle search boxes
+(POST /api/orders/customers/search and /vehicles/search via
+CustomerRepository.search_customers / VehicleRepository.search_vehicles).
+
+PostgREST is an httpx.MockTransport that records every request; the
+search_*_ranked RPCs are either answered or reported missing (PGRST202),
+which exercises the capped ilike fallback.
+"""
+
+import json
+import re
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import repositories.orders as orders_repo_module
+import repositories.rpc as rpc_module
+from api.v1.endpoints import orders as orders_endpoint
+
+app = FastAPI()
+app.include_router(orders_endpoint.router, prefix="/api/orders")
+client = TestClient(app)
+
+ORG = "11111111-1111-1111-1111-111111111111"
+
+CUSTOMER = {
+    "id": "00000000-0000-0000-0000-0000000000c1",
+    "organization_id": ORG,
+    "name": "Ana",
+    "phone": "+507 6000-0000",
+    "national_id": "8-123-456",
+    "created_at": "2024-01-01T00:00:00+00:00",
+}
+VEHICLE = {
+    "id": "00000000-0000-0000-0000-0000000000e1",
+    "organization_id": ORG,
+    "plate": "AB1234",
+    "make": "Toyota",
+    "model": "Hilux",
+    "year": 2019,
+    "updated_at": "2024-01-01T00:00:00+00:00",
+}
+
+
+@pytest.fixture
+def postgrest(monkeypatch, mock_http):
+    monkeypatch.setattr(rpc_module, "_missing_rpcs", {})
+    state = {"requests": [], "rpc": True}
+
+    def handler(request):
+        body = json.loads(request.content) if request.content else None
+        name = request.url.path.rsplit("/", 1)[-1]
+        state["requests"].append((request, name, body))
+        row = CUSTOMER if "customers" in name else VEHICLE
+        if name.endswith("_ranked"):
+            if not state["rpc"]:
+                return httpx.Response(404, json={"code": "PGRST202", "message": "not found"})
+            return httpx.Response(200, json=[row])
+        if request.method == "GET":
+            return httpx.Response(200, json=[row])
+        raise AssertionError(f"unexpected {request.method} {request.url}")
+
+    mock_http(handler, orders_repo_module, rpc_module)
+    return state
+
+
+def _calls(state):
+    return [(request.method, name) for request, name, _ in state["requests"]]
+
+
+def test_customer_search_is_one_ranked_rpc(postgrest):
+    response = client.post(
+        f"/api/orders/customers/search?organization_id={ORG}",
+        json={"name": "ana", "phone": "ana", "national_id": "ana"},
+    )
+
+    assert response.status_code == 200
+    assert [row["id"] for row in response.json()] == [CUSTOMER["id"]]
+    assert _calls(postgrest) == [("POST", "search_customers_ranked")]
+    assert postgrest["requests"][0][2] == {
+        "p_organization_id": ORG,
+        "p_name": "ana",
+        "p_phone": "ana",
+        "p_national_id": "ana",
+        "p_limit": orders_repo_module.SEARCH_LIMIT,
+    }
+
+
+def test_vehicle_search_is_one_ranked_rpc_with_the_requested_limit(postgrest):
+    response = client.post(
+        f"/api/orders/vehicles/search?organization_id={ORG}&limit=5",
+        json={"plate": "ab-1234"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()[0]["plate"] == "AB1234"
+    assert _calls(postgrest) == [("POST", "search_vehicles_ranked")]
+    payload = postgrest["requests"][0][2]
+    assert payload["p_plate"] == "ab-1234"
+    assert payload["p_limit"] == 5
+
+
+def test_limit_above_the_cap_is_rejected(postgrest):
+    response = client.post(
+        f"/api/orders/customers/search?organization_id={ORG}&limit=500",
+        json={"name": "ana"},
+    )
+
+    assert response.status_code == 422
+    assert postgrest["requests"] == []
+
+
+def test_fallback_is_a_capped_ilike_query(postgrest):
+    postgrest["rpc"] = False
+
+    response = client.post(
+        f"/api/orders/customers/search?organization_id={ORG}",
+        json={"name": "ana", "phone": "6000"},
+    )
+
+    assert response.status_code == 200
+    assert _calls(postgrest) == [("POST", "search_customers_ranked"), ("GET", "customers")]
+    params = postgrest["requests"][1][0].url.params
+    assert params["or"] == "(name.ilike.*ana*,phone.ilike.*6000*)"
+    assert params["limit"] == str(orders_repo_module.SEARCH_LIMIT)
+
+
+async def test_empty_search_skips_the_rpc_and_lists_the_newest(postgrest):
+    rows = await orders_repo_module.VehicleRepository().search_vehicles(ORG, limit=500)
+
+    assert rows == [VEHICLE]
+    assert _calls(postgrest) == [("GET", "vehicles")]
+    params = postgrest["requests"][0][0].url.params
+    assert "or" not in params
+    assert params["limit"] == str(orders_repo_module.SEARCH_MAX_LIMIT)
+
+
+MIGRATION = Path(__file__).resolve().parent.parent / "migrations" / "015_search_trigram.sql"
+TABLES = {"c": "customers", "v": "vehicles"}
+
+
+def test_every_column_the_ranked_functions_match_has_a_trigram_index():
+    sql = MIGRATION.read_text()
+    indexed = set(re.findall(r"\('idx_\w+_trgm',\s+'(\w+)',\s+'(\w+)'\)", sql))
+    matched = {
+        (TABLES[alias], column)
+        for alias, column in re.findall(r"\b([cv])\.(\w+) (?:I?LIKE search_like_pattern|%)", sql)
+    }
+
+    assert ("vehicles", "plate_key") in matched
+    assert matched <= indexed
+
+
+def test_ranked_functions_resolve_pg_trgm_from_the_extensions_schema():
+    sql = MIGRATION.read_text()
+
+    assert "CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions" in sql
+    for name in ("search_customers_ranked", "search_vehicles_ranked"):
+        definition = sql[sql.index(f"FUNCTION public.{name}("):]
+        definition = definition[:definition.index("$function$")]
+        assert "SET search_path TO public, extensions" in definition
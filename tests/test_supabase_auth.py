@@ -0,0 +1,131 @@
+"""Tests for local token verification and the app_users cache
+(services/supabase_auth.py).
+
+Tokens are minted with PyJWT against a test secret; the app_users lookup is
+monkeypatched so no request leaves the process.
+"""
+
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+import services.supabase_auth as auth_module
+from services.supabase_auth import (
+    get_cached_app_user_with_org,
+    invalidate_app_user,
+    verify_token_locally,
+)
+
+SECRET = "test-jwt-secret-with-enough-length-for-hs256"
+USER_ID = "11111111-1111-1111-1111-111111111111"
+
+
+def _token(secret=SECRET, **overrides):
+    claims = {
+        "sub": USER_ID,
+        "email": "tecnico@toyopana.test",
+        "aud": "authenticated",
+        "exp": int(time.time()) + 3600,
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+@pytest.fixture
+def jwt_secret(monkeypatch):
+    monkeypatch.setattr(auth_module.settings, "SUPABASE_JWT_SECRET", SECRET)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    invalidate_app_user()
+    yield
+    invalidate_app_user()
+
+
+async def test_valid_token_returns_claims(jwt_secret):
+    claims = await verify_token_locally(_token())
+
+    assert claims["sub"] == USER_ID
+    assert claims["email"] == "tecnico@toyopana.test"
+
+
+async def test_expired_token_is_rejected(jwt_secret):
+    with pytest.raises(HTTPException) as exc:
+        await verify_token_locally(_token(exp=int(time.time()) - 10))
+
+    assert exc.value.status_code == 401
+    assert exc.value.detail == "Token expired"
+
+
+async def test_forged_signature_is_rejected(jwt_secret):
+    with pytest.raises(HTTPException) as exc:
+        await verify_token_locally(_token(secret="someone-elses-secret-of-enough-len"))
+
+    assert exc.value.status_code == 401
+
+
+async def test_wrong_audience_is_rejected(jwt_secret):
+    with pytest.raises(HTTPException):
+        await verify_token_locally(_token(aud="anon"))
+
+
+async def test_garbage_token_is_rejected(jwt_secret):
+    with pytest.raises(HTTPException) as exc:
+        await verify_token_locally("not-a-jwt")
+
+    assert exc.value.status_code == 401
+
+
+async def test_without_a_secret_the_caller_falls_back(monkeypatch):
+    """No local key -> None, so get_current_user asks Supabase Auth instead."""
+    monkeypatch.setattr(auth_module.settings, "SUPABASE_JWT_SECRET", None)
+
+    assert await verify_token_locally(_token()) is None
+
+
+async def test_app_user_is_fetched_once_then_served_from_cache(monkeypatch):
+    calls = []
+
+    async def fake_fetch(user_id):
+        calls.append(user_id)
+        return {"id": user_id, "role": "admin", "organization": {"name": "Toyopana"}}
+
+    monkeypatch.setattr(auth_module, "get_app_user_with_org", fake_fetch)
+
+    first = await get_cached_app_user_with_org(USER_ID)
+    first["organization"]["name"] = "mutated by a caller"
+    second = await get_cached_app_user_with_org(USER_ID)
+
+    assert calls == [USER_ID]
+    # Callers get copies; the cached profile is never mutated through them.
+    assert second["organization"]["name"] == "Toyopana"
+
+
+async def test_missing_app_user_is_not_cached(monkeypatch):
+    calls = []
+
+    async def fake_fetch(user_id):
+        calls.append(user_id)
+        return None
+
+    monkeypatch.setattr(auth_module, "get_app_user_with_org", fake_fetch)
+
+    assert await get_cached_app_user_with_org(USER_ID) is None
+    assert await get_cached_app_user_with_org(USER_ID) is None
+    assert len(calls) == 2
+
+
+async def test_invalidate_forces_a_refetch(monkeypatch):
+    roles = iter(["tecnico", "admin"])
+
+    async def fake_fetch(user_id):
+        return {"id": user_id, "role": next(roles)}
+
+    monkeypatch.setattr(auth_module, "get_app_user_with_org", fake_fetch)
+
+    assert (await get_cached_app_user_with_org(USER_ID))["role"] == "tecnico"
+    invalidate_app_user(USER_ID)
+    assert (await get_cached_app_user_with_org(USER_ID))["role"] == "admin"
@@ -0,0 +1,112 @@
+"""Tests for the stale-while-revalidate cache (core/swr_cache.py).
+
+A fake clock drives freshness; computations are counted to check the
+single-flight and background-refresh behaviour.
+"""
+
+import asyncio
+
+import pytest
+
+from core.swr_cache import SWRCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+        self.gate = None
+
+    async def __call__(self):
+        self.calls += 1
+        value = self.calls
+        if self.gate is not None:
+            await self.gate.wait()
+        return value
+
+
+async def test_fresh_values_are_served_without_recomputing():
+    clock, compute = FakeClock(), Counter()
+    cache = SWRCache(fresh_for=10, stale_for=60, clock=clock)
+
+    assert await cache.get("org", compute) == 1
+    clock.now += 9
+    assert await cache.get("org", compute) == 1
+    assert compute.calls == 1
+
+
+async def test_stale_value_is_returned_while_one_refresh_runs():
+    clock, compute = FakeClock(), Counter()
+    cache = SWRCache(fresh_for=10, stale_for=60, clock=clock)
+    await cache.get("org", compute)
+
+    clock.now += 30
+    compute.gate = asyncio.Event()
+    assert await cache.get("org", compute) == 1
+    assert await cache.get("org", compute) == 1
+    assert cache.stats()["inflight"] == 1
+
+    compute.gate.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert compute.calls == 2
+    assert await cache.get("org", compute) == 2
+    assert cache.stats()["stale_hits"] == 2
+
+
+async def test_expired_value_waits_for_a_recompute():
+    clock, compute = FakeClock(), Counter()
+    cache = SWRCache(fresh_for=10, stale_for=60, clock=clock)
+    await cache.get("org", compute)
+
+    clock.now += 71
+    assert await cache.get("org", compute) == 2
+
+
+async def test_concurrent_misses_share_one_computation():
+    compute = Counter()
+    compute.gate = asyncio.Event()
+    cache = SWRCache(fresh_for=10, stale_for=60, clock=FakeClock())
+
+    waiters = [asyncio.create_task(cache.get("org", compute)) for _ in range(10)]
+    await asyncio.sleep(0)
+    compute.gate.set()
+
+    assert await asyncio.gather(*waiters) == [1] * 10
+    assert compute.calls == 1
+
+
+async def test_invalidate_discards_a_computation_already_running():
+    compute = Counter()
+    compute.gate = asyncio.Event()
+    cache = SWRCache(fresh_for=10, stale_for=60, clock=FakeClock())
+
+    first = asyncio.create_task(cache.get("org", compute))
+    await asyncio.sleep(0)
+    cache.invalidate("org")
+    second = asyncio.create_task(cache.get("org", compute))
+    await asyncio.sleep(0)
+    compute.gate.set()
+
+    assert await first == 1
+    assert await second == 2
+    assert await cache.get("org", compute) == 2  # the pre-invalidation value was not stored
+
+
+async def test_failed_compute_is_raised_and_not_cached():
+    cache = SWRCache(fresh_for=10, stale_for=60, clock=FakeClock())
+
+    async def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get("org", boom)
+    assert len(cache) == 0
+    assert cache.stats()["errors"] == 1
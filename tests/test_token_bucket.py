@@ -0,0 +1,64 @@
+"""Tests for the async token-bucket limiter (core/token_bucket.py).
+
+Time is a fake clock and sleeping advances it, so the tests are exact and
+instant.
+"""
+
+import pytest
+
+from core.token_bucket import TokenBucket
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_bucket(rate, capacity):
+    fake = FakeTime()
+    return TokenBucket(rate, capacity, clock=fake.clock, sleep=fake.sleep), fake
+
+
+async def test_burst_is_served_without_waiting():
+    bucket, fake = make_bucket(rate=10, capacity=5)
+
+    for _ in range(5):
+        assert await bucket.acquire() == 0.0
+
+    assert fake.sleeps == []
+
+
+async def test_callers_beyond_the_burst_wait_for_refill():
+    bucket, fake = make_bucket(rate=10, capacity=2)
+
+    for _ in range(4):
+        await bucket.acquire()
+
+    assert fake.sleeps == [pytest.approx(0.1), pytest.approx(0.1)]
+    assert fake.now == pytest.approx(0.2)
+
+
+async def test_refill_is_capped_at_capacity():
+    bucket, fake = make_bucket(rate=10, capacity=3)
+    for _ in range(3):
+        await bucket.acquire()
+
+    fake.now += 100
+    for _ in range(3):
+        await bucket.acquire()
+    await bucket.acquire()
+
+    assert fake.sleeps == [pytest.approx(0.1)]
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(0, 1)
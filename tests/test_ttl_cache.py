@@ -0,0 +1,66 @@
+"""Tests for the in-process TTL cache (core/ttl_cache.py).
+
+A fake clock drives expiry so the tests never sleep.
+"""
+
+from core.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("k", "v")
+
+    clock.now += 9.9
+    assert cache.get("k") == "v"
+    clock.now += 0.2
+    assert cache.get("k") is None
+
+
+def test_per_entry_ttl_overrides_default():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("short", 1, ttl=1)
+
+    clock.now += 2
+    assert cache.get("short") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(ttl=60, max_entries=2, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_stats_count_hits_and_misses():
+    cache = TTLCache(ttl=60, clock=FakeClock())
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+
+def test_invalidate_and_clear():
+    cache = TTLCache(ttl=60, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0